@@ -0,0 +1,4 @@
+def main(argv=None):
+    """ Console entry point (``plat``), same as ``python -m plat``. """
+    from plat.__main__ import main
+    return main(argv)
@@ -1,148 +1,94 @@
 #!/usr/bin/env python3
 import sys
-import time
+import argparse
 import pygame
 import logging
 import pathlib
 
-from typing import List
-from collections import namedtuple
+from functools import partial
 
 from plat.core.grid import Grid
-from plat.core.components import SpriteGroup, SpriteManager, AnimationManager
-from plat.states import GameState, EditState, PauseState, State
-
-from plat.core.utils import *
-from plat.config import FPS, SPRITE_MAPS, ANIMATIONS
-
-
-pygame.init()
-pygame.joystick.init()
-
-logger = logging.getLogger()
-logger.addHandler(logging.StreamHandler())
-logger.setLevel(logging.INFO)
-
-if len(sys.argv) > 1 and sys.argv[1] == 'v':
-    logger.setLevel(logging.DEBUG)
-
-
-CurrentState = namedtuple("CurrentState", "name obj")
-
-
-class Game:
-    """ 
-    Encapsulates basic game logic. 
-
-    Has the grid of the level, screen and clock. Also the list of root components.
-    """
-    logger = logging.getLogger('Game')
-
-    GAME = "game"
-    PAUSE = "pause"
-    EDIT = "edit"
-
-    def __init__(self, width, height, sprites_dir, sprite_maps):
-        self.height = height
-        self.width = width
-        self.screen = pygame.display.set_mode((width, height))
-        self.font_size = 20
-        self.font = pygame.font.SysFont("courier new", self.font_size)
-        self.components: List[Component] = []
-        self.clock = pygame.time.Clock()
-        self.player = None
-        self.joystick = None
-        self.states = {}
-        self.joy()
-
-        self.sprites = SpriteManager(self, SPRITE_MAPS, sprites_dir)
-        self.sprites.load()
-
-        self.animate = AnimationManager(ANIMATIONS, self.sprites)
-
-        self.running = False
-        self.dt = None
-        self._cur_state = None
-
-    @property
-    def state(self) -> State:
-        return CurrentState(self._cur_state, self.states[self._cur_state])
-
-    @state.setter
-    def state(self, value):
-        if value not in self.states.keys():
-            raise ValueError(f'Unkown state {value}')
-        self.logger.debug(f"changing from {self._cur_state} to {value}")
-        if self._cur_state is not None:
-            self.state.obj.end()
-        self._cur_state = value
-        self.state.obj.start()
-
-    def do_update(self):
-        self.state.obj.update()
-
-    def do_event(self):
-        while event := pygame.event.poll():
-            if event.type == pygame.JOYAXISMOTION:
-                continue
-
-            self.logger.info(f'Handling {event}')
-            if event.type == pygame.QUIT:
-                self.running = False
-            if event.type == pygame.JOYBUTTONDOWN:
-                if event.button == JOYBTN['Y']:
-                    if self.state.name == self.EDIT:
-                        self.states.get(self.GAME).reset_components()
-                        self.state = self.GAME
-                    elif self.state.name == self.GAME:
-                        self.state = self.EDIT
-                if event.button == JOYBTN['B']:
-                    breakpoint()
-                if event.button == JOYBTN['START']:
-                    if self.state.name == self.PAUSE:
-                        self.state = self.GAME
-                    elif self.state.name == self.GAME:
-                        self.state = self.PAUSE
-
-            self.state.obj.event(event)
-
-    def do_draw(self):
-        self.state.obj.draw(self.screen)
-        pygame.display.update()
-
-    def joy(self):
-        joystick_count = pygame.joystick.get_count()
-        if not joystick_count:
-            return
-
-        self.joystick = pygame.joystick.Joystick(1)
-        self.joystick.init()
-
-    def run(self, start_state: str, states: list = None):
-        self.logger.info('Starting')
-        self.states = states
-        self.state = start_state
-        self.running = True
-        self.joy()
-        while self.running:
-            self.dt = self.clock.tick(FPS) / 1000
-            # print('====== New Frame ======')
-            self.do_event()
-            self.do_update()
-            self.do_draw()
-            
-
-
-sprites_dir = pathlib.Path(__file__).parent.absolute() / 'sprites'
-game = Game(800, 800, sprites_dir, SPRITE_MAPS)
-grid = Grid(game)
-states = {
-    "edit": EditState(game, grid), 
-    "game": GameState(game, grid),
-    "pause": PauseState(game, grid)
-}
-
-
-print('GO')
-game.run(start_state="edit", states=states)
-print('END')
+from plat.game import Game
+from plat.core.trace import TRACE
+from plat.core.profiler import PROFILER, STARTUP
+from plat.states import GameState, EditState, PauseState
+
+from plat.config import SPRITE_MAPS, GRID_ROWS, GRID_COLS
+
+
+parser = argparse.ArgumentParser(prog='plat')
+parser.add_argument('verbose', nargs='?', choices=['v'], help='debug logging')
+parser.add_argument('--level', default=None, help='level file to load')
+parser.add_argument('--trace', default=None, metavar='FILE', help='record physics values and dump them to FILE on exit')
+parser.add_argument('--profile', default=None, metavar='FILE', help='profile frames and export a Chrome trace to FILE on exit')
+parser.add_argument('--profile-every', type=int, default=None, metavar='N', help='profile one out of every N frames')
+parser.add_argument('--profile-components', action='store_true', help='also time each root component')
+parser.add_argument('--record', default=None, metavar='FILE', help='record joystick input to FILE on exit')
+parser.add_argument('--replay', default=None, metavar='FILE', help='play the input recorded in FILE instead of the joystick')
+parser.add_argument('--headless', action='store_true', help='run on a dummy video driver, without a window')
+parser.add_argument('--state', default='edit', choices=['edit', 'game'], help='state to start in')
+parser.add_argument('--frames', type=int, default=None, help='stop after this many frames')
+parser.add_argument('--time-scale', type=float, default=1, help='speed relative to FPS, 0 for as fast as possible')
+parser.add_argument('--startup-report', action='store_true', help='log the time to the first frame by phase')
+parser.add_argument('--draw-every', type=int, default=1, help='draw one out of every N frames, 0 to never draw')
+
+
+def main(argv=None):
+    STARTUP.mark('imports')
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    pygame.joystick.init()
+    STARTUP.mark('pygame.init')
+
+    logger = logging.getLogger()
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
+
+    sprites_dir = pathlib.Path(__file__).parent.absolute() / 'sprites'
+    game = Game(800, 800, sprites_dir, SPRITE_MAPS, headless=args.headless)
+    if args.replay:
+        game.replay_input(args.replay)
+    elif args.record:
+        game.record_input()
+    grid = Grid(game, rows=GRID_ROWS, cols=GRID_COLS)
+    if args.level:
+        grid.load(args.level)
+    STARTUP.mark('grid')
+    # Built on first entry
+    states = {
+        "edit": partial(EditState, game, grid),
+        "game": partial(GameState, game, grid),
+        "pause": partial(PauseState, game, grid),
+    }
+
+    if args.trace:
+        TRACE.enable()
+    if args.profile:
+        PROFILER.enabled = True
+        PROFILER.components = PROFILER.components or args.profile_components
+        PROFILER.sample_every = args.profile_every or PROFILER.sample_every
+
+    print('GO')
+    try:
+        game.run(start_state=args.state, states=states, frames=args.frames, time_scale=args.time_scale, draw_every=args.draw_every)
+    finally:
+        if args.startup_report:
+            STARTUP.log()
+        if args.record and not args.replay:
+            game.input.save(args.record)
+        if args.trace:
+            TRACE.dump(args.trace)
+        if args.profile:
+            PROFILER.export(args.profile)
+            for name, p in PROFILER.summary().items():
+                logger.info(f'{name}: p50={p[50]:.3f}ms p95={p[95]:.3f}ms p99={p[99]:.3f}ms')
+    print('END')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Headless performance benchmarks for the engine hot paths.
+
+Each scenario runs in its own process and reports startup time, frame time
+percentiles and peak memory as JSON. Results can be saved as a baseline and
+later runs compared against it::
+
+    python -m plat.bench --save-baseline baseline.json
+    python -m plat.bench --baseline baseline.json
+"""
+import sys
+import json
+import time
+import pygame
+import pathlib
+import argparse
+import subprocess
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from plat.config import SPRITE_MAPS, PLAYER_START
+from plat.core.utils import JOYBTN
+
+
+class Scenario:
+    """ A level setup and what happens on each frame. """
+    ROWS = 20
+    COLS = 20
+    START = "game"
+    FRAMES = 600
+
+    def setup(self, game, grid):
+        pass
+
+    def before_frame(self, game, frame):
+        pass
+
+    @staticmethod
+    def fill(grid, block_cls, cells):
+        for r, c in cells:
+            grid.place(c * grid.bwidth, r * grid.bheight, block_cls)
+
+
+class EmptyGrid(Scenario):
+    START = "edit"
+
+
+class SolidGrid(Scenario):
+    """ Every cell but the one the player starts in is a SolidBlock. """
+    def setup(self, game, grid):
+        from plat.core.grid import SolidBlock
+        x, y = PLAYER_START
+        start = (y // grid.bheight, x // grid.bwidth)
+        self.fill(grid, SolidBlock, ((r, c) for r in range(grid.rows) for c in range(grid.cols) if (r, c) != start))
+
+
+class LiquidFall(Scenario):
+    """ The player falls through a column of LiquidBlocks onto a floor. """
+    def setup(self, game, grid):
+        from plat.core.grid import SolidBlock, LiquidBlock
+        self.fill(grid, LiquidBlock, ((r, c) for r in range(2, grid.rows - 1) for c in range(0, 4)))
+        self.fill(grid, SolidBlock, ((grid.rows - 1, c) for c in range(grid.cols)))
+
+
+class StateSwitch(Scenario):
+    """ Switch between edit and game mode every few frames. """
+    START = "edit"
+    EVERY = 10
+
+    def before_frame(self, game, frame):
+        if frame % self.EVERY == 0:
+            pygame.event.post(pygame.event.Event(pygame.JOYBUTTONDOWN, button=JOYBTN['Y']))
+
+
+class LargeGrid(Scenario):
+    """ Side scrolling level much larger than the screen. """
+    ROWS = 200
+    COLS = 1000
+
+    def setup(self, game, grid):
+        from plat.core.grid import SolidBlock
+        self.fill(grid, SolidBlock, ((r, c) for r in range(5, grid.rows, 7) for c in range(grid.cols) if c % 5))
+
+
+SCENARIOS = {
+    "empty_grid": EmptyGrid,
+    "solid_grid": SolidGrid,
+    "liquid_fall": LiquidFall,
+    "state_switch": StateSwitch,
+    "large_grid": LargeGrid,
+}
+
+# Metrics compared against the baseline, lower is better
+METRICS = ["startup_ms", "frame_p50_ms", "frame_p95_ms", "frame_p99_ms", "peak_rss_kb"]
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_scenario(name, frames=None) -> dict:
+    """ Run one scenario in the current process. """
+    from plat.game import Game
+    from plat.core.grid import Grid
+    from plat.core.profiler import PROFILER
+    from plat.states import GameState, EditState, PauseState
+
+    scenario = SCENARIOS[name]()
+    frames = frames or scenario.FRAMES
+
+    class BenchGame(Game):
+        def do_event(self):
+            scenario.before_frame(self, self.frame)
+            super().do_event()
+
+    start = time.perf_counter()
+    pygame.init()
+    game = BenchGame(800, 800, pathlib.Path(__file__).parent.absolute() / 'sprites', SPRITE_MAPS, headless=True)
+    grid = Grid(game, rows=scenario.ROWS, cols=scenario.COLS)
+    states = {
+        "edit": EditState(game, grid),
+        "game": GameState(game, grid),
+        "pause": PauseState(game, grid),
+    }
+    startup = time.perf_counter() - start
+    scenario.setup(game, grid)
+
+    PROFILER.enabled = True
+    PROFILER.sample_every = 1
+    PROFILER.reset(window=frames)
+    game.run(start_state=scenario.START, states=states, frames=frames, time_scale=0)
+    PROFILER.enabled = False
+
+    percentiles = PROFILER.percentiles('frame', (50, 95, 99, 100))
+    return {
+        "scenario": name,
+        "frames": frames,
+        "startup_ms": startup * 1000,
+        "frame_p50_ms": percentiles[50],
+        "frame_p95_ms": percentiles[95],
+        "frame_p99_ms": percentiles[99],
+        "frame_max_ms": percentiles[100],
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def run(names, frames=None) -> dict:
+    """ Run each scenario in a fresh process so startup and memory don't leak between them. """
+    results = {}
+    for name in names:
+        cmd = [sys.executable, '-m', 'plat.bench', '--run-one', name]
+        if frames:
+            cmd += ['--frames', str(frames)]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results[name] = json.loads(out.strip().splitlines()[-1])
+    return results
+
+
+def compare(results, baseline, tolerance) -> list:
+    """ Returns ``(scenario, metric, baseline, current)`` of every regression. """
+    regressions = []
+    for name, result in results.items():
+        for metric in METRICS:
+            old, new = baseline.get(name, {}).get(metric), result.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='plat.bench', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO', help=f'scenarios to run, all by default ({", ".join(SCENARIOS)})')
+    parser.add_argument('--frames', type=int, default=None, help='frames per scenario')
+    parser.add_argument('--output', default=None, help='write results as JSON to this file')
+    parser.add_argument('--baseline', default=None, help='compare against this results file')
+    parser.add_argument('--save-baseline', default=None, help='store the results as a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed slowdown over the baseline (0.1 = 10%%)')
+    parser.add_argument('--run-one', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios + [args.run_one] if name and name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenario {", ".join(unknown)} (choose from {", ".join(SCENARIOS)})')
+
+    if args.run_one:
+        print(json.dumps(run_scenario(args.run_one, args.frames)))
+        return 0
+
+    results = run(args.scenarios or list(SCENARIOS), args.frames)
+    output = json.dumps(results, indent=2)
+    print(output)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as fh:
+            fh.write(output)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        for name, metric, old, new in regressions:
+            print(f'REGRESSION {name}.{metric}: {old:.3f} -> {new:.3f}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
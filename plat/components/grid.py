@@ -1,6 +1,14 @@
 import pygame
+
+from collections import namedtuple
+
 from plat.core.components import BaseComponent
+from plat.core.analysis import LevelAnalyzer
+from plat.core.grid import SolidBlock
+from plat.core.states import State
+from plat.components.player import Player
 from plat.core.utils import *
+from plat.config import LEVEL_ANALYSIS, ANALYSIS_PROCESSES, PLAYER_START
 
 
 class GridLineComponent(BaseComponent):
@@ -9,12 +17,13 @@ class GridLineComponent(BaseComponent):
         return self.text, self.text.get_rect()
 
     def on_draw(self, screen):
-        for ix, row in enumerate(self.grid.grid):
-            for square in row:
-                if ix == len(self.grid.grid) - 1:
-                    pygame.draw.line(screen, GREY, (square.x, 0), (square.x, self.game.height))
-            _y = ix * self.grid.bwidth
-            pygame.draw.line(screen, GREY, (0, _y), (self.game.width, _y))
+        """ Draw the lines of the visible columns and rows. """
+        view = self.game.camera.rect
+        bwidth, bheight = self.grid.bwidth, self.grid.bheight
+        for _x in range(view.left // bwidth * bwidth, min(view.right, self.grid.width), bwidth):
+            pygame.draw.line(screen, GREY, (_x - view.x, 0), (_x - view.x, self.game.height))
+        for _y in range(view.top // bheight * bheight, min(view.bottom, self.grid.height), bheight):
+            pygame.draw.line(screen, GREY, (0, _y - view.y), (self.game.width, _y - view.y))
         return True
 
 
@@ -26,3 +35,99 @@ class GridSizeComponent(BaseComponent):
 
     def on_draw(self, screen):
         screen.blit(self.text, (0, 0))
+
+
+# Shading of a chunk for an analysis ``result`` and grid ``version``, ``mask``
+# flags its shaded cells and ``surface`` is None when there are none
+Overlay = namedtuple("Overlay", "result version mask surface")
+
+
+class LevelAnalysisComponent(BaseComponent):
+    """ Shade the cells the player can't reach and show tile stats, from the background level analysis. """
+    SHADE = (0, 0, 0, 90)
+
+    def new(self):
+        super().new()
+        self.analyzer = LevelAnalyzer() if LEVEL_ANALYSIS else None
+        self.result = None
+        self.overlays = {}
+
+    def stop(self):
+        """ Cancel the pending analysis, when leaving the editor. """
+        if self.analyzer is not None:
+            self.analyzer.cancel()
+
+    def get_attrs(self):
+        image = pygame.Surface((self.game.width, self.game.font_size), pygame.SRCALPHA).convert_alpha()
+        rect = image.get_rect()
+        rect.bottomleft = (0, self.game.height)
+        return image, rect
+
+    def on_update(self):
+        if self.analyzer is None:
+            return
+        executor = self.game.process_executor if ANALYSIS_PROCESSES else self.game.executor
+        result = self.analyzer.poll(self.grid, PLAYER_START, pygame.time.get_ticks(), executor, self.player_params())
+        if result is self.result:
+            return
+        self.result = result
+        self.image.fill((255, 255, 255, 160))
+        counts = ' '.join(f'{name}={count}' for name, count in result.counts.items())
+        text = f'reachable={result.reachable_count} unreachable={result.unreachable_count} jump={result.jump_tiles} {counts}'
+        self.image.blit(self.game.font.render(text, True, (0, 0, 0)), (0, 0))
+        self.game.mark_dirty(self.rect)
+
+    def player_params(self) -> dict:
+        """ Jump parameters of the game mode player, with the overrides of its
+        state. The Player defaults until that state is built. """
+        state = self.game.states.get(self.game.GAME)
+        player = next((c for c in state.children if isinstance(c, Player)), Player) if isinstance(state, State) else Player
+        return {'jump_force': player.JUMP_FORCE, 'gravity': player.GRAVITY, 'friction': player.FRICTION}
+
+    def on_draw(self, screen):
+        """ Shade the visible unreachable cells, one overlay blit per chunk. """
+        result, grid, camera = self.result, self.grid, self.game.camera
+        if result is None or len(result.reachable) != grid.rows * grid.cols:
+            self.overlays = {}
+            return
+        overlays = {}
+        for chunk in grid.active:
+            key = (chunk.row, chunk.col)
+            overlay = overlays[key] = self._overlay(chunk, self.overlays.get(key))
+            if overlay.surface is not None and camera.visible(chunk.rect):
+                screen.blit(overlay.surface, camera.apply(chunk.rect))
+        self.overlays = overlays
+
+    def _overlay(self, chunk, cached) -> Overlay:
+        """ Shading of ``chunk``, rebuilt when the result or the tiles changed.
+        Marks the chunk dirty when its shading changed. """
+        grid = self.grid
+        if cached is not None and cached.result is self.result and cached.version == grid.version:
+            return cached
+        mask = self._shaded(chunk)
+        if cached is not None and cached.mask == mask:
+            return cached._replace(result=self.result, version=grid.version)
+        surface = None
+        if any(mask):
+            surface = pygame.Surface(chunk.rect.size, pygame.SRCALPHA).convert_alpha()
+            cols = min(grid.CHUNK_SIZE, grid.cols - chunk.col * grid.CHUNK_SIZE)
+            for i, shaded in enumerate(mask):
+                if shaded:
+                    r, c = divmod(i, cols)
+                    surface.fill(self.SHADE, (c * grid.bwidth, r * grid.bheight, grid.bwidth, grid.bheight))
+        if cached is not None or surface is not None:
+            self.game.mark_dirty(self.game.camera.apply(chunk.rect))
+        return Overlay(self.result, grid.version, mask, surface)
+
+    def _shaded(self, chunk) -> bytes:
+        """ 1 for each unreachable, non solid cell of ``chunk``, row-major. """
+        grid = self.grid
+        reachable, tiles, cols = self.result.reachable, grid.tiles, grid.cols
+        solid = {grid.tile_id(kind) for kind in grid.TILES if issubclass(kind, SolidBlock)}
+        first_row, first_col = chunk.row * grid.CHUNK_SIZE, chunk.col * grid.CHUNK_SIZE
+        last_row, last_col = min(first_row + grid.CHUNK_SIZE, grid.rows), min(first_col + grid.CHUNK_SIZE, cols)
+        return bytes(
+            not reachable[r * cols + c] and tiles[r * cols + c] not in solid
+            for r in range(first_row, last_row)
+            for c in range(first_col, last_col)
+        )
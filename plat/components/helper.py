@@ -1,4 +1,8 @@
+import pygame
+
 from plat.core.components import BaseComponent
+from plat.core.profiler import PROFILER
+from plat.config import HUD_REFRESH_MS
 from pygame import Surface, SRCALPHA
 
 class PlayerStats(BaseComponent):
@@ -14,35 +18,73 @@ class PlayerStats(BaseComponent):
 		"FRICTION",
 		"FRICTION_AXIS",
 		"INPUT_VEL_MULTIPLIER",
-		"CURRENT_LIQUID_SLOWDOWN"
+		"drag"
 	]
+	# Values that change every update, redrawn at most every REFRESH_MS
+	THROTTLED = {"pos", "center", "velocity", "acceleration", "joyinput"}
+	REFRESH_MS = HUD_REFRESH_MS
 
 	def get_attrs(self):
-		player = self.game.player
-		image = self.get_image(player)
+		self.lines = [None] * len(self.ATTRS)
+		self.last_refresh = [0] * len(self.ATTRS)
+		image = Surface((400, 400), SRCALPHA).convert_alpha()
 		rect = image.get_rect()
 		rect.x = 0
 		rect.y = self.game.font_size
-		return image, rect 
+		self.blit_on(self.game.player, image, rect)
+		return image, rect
 
 	def on_update(self):
-		player = self.game.player
-		self.image = self.get_image(player)
-
-	def get_image(self, component):
-		surf = Surface((400, 400), SRCALPHA)
-		surf = surf.convert_alpha()
-		return self.blit_on(component, surf)
+		self.blit_on(self.game.player, self.image, self.rect)
 
-	def blit_on(self, comp, surf):
+	def blit_on(self, comp, surf, rect):
+		""" Re-render only the lines whose text changed. """
 		font = self.game.font
 		rowsize = self.game.font_size
+		now = pygame.time.get_ticks()
 		for ix, attr in enumerate(self.ATTRS):
+			if attr in self.THROTTLED and self.lines[ix] is not None and now - self.last_refresh[ix] < self.REFRESH_MS:
+				continue
 			try:
 				value = str(getattr(comp, attr))
-				text = value if comp else 'Uninitialized'
-				text = font.render(f"{attr}: {text}", True, (0, 0, 0))
-				surf.blit(text, (0, rowsize * ix))
+				text = f"{attr}: {value if comp else 'Uninitialized'}"
 			except AttributeError:
-				pass
-		return surf
\ No newline at end of file
+				text = None
+			if text == self.lines[ix]:
+				continue
+			self.lines[ix] = text
+			self.last_refresh[ix] = now
+			line = pygame.Rect(0, rowsize * ix, surf.get_width(), rowsize)
+			surf.fill((0, 0, 0, 0), line)
+			if text is not None:
+				surf.blit(font.render(text, True, (0, 0, 0)), line)
+			self.game.mark_dirty(line.move(rect.topleft))
+
+
+
+class ProfilerOverlay(BaseComponent):
+	""" Rolling frame phase percentiles, in the top right corner. """
+	SPANS = ["frame", "event", "update", "draw"]
+	REFRESH_MS = HUD_REFRESH_MS
+
+	def get_attrs(self):
+		self.last_refresh = None
+		image = Surface((300, self.game.font_size * (len(self.SPANS) + 1)), SRCALPHA).convert_alpha()
+		rect = image.get_rect()
+		rect.topright = (self.game.width, 0)
+		return image, rect
+
+	def on_update(self):
+		now = pygame.time.get_ticks()
+		if self.last_refresh is not None and now - self.last_refresh < self.REFRESH_MS:
+			return
+		self.last_refresh = now
+		font = self.game.font
+		rowsize = self.game.font_size
+		self.image.fill((255, 255, 255, 160))
+		self.image.blit(font.render("ms     p50    p95    p99", True, (0, 0, 0)), (0, 0))
+		for ix, span in enumerate(self.SPANS, 1):
+			p = PROFILER.percentiles(span)
+			text = f"{span:<6} {p[50]:6.2f} {p[95]:6.2f} {p[99]:6.2f}"
+			self.image.blit(font.render(text, True, (0, 0, 0)), (0, rowsize * ix))
+		self.game.mark_dirty(self.rect)
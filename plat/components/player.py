@@ -3,20 +3,22 @@ import pygame
 
 from plat.core.components import BaseComponent
 from plat.core.mixins import JoyMoverMixin, GravityMixin, AnimationMixin
+from plat.core.physics import BatchMoverMixin
 from plat.core.fun import MoverCollissionsWithBlocksMixin, CollidableJumpFromSolidMixin, SwimmerMixin
-from plat.core.grid import Block, SolidBlock, LiquidBlock
+from plat.core.grid import Block, SolidBlock, LiquidBlock, CrumbleBlock
 from plat.core.utils import *
 
 from plat.config import *
 
 
-class ArrowComponent(JoyMoverMixin, BaseComponent):
+class ArrowComponent(JoyMoverMixin, BatchMoverMixin, BaseComponent):
     """ Arrow moved by the player in Edit Mode """
     SIZE = 10
     FRICTION = ARROW_FRICTION
     FRICTION_AXIS = JoyMoverMixin.AXIS_BOTH
     ACCELERATION = False
     INPUT_VEL_MULTIPLIER = pygame.Vector2(ARROW_JOY_SPEED)
+    EVENTS = (pygame.JOYBUTTONUP,)
 
     def get_attrs(self):
         image = pygame.Surface((self.SIZE, self.SIZE))
@@ -27,23 +29,26 @@ class ArrowComponent(JoyMoverMixin, BaseComponent):
 
     def on_event(self, event):
         if event.type == pygame.JOYBUTTONUP:
-            sq = self.grid.get_square(*self.pos, 2)
             if event.button == JOYBTN['Y']:
-                print(sq)
+                print(self.grid.get_square(*self.pos, 2))
             elif event.button == JOYBTN['A']:
-                self.grid.set_square(*self.pos, Block.from_(sq))
+                self.grid.place(*self.pos, Block)
             elif event.button == JOYBTN['X']:
-                self.grid.set_square(*self.pos, SolidBlock.from_(sq))
+                self.grid.place(*self.pos, SolidBlock)
             elif event.button == JOYBTN['R1']:
-                self.grid.set_square(*self.pos, LiquidBlock.from_(sq))
+                self.grid.place(*self.pos, LiquidBlock)
+            elif event.button == JOYBTN['R2']:
+                self.grid.place(*self.pos, CrumbleBlock)
             elif event.button == JOYBTN['SHARE']:
                 self.grid.reset()
+            elif event.button == JOYBTN['L1']:
+                self.grid.save(self.grid.path or LEVEL_FILE)
                 
     def on_update(self):
         self.calculate_newpos()
 
 
-class Player(SwimmerMixin, AnimationMixin, CollidableJumpFromSolidMixin, GravityMixin, JoyMoverMixin, BaseComponent):
+class Player(SwimmerMixin, AnimationMixin, CollidableJumpFromSolidMixin, GravityMixin, JoyMoverMixin, BatchMoverMixin, BaseComponent):
     """ Player for Game Mode """
     SIZE = 10 
     INPUT_VEL_MULTIPLIER = pygame.Vector2(PLAYER_JOY_SPEED)
@@ -53,9 +58,13 @@ class Player(SwimmerMixin, AnimationMixin, CollidableJumpFromSolidMixin, Gravity
     JUMP_FORCE = PLAYER_JUMP_FORCE
     GRAVITY = PLAYER_GRAVITY
     FRICTION_AXIS = JoyMoverMixin.AXIS_BOTH
+    EVENTS = (pygame.JOYBUTTONUP,)
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, params: dict = None, **kwargs):
+        """ ``params`` override class attributes for this player, like ``{'GRAVITY': 0.5}``. """
         self.walking_right = True
+        for name, value in (params or {}).items():
+            setattr(self, name, value)
         super().__init__(*args, **kwargs)
             
     def get_animations(self):
@@ -73,7 +82,7 @@ class Player(SwimmerMixin, AnimationMixin, CollidableJumpFromSolidMixin, Gravity
         image = self.game.sprites.get('characters.blue', 'blue_01.png')
         image = pygame.transform.scale(image, (image.get_width() - 1, image.get_height() - 1))
         rect = image.get_rect()
-        rect.x, rect.y = 40, 40
+        rect.x, rect.y = PLAYER_START
         return image, rect
 
     def on_update(self):
@@ -92,7 +101,6 @@ class Player(SwimmerMixin, AnimationMixin, CollidableJumpFromSolidMixin, Gravity
 
     def on_event(self, event):
         if event.type == pygame.JOYBUTTONUP:
-            sq = self.grid.get_square(*self.pos, 2)
             if event.button == JOYBTN['L1']:
                 self.JUMP_FORCE -= 1
             elif event.button == JOYBTN['R1']:
@@ -1,5 +1,20 @@
 FPS = 60
 
+# Physics steps per second. Speeds, forces and frictions below are per step,
+# so changing the rate changes gameplay unless they are re-tuned.
+PHYSICS_RATE = 60
+# Max physics steps run to catch up on a single slow frame
+MAX_PHYSICS_STEPS = 5
+# Draw movers between their last two physics steps
+RENDER_INTERPOLATION = True
+
+# Push only the regions reported by components to the display instead of the whole window
+DIRTY_RECTS = False
+# Drop events no component subscribed to in SDL, before they reach the queue
+BLOCK_UNUSED_EVENTS = True
+# Integrate BatchMoverMixin components (player, arrow) together with numpy when it is installed
+BATCH_MOVERS = True
+
 
 ARROW_JOY_SPEED = (10, 10)
 ARROW_FRICTION = -0.7
@@ -10,7 +25,67 @@ PLAYER_FRICTION = -0.09
 PLAYER_MIN_JUMP = 1
 PLAYER_JUMP_FORCE = 21
 PLAYER_GRAVITY = 0.76
+# Top left corner where the player appears when entering game mode
+PLAYER_START = (40, 40)
+
+# Threads of the game executor, running the editor level analysis and the
+# sprite preloading off the frame loop
+BACKGROUND_WORKERS = 2
+
+# Editor level analysis (reachability, tile stats) in the background, started
+# ANALYSIS_DELAY_MS after the last edit. It runs on the game threads, or on
+# BACKGROUND_WORKERS processes with ANALYSIS_PROCESSES: the search is pure
+# Python and holds the GIL, processes keep it off the frame loop on big levels
+# at the cost of pickling the level tiles for every job
+LEVEL_ANALYSIS = True
+ANALYSIS_PROCESSES = False
+ANALYSIS_DELAY_MS = 200
+
+# Frame profiler (plat.core.profiler): measure one of every PROFILE_SAMPLE_EVERY
+# frames, optionally per component, keeping PROFILE_WINDOW durations per span for
+# percentiles and PROFILE_MAX_EVENTS spans for Chrome trace export
+PROFILE = False
+PROFILE_SAMPLE_EVERY = 1
+PROFILE_COMPONENTS = False
+PROFILE_WINDOW = 300
+PROFILE_MAX_EVENTS = 100000
+PROFILE_OVERLAY = False
+
+# Records kept by the physics trace ring buffer (plat.core.trace)
+TRACE_CAPACITY = 65536
+
+# Level size in blocks
+GRID_ROWS = 20
+GRID_COLS = 20
+
+# Where the editor saves the level when no level file was loaded
+LEVEL_FILE = "level.plat"
+
+# Tiles per side of a grid chunk, and chunks kept loaded around the viewport
+CHUNK_SIZE = 16
+CHUNK_MARGIN = 1
+
+# Released grid blocks kept for reuse, per block type
+BLOCK_POOL_SIZE = 1024
+
+# Font for all text: a font file, a system font name (looked up once and the
+# path cached next to the compiled sprites) or None for pygame's bundled font
+FONT = "courier new"
+
+# Max number of frames kept by SpriteManager (None for unbounded)
+SPRITE_CACHE_SIZE = None
+
+# Max number of rendered text lines kept by Game.font
+TEXT_CACHE_SIZE = 512
+# Min milliseconds between redraws of fast changing HUD values (0 redraws every update)
+HUD_REFRESH_MS = 100
 
+# Compile atlases to sprites/.cache and load them from there while up to date
+ATLAS_CACHE = True
+# Load sprite atlases when first used instead of at startup, and decode the
+# rest in a background thread once the game is running
+LAZY_SPRITES = True
+PRELOAD_SPRITES = True
 
 SPRITE_MAPS = {
 	"characters": {
@@ -0,0 +1,172 @@
+"""
+Level analysis for the editor, run off the frame loop.
+
+``LevelAnalyzer`` snapshots the tiles of a grid and runs ``analyze`` on a
+game executor (threads, or processes with ``ANALYSIS_PROCESSES``). Jobs made
+stale by later edits are cancelled or their results dropped, ``poll`` hands
+back the latest result without blocking.
+"""
+import time
+import logging
+
+from collections import deque, namedtuple
+
+from plat.core.level import LevelFile
+from plat.config import PLAYER_JUMP_FORCE, PLAYER_GRAVITY, PLAYER_FRICTION, ANALYSIS_DELAY_MS
+
+
+# Tile ids of Grid.TILES
+EMPTY, SOLID, LIQUID, CRUMBLE = 0, 1, 2, 3
+TILE_NAMES = {EMPTY: 'empty', SOLID: 'solid', LIQUID: 'liquid', CRUMBLE: 'crumble'}
+# Tiles movers stand on and can't go through
+BLOCKING = {SOLID, CRUMBLE}
+
+# ``chunks`` maps (chunk row, chunk col) to the tile ids of the chunk, row-major,
+# the ones missing are still encoded in the ``level`` file
+LevelSnapshot = namedtuple("LevelSnapshot", "version chunks chunk_size level rows cols bheight start")
+LevelAnalysis = namedtuple("LevelAnalysis", "version counts reachable reachable_count unreachable_count jump_tiles seconds")
+
+
+def jump_height(jump_force=PLAYER_JUMP_FORCE, gravity=PLAYER_GRAVITY, friction=PLAYER_FRICTION) -> float:
+    """ Pixels the player rises in a jump, stepping the same formulas as the movers. """
+    acc = gravity - jump_force
+    vel = pos = 0.0
+    top = 0.0
+    while True:
+        vel += acc
+        pos += vel + 0.5 * acc
+        top = min(top, pos)
+        if vel >= 0:
+            return -top
+        acc = gravity + vel * friction
+
+
+def level_tiles(snapshot: LevelSnapshot) -> bytearray:
+    """ The ``rows * cols`` tile ids of a snapshot. """
+    rows, cols, size = snapshot.rows, snapshot.cols, snapshot.chunk_size
+    tiles = bytearray(rows * cols)
+    level = LevelFile(snapshot.level) if snapshot.level is not None else None
+    try:
+        for crow in range(-(-rows // size)):
+            for ccol in range(-(-cols // size)):
+                data = snapshot.chunks.get((crow, ccol))
+                if data is None:
+                    data = level.read_chunk(crow, ccol)
+                row, col = crow * size, ccol * size
+                width = min(size, cols - col)
+                for r in range(min(size, rows - row)):
+                    start = (row + r) * cols + col
+                    tiles[start:start + width] = data[r * width:(r + 1) * width]
+    finally:
+        if level is not None:
+            level.close()
+    return tiles
+
+
+def analyze(snapshot: LevelSnapshot, jump_force=PLAYER_JUMP_FORCE, gravity=PLAYER_GRAVITY, friction=PLAYER_FRICTION) -> LevelAnalysis:
+    """
+    Tile statistics and the cells the player can reach from ``snapshot.start``.
+
+    Breadth first search over ``(cell, jump left)``: standing on a solid tile
+    (or the bottom of the level) refills the jump to ``jump_tiles`` rows, moving
+    up spends one, moving sideways keeps it and falling empties it. Liquid is
+    traversed like air.
+    """
+    started = time.perf_counter()
+    tiles, rows, cols = level_tiles(snapshot), snapshot.rows, snapshot.cols
+    counts = {name: tiles.count(tile) for tile, name in TILE_NAMES.items()}
+    jump_tiles = int(jump_height(jump_force, gravity, friction) // snapshot.bheight)
+
+    reachable = bytearray(rows * cols)
+    best = [-1] * (rows * cols)
+    start_r, start_c = snapshot.start
+    queue = deque()
+    if 0 <= start_r < rows and 0 <= start_c < cols and tiles[start_r * cols + start_c] not in BLOCKING:
+        queue.append((start_r, start_c, 0))
+    while queue:
+        r, c, jump = queue.popleft()
+        ix = r * cols + c
+        if r == rows - 1 or tiles[ix + cols] in BLOCKING:
+            jump = jump_tiles
+        if best[ix] >= jump:
+            continue
+        best[ix] = jump
+        reachable[ix] = 1
+        for nr, nc, njump in ((r, c - 1, jump), (r, c + 1, jump), (r - 1, c, jump - 1), (r + 1, c, 0)):
+            if njump < 0 or not (0 <= nr < rows and 0 <= nc < cols):
+                continue
+            if tiles[nr * cols + nc] not in BLOCKING and best[nr * cols + nc] < njump:
+                queue.append((nr, nc, njump))
+
+    reachable_count = sum(reachable)
+    return LevelAnalysis(
+        version=snapshot.version,
+        counts=counts,
+        reachable=bytes(reachable),
+        reachable_count=reachable_count,
+        unreachable_count=rows * cols - counts['solid'] - counts['crumble'] - reachable_count,
+        jump_tiles=jump_tiles,
+        seconds=time.perf_counter() - started,
+    )
+
+
+class LevelAnalyzer:
+    """
+    Runs ``analyze`` on grid snapshots in the background.
+
+    Call ``poll`` once per frame with the executor to run on (one of the game
+    ones, see ``Game.executor``) and the player parameters passed to
+    ``analyze``: it submits a new job when the grid or the parameters changed
+    (and the last change is ``delay_ms`` old), cancels queued jobs the change
+    made stale and returns the latest result. Compare its ``version`` with the
+    grid one to know if it is still up to date. Jobs cancelled by the
+    executor shutting down are submitted again on the next ``poll``.
+    """
+    logger = logging.getLogger('LevelAnalyzer')
+
+    def __init__(self, delay_ms=ANALYSIS_DELAY_MS):
+        self.delay_ms = delay_ms
+        self.result: LevelAnalysis = None
+        # ((grid version, params), future)
+        self.jobs = deque()
+        self._version = None
+        self._params = None
+        self._changed_at = None
+
+    def poll(self, grid, start, now, executor, params: dict = None) -> LevelAnalysis:
+        """ ``params`` are the ``jump_force``, ``gravity`` and ``friction`` of the player. """
+        params = params or {}
+        if grid.version != self._version or params != self._params:
+            self._version, self._params = grid.version, params
+            self._changed_at = now
+            self._cancel_stale()
+        if self._changed_at is not None and now - self._changed_at >= self.delay_ms:
+            self._changed_at = None
+            self.jobs.append(((grid.version, params), executor.submit(analyze, grid.snapshot(start), **params)))
+
+        while self.jobs and self.jobs[0][1].done():
+            key, job = self.jobs.popleft()
+            current = key == (self._version, self._params)
+            if job.cancelled():
+                if current:
+                    self._changed_at = now
+                continue
+            error = job.exception()
+            if error is not None:
+                self.logger.error(f'Level analysis failed: {error!r}')
+                continue
+            result = job.result()
+            if current:
+                self.result = result
+                self.logger.debug(f'Analyzed level version {result.version} in {result.seconds * 1000:.2f}ms')
+        return self.result
+
+    def _cancel_stale(self):
+        for _, job in self.jobs:
+            job.cancel()
+
+    def cancel(self):
+        """ Drop the pending jobs, the grid is analyzed again on the next ``poll``. """
+        self._cancel_stale()
+        self.jobs.clear()
+        self._version = None
@@ -0,0 +1,146 @@
+import os
+import sys
+import mmap
+import struct
+import logging
+import pathlib
+
+import pygame
+
+from os.path import dirname, join
+
+
+class AtlasCache:
+    """
+    On-disk cache of compiled sprite atlases.
+
+    Each atlas is compiled to a single binary file holding the sprite index
+    and the decoded pixels of its source image, so loading it skips the XML
+    parsing and PNG decoding. Files are memory-mapped on load and invalidated
+    when the XML or the image they were compiled from changes.
+
+    Layout (little endian)::
+
+        header   MAGIC, VERSION, xml mtime_ns, xml size, img mtime_ns, img size,
+                 image width, image height, sprite count, image name length
+        image    image file name (utf-8)
+        index    per sprite: name length, name (utf-8), x, y, width, height
+        pixels   width * height * 3 bytes of RGB
+    """
+    logger = logging.getLogger('AtlasCache')
+
+    MAGIC = b'PLATATL'
+    VERSION = 1
+    EXTENSION = '.atlas'
+
+    HEADER = struct.Struct('<7sBQQQQIIIH')
+    SPRITE = struct.Struct('<H')
+    RECT = struct.Struct('<IIII')
+
+    def __init__(self, cache_dir):
+        self.cache_dir = pathlib.Path(cache_dir)
+
+    def path_for(self, name) -> pathlib.Path:
+        return self.cache_dir / f"{name}{self.EXTENSION}"
+
+    def load(self, name, xml_path):
+        """ Returns ``(sprites, source)`` from the compiled atlas or None if
+        there is no up to date compiled file for ``xml_path``. """
+        path = self.path_for(name)
+        try:
+            with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._read(mm, xml_path)
+        except (OSError, ValueError, struct.error) as e:
+            self.logger.debug(f'No compiled atlas for {name}: {e}')
+            return None
+
+    def _read(self, mm, xml_path):
+        (magic, version, xml_mtime, xml_size, img_mtime, img_size,
+            width, height, count, namelen) = self.HEADER.unpack_from(mm, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError('bad header')
+        offset = self.HEADER.size
+        source = mm[offset:offset + namelen].decode('utf-8')
+        offset += namelen
+        if _stamp(xml_path) != (xml_mtime, xml_size):
+            raise ValueError(f'{xml_path} changed')
+        if _stamp(join(dirname(xml_path), source)) != (img_mtime, img_size):
+            raise ValueError(f'{source} changed')
+
+        sprites = {}
+        for _ in range(count):
+            size, = self.SPRITE.unpack_from(mm, offset)
+            offset += self.SPRITE.size
+            spritename = mm[offset:offset + size].decode('utf-8')
+            offset += size
+            x, y, w, h = self.RECT.unpack_from(mm, offset)
+            offset += self.RECT.size
+            sprites[spritename] = {'name': spritename, 'x': x, 'y': y, 'width': w, 'height': h}
+
+        size = width * height * 3
+        if len(mm) - offset != size:
+            raise ValueError('truncated pixel data')
+        view = memoryview(mm)[offset:offset + size]
+        try:
+            image = pygame.image.frombuffer(view, (width, height), 'RGB').copy()
+        finally:
+            view.release()
+        return sprites, image
+
+    def store(self, name, xml_path, source, sprites, image):
+        """ Compile ``sprites`` and the decoded ``image`` loaded from ``xml_path``. """
+        path = self.path_for(name)
+        encoded = source.encode('utf-8')
+        width, height = image.get_size()
+        chunks = [self.HEADER.pack(
+            self.MAGIC, self.VERSION,
+            *_stamp(xml_path), *_stamp(join(dirname(xml_path), source)),
+            width, height, len(sprites), len(encoded),
+        ), encoded]
+        for spritename, data in sprites.items():
+            spritename = spritename.encode('utf-8')
+            chunks.append(self.SPRITE.pack(len(spritename)))
+            chunks.append(spritename)
+            chunks.append(self.RECT.pack(*(int(data[k]) for k in ('x', 'y', 'width', 'height'))))
+        chunks.append(pygame.image.tostring(image, 'RGB'))
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'wb') as fh:
+                fh.write(b''.join(chunks))
+            os.replace(tmp, path)
+        except OSError as e:
+            self.logger.warning(f'Could not write compiled atlas {path}: {e}')
+            return None
+        self.logger.debug(f'Compiled atlas {name} to {path}')
+        return path
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def default_cache_dir(sprites_dir) -> pathlib.Path:
+    return pathlib.Path(sprites_dir) / '.cache'
+
+
+def compile_all(sprites_dir, maps, cache_dir=None):
+    """ Build step: compile every atlas in ``maps`` ahead of time. """
+    from plat.core.components import SpriteManager, SpriteXmlParser
+    cache = AtlasCache(cache_dir or default_cache_dir(sprites_dir))
+    compiled = {}
+    for name, path in SpriteManager.atlases(maps, sprites_dir):
+        source, rows = SpriteXmlParser.parse(path)
+        sprites = {sprite['name']: sprite for sprite in rows}
+        image = pygame.image.load(join(dirname(path), source))
+        compiled[name] = cache.store(name, path, source, sprites, image)
+    return compiled
+
+
+if __name__ == '__main__':
+    from plat.config import SPRITE_MAPS
+    logging.basicConfig(level=logging.DEBUG)
+    sprites_dir = pathlib.Path(sys.argv[1]) if len(sys.argv) > 1 else pathlib.Path(__file__).parent.parent / 'sprites'
+    for name, path in compile_all(sprites_dir, SPRITE_MAPS).items():
+        print(f'{name}: {path}')
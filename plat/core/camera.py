@@ -0,0 +1,36 @@
+from pygame import Rect
+
+
+class Camera:
+    """ Viewport over the level, in world coordinates. """
+    def __init__(self, width, height):
+        self.rect = Rect(0, 0, width, height)
+
+    @property
+    def offset(self):
+        return self.rect.topleft
+
+    def follow(self, target: Rect, bounds: Rect) -> bool:
+        """ Center the viewport on ``target`` without leaving ``bounds``.
+        Returns True if the viewport moved. """
+        old = self.rect.topleft
+        self.rect.center = target.center
+        if bounds.width <= self.rect.width:
+            self.rect.x = bounds.x
+        else:
+            self.rect.x = min(max(self.rect.x, bounds.left), bounds.right - self.rect.width)
+        if bounds.height <= self.rect.height:
+            self.rect.y = bounds.y
+        else:
+            self.rect.y = min(max(self.rect.y, bounds.top), bounds.bottom - self.rect.height)
+        return self.rect.topleft != old
+
+    def apply(self, rect: Rect) -> Rect:
+        """ World rect to screen rect. """
+        return rect.move(-self.rect.x, -self.rect.y)
+
+    def visible(self, rect: Rect) -> bool:
+        return self.rect.colliderect(rect)
+
+    def __repr__(self):
+        return f"<Camera {self.rect}>"
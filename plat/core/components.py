@@ -1,20 +1,34 @@
+import os
+import json
+import time
+import pygame
 import logging
 import xml.etree.ElementTree as ET
 
 from typing import List
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from concurrent.futures import wait as wait_futures
 from os.path import dirname, join, sep
 
-from pygame import Surface
+from pygame import Surface, Rect
 from pygame.math import Vector2
 from pygame.sprite import Group, Sprite
-from pygame.transform import scale, flip
+from pygame.transform import scale, flip as pg_flip
 from pygame.image import load as pg_load
+from pygame.mask import from_surface
 
+from plat.core.atlas import AtlasCache
 from plat.core.utils import *
 
 
 Pos = namedtuple("Pos", "x y")
+FrameMask = namedtuple("FrameMask", "mask bounds")
+
+
+def mask_bounds(mask) -> Rect:
+    """ Smallest rect holding every set pixel of ``mask``. """
+    rects = mask.get_bounding_rects()
+    return rects[0].unionall(rects[1:]) if rects else Rect(0, 0, 0, 0)
 
 
 class SpriteXmlParser:
@@ -33,55 +47,231 @@ class SpriteXmlParser:
         return row.attrib
 
 
+class FrameCache:
+    """ Keyed store of ready to blit frames with an optional LRU bound. """
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+
+    def get(self, key):
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._frames.move_to_end(key)
+        return frame
+
+    def put(self, key, frame):
+        self._frames[key] = frame
+        self._frames.move_to_end(key)
+        if self.maxsize is not None and len(self._frames) > self.maxsize:
+            self._frames.popitem(last=False)
+
+    def clear(self):
+        self._frames.clear()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __repr__(self):
+        return f"<FrameCache size={len(self)} maxsize={self.maxsize} hits={self.hits} misses={self.misses}>"
+
+
+def load_font(name, size, cache_dir=None):
+    """
+    Font ``name`` at ``size`` without scanning the system fonts on every start.
+
+    ``name`` is a font file, a system font name or None for pygame's bundled
+    font. System font paths are resolved once and kept in ``cache_dir``.
+    """
+    if name is None or os.path.isfile(name):
+        return pygame.font.Font(name, size)
+    index = join(cache_dir, 'fonts.json') if cache_dir else None
+    try:
+        with open(index) as fh:
+            fonts = json.load(fh)
+    except (TypeError, OSError, ValueError):
+        fonts = {}
+    path = fonts.get(name)
+    if path is None or (path and not os.path.isfile(path)):
+        path = fonts[name] = pygame.font.match_font(name) or ''
+        if index:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(index, 'w') as fh:
+                    json.dump(fonts, fh)
+            except OSError as e:
+                logging.getLogger('Fonts').warning(f'Could not cache font lookup in {index}: {e}')
+    return pygame.font.Font(path or None, size)
+
+
+class CachedFont:
+    """ Wraps a ``pygame.font.Font`` so each (text, color) pair is rendered once.
+    Rendered surfaces are shared between callers and must not be drawn on. """
+    def __init__(self, font, maxsize=None):
+        self.font = font
+        self.cache = FrameCache(maxsize)
+
+    def render(self, text, antialias, color, background=None) -> Surface:
+        key = (text, antialias, tuple(color), tuple(background) if background else None)
+        surface = self.cache.get(key)
+        if surface is None:
+            surface = self.font.render(text, antialias, color, background)
+            self.cache.put(key, surface)
+        return surface
+
+    def __getattr__(self, name):
+        return getattr(self.font, name)
+
+
 class SpriteManager:
-    def __init__(self, game, maps, sprites_dir):
+    """
+    Loads sprite atlases and renders their frames.
+
+    Atlases are loaded all at once by ``load()``, or with ``load(lazy=True)``
+    the first time one of their frames is needed. ``prefetch`` decodes atlases
+    in a background thread, they are finished (converted to the display
+    format) on the main thread when first used or on ``wait``.
+    """
+    logger = logging.getLogger('SpriteManager')
+    SIZE = (40, 40)
+
+    def __init__(self, game, maps, sprites_dir, cache_size=None, atlas_cache: AtlasCache = None):
         self.game = game
         self.sprites_dir = sprites_dir
         self.sprites = {}
         self.sources = {}
         self.maps = maps
+        self.cache = FrameCache(cache_size)
+        self.masks = FrameCache(cache_size)
+        self.atlas_cache = atlas_cache
+        self.load_times = {}
+        self.paths = dict(self.atlases(maps, sprites_dir))
+        self._pending = {}
 
-    def load(self):
-        self._load(self.maps)
-
-    def _load(self, map_, name=None):
-        name = name.strip('.') if name else ""
+    @classmethod
+    def atlases(cls, map_, sprites_dir, name=""):
+        """ Yields ``(name, xml path)`` for every atlas in the sprite map. """
         if isinstance(map_, dict):
             for category, next_ in map_.items():
-                name += f".{category}"
-                self._load(next_, name)
+                yield from cls.atlases(next_, sprites_dir, f"{name}.{category}".strip('.'))
 
         elif isinstance(map_, str):
-            path = join(
-                self.sprites_dir, 
-                name.replace('.', sep),
-                map_,
-            )
-            self._load_atlas(name, path)
-
-    def _load_atlas(self, name, path):
-        self.sprites[name] = {}
-        self.sources[name] = {}
-        source, sprites = SpriteXmlParser.parse(path)
-        for sprite in sprites:
-            spritename = sprite['name']
-            self.sprites[name][spritename] = sprite
-        source = join(dirname(path), source)
-        self._load_source(name, source)
-
-    def _load_source(self, name, path):
-        self.sources[name] = pg_load(path).convert()
-
-    def get(self, path, name) -> Surface:
+            yield name, join(sprites_dir, name.replace('.', sep), map_)
+
+    def load(self, lazy=False):
+        if lazy:
+            return
+        for name in self.paths:
+            self.atlas(name)
+
+    def loaded(self, name) -> bool:
+        return name in self.sources
+
+    @property
+    def pending(self) -> bool:
+        """ True while prefetched atlases are waiting to be finished. """
+        return bool(self._pending)
+
+    def atlas(self, name):
+        """ Make sure atlas ``name`` is loaded, waiting for it if it is being prefetched. """
+        if name in self.sources:
+            return
+        if name not in self.paths:
+            raise KeyError(f'Unknown atlas {name}')
+        future = self._pending.pop(name, None)
+        if future is not None and not future.cancel():
+            self._install(name, *future.result())
+        else:
+            self._install(name, *self._decode(name, self.paths[name]))
+
+    def prefetch(self, names=None):
+        """ Decode atlases (all the ones not loaded yet by default) on the game executor. """
+        for name in names or self.paths:
+            if name not in self.sources and name not in self._pending:
+                self._pending[name] = self.game.executor.submit(self._decode, name, self.paths[name])
+
+    def wait(self, names=None, timeout=None) -> bool:
+        """ Finish loading prefetched atlases. Returns False if some were still
+        being decoded after ``timeout`` seconds. """
+        names = [name for name in (names or list(self._pending)) if name in self._pending]
+        done, _ = wait_futures([self._pending[name] for name in names], timeout=timeout)
+        for name in names:
+            if self._pending[name] in done:
+                self.atlas(name)
+        return all(name in self.sources for name in names)
+
+    def poll(self):
+        """ Finish the prefetched atlases that are ready, without blocking. """
+        for name, future in list(self._pending.items()):
+            if future.done():
+                self.atlas(name)
+
+    def _decode(self, name, path):
+        start = time.perf_counter()
+        compiled = self.atlas_cache.load(name, path) if self.atlas_cache else None
+        if compiled:
+            sprites, image = compiled
+        else:
+            sprites, image = self._parse_atlas(name, path)
+        return sprites, image, time.perf_counter() - start, 'compiled' if compiled else 'source'
+
+    def _install(self, name, sprites, image, seconds, kind):
+        start = time.perf_counter()
+        self.sprites[name] = sprites
+        self._load_source(name, image)
+        self.load_times[name] = (seconds + time.perf_counter() - start, kind)
+        self.logger.debug(f'Loaded atlas {name} from {kind} in {self.load_times[name][0] * 1000:.2f}ms')
+
+    def _parse_atlas(self, name, path):
+        source, rows = SpriteXmlParser.parse(path)
+        sprites = {sprite['name']: sprite for sprite in rows}
+        image = pg_load(join(dirname(path), source))
+        if self.atlas_cache:
+            self.atlas_cache.store(name, path, source, sprites, image)
+        return sprites, image
+
+    def _load_source(self, name, image):
+        self.sources[name] = image.convert()
+
+    def get(self, path, name, size=None, flip=False) -> Surface:
+        """ Returns the frame ``name`` of atlas ``path`` scaled to ``size``.
+        Frames are shared between callers and must not be drawn on. """
+        size = tuple(size or self.SIZE)
+        key = (path, name, size, flip)
+        frame = self.cache.get(key)
+        if frame is None:
+            frame = self._render(path, name, size, flip)
+            self.cache.put(key, frame)
+        return frame
+
+    def get_mask(self, path, name, size=None, flip=False) -> 'FrameMask':
+        """ Collision mask and bounding rect of the frame returned by ``get``, computed once. """
+        size = tuple(size or self.SIZE)
+        key = (path, name, size, flip)
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = from_surface(self.get(path, name, size, flip))
+            mask = FrameMask(mask, mask_bounds(mask))
+            self.masks.put(key, mask)
+        return mask
+
+    def _render(self, path, name, size, flip) -> Surface:
+        self.atlas(path)
         data = self.sprites[path][name]
         x, y = int(data.get('x')), int(data.get('y')) 
         width, height = int(data.get('width')), int(data.get('height'))
         img = Surface((width, height))
         img.blit(self.sources[path], (0, 0), (x, y, width, height))
+        img = scale(img, size)
+        if flip:
+            img = pg_flip(img, True, False)
+        img = img.convert()
         img.set_colorkey(BLACK)
-        height = 40 # self.game.state.grid.bheight if self.game.state else 16
-        width = 40 # self.game.state.grid.bwidth if self.game.state else 16
-        return scale(img, (height, width))
+        return img
 
 
 class AnimationManager:
@@ -102,15 +292,18 @@ class Animation:
         self.last_update = 0
         self.raw_frames = frames
         self.frames = []
+        self.masks = []
 
     def load(self, spritemanager):
         for fdata in self.raw_frames:
-            frame = spritemanager.get(*fdata)
-            if self.flip:
-                frame = flip(frame, True, False)
-            self.frames.append(frame)
+            self.frames.append(spritemanager.get(*fdata, flip=self.flip))
+            self.masks.append(spritemanager.get_mask(*fdata, flip=self.flip))
         return self
 
+    @property
+    def mask(self) -> 'FrameMask':
+        return self.masks[self.current_frame]
+
     def reset(self):
         self.current_frame = 0
         self.last_update = 0
@@ -122,6 +315,11 @@ class Animation:
 
 
 class BaseComponent(Sprite):
+    # Drawn in world coordinates, through the game camera
+    SCROLLS = False
+    # Event types (or (type, button) pairs) passed to on_event, see plat.core.events
+    EVENTS = ()
+
     def __init__(self, game, children: List[Sprite] = None, grid=None):
         children = children or []
         Sprite.__init__(self)
@@ -130,6 +328,8 @@ class BaseComponent(Sprite):
         self.grid = grid
         self.image, self.rect = self.get_attrs()
         self.children = SpriteGroup()
+        self._drawn_image = None
+        self._drawn_rect = None
         self._x = self.rect.midbottom[0]
         self._y = self.rect.midbottom[1]
         for child in children:
@@ -196,6 +396,12 @@ class BaseComponent(Sprite):
     def new(self):
         pass
 
+    def kill(self):
+        """ Remove the component and its children from every group. """
+        for child in self.children:
+            child.kill()
+        super().kill()
+
     def event(self, event):
         self.on_event(event)
         for child in self.children:
@@ -212,12 +418,30 @@ class BaseComponent(Sprite):
     def on_update(self):
         pass
 
+    def draw_rect(self) -> Rect:
+        """ Rect where the component is drawn in the current frame. """
+        return self.rect
+
     def draw(self, screen):
-        screen.blit(self.image, self.rect)
+        rect = self.draw_rect()
+        if self.SCROLLS:
+            rect = self.game.camera.apply(rect)
+        screen.blit(self.image, rect)
+        self._report_drawn(rect)
         if len(self.children):
             for child in self.children:
                 child.draw(screen)
 
+    def _report_drawn(self, rect):
+        """ Report the screen region touched by this component to the game
+        when its image or position changed since the last draw. """
+        if self.image is self._drawn_image and rect == self._drawn_rect:
+            return
+        rect = Rect(rect)
+        self.game.mark_dirty(rect.union(self._drawn_rect) if self._drawn_rect else rect)
+        self._drawn_image = self.image
+        self._drawn_rect = rect
+
     def __repr__(self):
         return f"<{self.__class__.__name__}  pos={self.pos} acc={self.acceleration} vel={self.velocity}>"
 
@@ -246,9 +470,12 @@ class SpriteGroup:
 
     def draw(self, screen):
         for sprite in self.sprites:
-            if hasattr(sprite, 'on_draw'):
-                sprite.on_draw(screen)
-            sprite.draw(screen)
+            self.draw_sprite(sprite, screen)
+
+    def draw_sprite(self, sprite, screen):
+        if hasattr(sprite, 'on_draw'):
+            sprite.on_draw(screen)
+        sprite.draw(screen)
 
     def empty(self):
         return self.sprites.empty()
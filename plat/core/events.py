@@ -0,0 +1,87 @@
+import logging
+
+import pygame
+
+from collections import defaultdict
+
+
+class EventBus:
+    """
+    Dispatches events only to the handlers subscribed to them.
+
+    Handlers subscribe to an event type, optionally narrowed to a joystick
+    button, so publishing an event costs one lookup per key plus the calls to
+    the interested handlers, whatever the number of components in the scene.
+    """
+    logger = logging.getLogger('EventBus')
+
+    # Never blocked by block_unused: quitting, window state and device hotplug
+    # are handled by SDL and pygame themselves even if no component asks for them
+    ALWAYS_ALLOWED = {
+        getattr(pygame, name) for name in (
+            'QUIT', 'ACTIVEEVENT', 'VIDEORESIZE', 'VIDEOEXPOSE', 'WINDOWEVENT',
+            'WINDOWSHOWN', 'WINDOWHIDDEN', 'WINDOWEXPOSED', 'WINDOWMOVED', 'WINDOWRESIZED',
+            'WINDOWSIZECHANGED', 'WINDOWMINIMIZED', 'WINDOWMAXIMIZED', 'WINDOWRESTORED',
+            'WINDOWENTER', 'WINDOWLEAVE', 'WINDOWFOCUSGAINED', 'WINDOWFOCUSLOST', 'WINDOWCLOSE',
+            'WINDOWTAKEFOCUS', 'WINDOWDISPLAYCHANGED',
+            'JOYDEVICEADDED', 'JOYDEVICEREMOVED',
+            'CONTROLLERDEVICEADDED', 'CONTROLLERDEVICEREMOVED', 'CONTROLLERDEVICEREMAPPED',
+            'AUDIODEVICEADDED', 'AUDIODEVICEREMOVED',
+        ) if hasattr(pygame, name)
+    }
+
+    def __init__(self):
+        self._handlers = defaultdict(list)
+
+    def subscribe(self, handler, type_, button=None):
+        handlers = self._handlers[(type_, button)]
+        if handler not in handlers:
+            handlers.append(handler)
+
+    def unsubscribe(self, handler):
+        for key, handlers in list(self._handlers.items()):
+            if handler in handlers:
+                handlers.remove(handler)
+            if not handlers:
+                del self._handlers[key]
+
+    def subscribe_component(self, component):
+        """ Subscribe the ``on_event`` of ``component`` and its children to the events they declare. """
+        for type_, button in subscriptions(component):
+            self.subscribe(component.on_event, type_, button)
+        for child in component.children:
+            self.subscribe_component(child)
+
+    def clear(self):
+        self._handlers.clear()
+
+    def types(self) -> set:
+        return {type_ for type_, _ in self._handlers}
+
+    def publish(self, event):
+        handlers = self._handlers.get((event.type, None), [])
+        button = getattr(event, 'button', None)
+        if button is not None:
+            handlers = handlers + self._handlers.get((event.type, button), [])
+        for handler in handlers:
+            handler(event)
+
+
+def subscriptions(component) -> set:
+    """
+    ``(type, button)`` pairs a component handles, from the ``EVENTS`` declared
+    along its class hierarchy. Entries are an event type or a ``(type, button)``
+    pair, a plain type covers every button of that type.
+    """
+    keys = set()
+    for cls in type(component).__mro__:
+        for entry in vars(cls).get('EVENTS', ()):
+            keys.add(tuple(entry) if isinstance(entry, (tuple, list)) else (entry, None))
+    return {(type_, button) for type_, button in keys if button is None or (type_, None) not in keys}
+
+
+def block_unused(types):
+    """ Only let SDL queue events of ``types`` (and ``EventBus.ALWAYS_ALLOWED``),
+    every other event is dropped at the source. """
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(list(set(types) | EventBus.ALWAYS_ALLOWED))
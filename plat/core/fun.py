@@ -1,14 +1,101 @@
 import math
 import pygame
 
+from typing import List
+from collections import namedtuple
 from pygame.math import Vector2
 
-from plat.core.grid import Block, SolidBlock, LiquidBlock
+from plat.core.grid import Block, CollidableBlock, SolidBlock, LiquidBlock, Tile
 from plat.core.mixins import CollisionableMixin, MoverMixin
+from plat.core.trace import TRACE
 from plat.core.utils import *
 
 
+def _outward(value) -> int:
+    """ Round away from 0. """
+    return math.ceil(value) if value > 0 else math.floor(value)
+
+
+def _stops(kind) -> bool:
+    """ True if tiles of ``kind`` stop movers on any side. """
+    return kind.COLLIDE_LEFT or kind.COLLIDE_RIGHT or kind.COLLIDE_TOP or kind.COLLIDE_BOTTOM
+
+
+# Tile hit while sweeping, ``time`` of impact in [0, 1) of the step and ``normal`` of the hit face
+Contact = namedtuple("Contact", "tile time normal")
+
+
 class MoverCollissionsWithBlocksMixin(MoverMixin, CollisionableMixin):
+    """
+    Mover stopped by collidable blocks.
+
+    Each step moves along x and then along y against the tiles of the grid
+    covered by the motion (swept AABB), stopping at the nearest face whose
+    COLLIDE_* flag is set, so fast movers can't tunnel through blocks.
+    The tiles hit and the ones moved through (liquid) are passed to
+    ``_check_collision``.
+    """
+    def new(self):
+        super().new()
+        self.contacts: List[Contact] = []
+        self._grid_version = None
+
+    def _constrain(self, start, end):
+        return self._sweep(start, end)
+
+    def _sweep(self, start, end) -> Vector2:
+        """ Move from ``start`` to ``end`` (midbottom positions), returns where
+        the mover stops. Hit faces are stored in ``self.contacts``. """
+        dx, dy = end.x - start.x, end.y - start.y
+        self.contacts = []
+        if not dx and not dy:
+            return Vector2(end)
+        area = self.rect.union(self.rect.move(_outward(dx), _outward(dy)))
+        grid = self.game.state.obj.grid
+        tiles = [t for t in grid.tiles_in_rect(area.inflate(2, 2)) if issubclass(t.kind, CollidableBlock)]
+        if not tiles:
+            return Vector2(end)
+
+        left, top, width, height = self.rect
+        if dx:
+            dx = self._sweep_axis(tiles, dx, left, left + width, top, top + height, 0)
+        if dy:
+            dy = self._sweep_axis(tiles, dy, top, top + height, left + dx, left + dx + width, 1)
+
+        touched = [contact.tile for contact in self.contacts]
+        touched += [t for t in tiles if not _stops(t.kind) and area.colliderect(t.rect)]
+        for tile in touched:
+            if TRACE.enabled:
+                TRACE.record(self, TRACE.COLLISION, tile.c, tile.r)
+            if not tile.kind.STATIC:
+                grid.touch(tile, self)
+            self._check_collision(tile)
+        return Vector2(start.x + dx, start.y + dy)
+
+    def _sweep_axis(self, tiles, delta, low, high, cross_low, cross_high, axis) -> float:
+        """ Distance the mover spanning ``low..high`` on ``axis`` (and ``cross_low..cross_high``
+        on the other one) can move by ``delta`` before hitting a tile. """
+        nearest, hit = abs(delta), None
+        for tile in tiles:
+            r, kind = tile.rect, tile.kind
+            if axis == 0:
+                b_low, b_high, c_low, c_high = r.left, r.right, r.top, r.bottom
+                solid = kind.COLLIDE_LEFT if delta > 0 else kind.COLLIDE_RIGHT
+            else:
+                b_low, b_high, c_low, c_high = r.top, r.bottom, r.left, r.right
+                solid = kind.COLLIDE_TOP if delta > 0 else kind.COLLIDE_BOTTOM
+            if not solid or c_low >= cross_high or c_high <= cross_low:
+                continue
+            gap = b_low - high if delta > 0 else low - b_high
+            if 0 <= gap < nearest:
+                nearest, hit = gap, tile
+        if hit is None:
+            return delta
+        normal = -1 if delta > 0 else 1
+        self.contacts.append(Contact(hit, nearest / abs(delta), Vector2(normal, 0) if axis == 0 else Vector2(0, normal)))
+        self.velocity[axis] = 0
+        return math.copysign(nearest, delta)
+
     def _parse_direction(self, dir_):
         return Vector2((
             math.trunc(dir_.x * 1),
@@ -16,32 +103,39 @@ class MoverCollissionsWithBlocksMixin(MoverMixin, CollisionableMixin):
         ))
         
     def on_update(self):
-        self._check_collisions()
+        grid = self.game.state.obj.grid
+        if grid.version != self._grid_version:
+            self._grid_version = grid.version
+            self._push_out()
         super().on_update()
 
-
-    def _check_collision(self, hit):
-        super()._check_collision(hit)
-        if isinstance(hit, SolidBlock):
-            new_self_center = Vector2(self.center) - Vector2(hit.center)
+    def _push_out(self):
+        """ Sweeping keeps movers out of blocks, this only moves them out of
+        blocks placed over them (like entering game mode over a solid tile).
+        Called once per change of the grid. """
+        for hit in self.game.state.obj.grid.collide(self):
+            if not issubclass(hit.kind, SolidBlock):
+                continue
+            new_self_center = Vector2(self.center) - Vector2(hit.rect.center)
             angle_to_hit = new_self_center.angle_to(Vector2((0, 0)))
 
-            if self._left_of(angle_to_hit) and hit.COLLIDE_LEFT: 
+            if self._left_of(angle_to_hit) and hit.kind.COLLIDE_LEFT: 
                 # print(f'Left Collision angle_to_hit: {angle_to_hit} ({self.center} to {hit.center})')
                 self.rect.right = hit.rect.left
                 self.velocity.x = 0
-            elif self._below_of(angle_to_hit) and hit.COLLIDE_BOTTOM:
+            elif self._below_of(angle_to_hit) and hit.kind.COLLIDE_BOTTOM:
                 # print(f'Top Collision angle_to_hit: {angle_to_hit} ({self.center} to {hit.center})')
                 self.rect.top = hit.rect.bottom
                 self.velocity.y = 0
-            elif self._right_of(angle_to_hit) and hit.COLLIDE_RIGHT:
+            elif self._right_of(angle_to_hit) and hit.kind.COLLIDE_RIGHT:
                 # print(f'Right Collision angle_to_hit: {angle_to_hit} ({self.center} to {hit.center})')
                 self.rect.left = hit.rect.right
                 self.velocity.x = 0
-            elif self._above_of(angle_to_hit) and hit.COLLIDE_TOP:
+            elif self._above_of(angle_to_hit) and hit.kind.COLLIDE_TOP:
                 # print(f'Bottom Collision angle_to_hit: {angle_to_hit} ({self.center} to {hit.center})')
                 self.rect.bottom = hit.rect.top
                 self.velocity.y = 0
+        self._set_xy()
 
     def _going_up(self):
         return self.velocity.y < 0
@@ -64,6 +158,8 @@ class JumpMixin(MoverCollissionsWithBlocksMixin):
     JUMP_FORCE = 3
     STORED_JUMP_FORCE = 0
 
+    EVENTS = ((pygame.JOYBUTTONDOWN, JOYBTN['A']), (pygame.JOYBUTTONUP, JOYBTN['A']))
+
     def on_event(self, event):
         if event.type == pygame.JOYBUTTONDOWN:
             if event.button == JOYBTN['A']:
@@ -74,12 +170,14 @@ class JumpMixin(MoverCollissionsWithBlocksMixin):
 
     def calculate_acceleration(self):
         acc = super().calculate_acceleration()
-        print('acc before jump:', acc)
-        print('stored force:', self.STORED_JUMP_FORCE)
+        if TRACE.enabled:
+            TRACE.record(self, TRACE.ACC_BEFORE_JUMP, acc.x, acc.y)
+            TRACE.record(self, TRACE.STORED_JUMP_FORCE, self.STORED_JUMP_FORCE)
         if self.STORED_JUMP_FORCE:
             acc +=  Vector2(0, -self.STORED_JUMP_FORCE)
             self.STORED_JUMP_FORCE = 0
-        print('acc after jump:', acc)
+        if TRACE.enabled:
+            TRACE.record(self, TRACE.ACC_AFTER_JUMP, acc.x, acc.y)
         return acc
 
     def start_jump(self):
@@ -104,7 +202,7 @@ class CollidableJumpFromSolidMixin(JumpMixin):
         self.rect.y += 1
         hits = self.get_collissions()
         self.rect.y -= 1
-        collisions = filter(lambda h: isinstance(h, SolidBlock), hits)
+        collisions = filter(lambda h: issubclass(h.kind, SolidBlock), hits)
         for col in collisions:
             if col.rect.top == self.rect.bottom:
                 return True
@@ -112,46 +210,13 @@ class CollidableJumpFromSolidMixin(JumpMixin):
 
 
 class SwimmerMixin(JumpMixin):
-    CURRENT_LIQUID_SLOWDOWN = 0
-
+    """ Slowed down by the liquid blocks it moves through. Liquid is found by
+    the sweep of a step, so it slows down the x velocity of the next step, on
+    both the scalar and the batched path (see ``MoverMixin.slow_down``). """
     def _check_collision(self, hit):
         super()._check_collision(hit)
-        if isinstance(hit, LiquidBlock):
+        if issubclass(hit.kind, LiquidBlock):
             self._apply_liquid_slowdown(hit)
 
     def _apply_liquid_slowdown(self, hit):
-        self.CURRENT_LIQUID_SLOWDOWN = hit.SLOWDOWN_DELTA
-
-    def _calculate_velocity(self):
-        vel = super()._calculate_velocity()
-        if self.CURRENT_LIQUID_SLOWDOWN:
-            vel.x /= 1 + self.CURRENT_LIQUID_SLOWDOWN 
-            vel.x = 0 if abs(vel.x) < 0.1 else vel.x
-
-
-            self.CURRENT_LIQUID_SLOWDOWN = 0
-            # vel.y = 0 if abs(vel.y) < 0.1 else vel.y
-        return vel
-
-    # def _calculate_acceleration(self):
-    #     bef_fri = self.FRICTION
-    #     bef_fri_axs = self.FRICTION_AXIS
-
-    #     self.FRICTION *= 1 + self.CURRENT_LIQUID_SLOWDOWN
-    #     self.FRICTION_AXIS = self.AXIS_BOTH
-
-    #     acc = super()._calculate_acceleration()
-
-    #     self.FRICTION = bef_fri
-    #     self.FRICTION_AXIS = bef_fri_axs
-    #     self.CURRENT_LIQUID_SLOWDOWN = 0
-
-    #     print('Acc from Swimmer: ', acc)
-    #     return acc
-
-
-    # def _calculate_acceleration(self):
-    #   vel = super()._calculate_velocity()
-    #   vel *= 1 - self.CURRENT_LIQUID_SLOWDOWN
-    #   self.CURRENT_LIQUID_SLOWDOWN = 0
-    #   return vel
\ No newline at end of file
+        self.slow_down(1 + hit.kind.SLOWDOWN_DELTA)
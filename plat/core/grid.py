@@ -1,17 +1,32 @@
 import logging
 import pygame
 
-from typing import List
+from array import array
+from typing import List, Dict, Tuple
 from random import choice
+from collections import namedtuple
 from dataclasses import dataclass, field
 
 from plat.core.components import BaseComponent
 from plat.core.mixins import CollisionableMixin
+from plat.core.level import LevelFile
+from plat.core.analysis import LevelSnapshot
 from plat.core.utils import *
+from plat.config import CHUNK_SIZE, CHUNK_MARGIN, BLOCK_POOL_SIZE
+
+
+# Non empty cell found by the grid collision queries: its block class, row,
+# column and rect. No Block object is created for it.
+Tile = namedtuple("Tile", "kind r c rect")
 
 
 class Block(BaseComponent):
     COLOR = WHITE
+    # Static blocks only live in the tile array and the baked chunk surfaces,
+    # others are kept by the grid and updated while awake, see Grid.wake
+    STATIC = True
+    # BlockPool which handed the block out, the only one it goes back to
+    pool = None
     c: int
     r: int
     grid: 'Grid' = field(repr=False, compare=False)
@@ -26,13 +41,25 @@ class Block(BaseComponent):
         self.height = height
         self.width = width
         self._color = color or self.COLOR
-        super().__init__(*args, **kwargs)
+        super().__init__(*args, grid=grid, **kwargs)
 
     @classmethod
     def from_(cls, block: 'Block') -> 'Block':
+        """ New block on the cell of ``block``, owned by the caller. """
         new = cls(block.game, c=block.c, r=block.r, grid=block.grid, height=block.height, width=block.width)
         return new
 
+    def reuse(self, c, r):
+        """ Reset a pooled block to a fresh one at another cell. """
+        self.c = c
+        self.r = r
+        self._color = self.COLOR
+        self.image.fill(self._color)
+        self.rect.topleft = (self.x, self.y)
+        self._set_xy()
+        self._drawn_image = None
+        self._drawn_rect = None
+
     @property
     def color(self):
         return self._color
@@ -41,6 +68,8 @@ class Block(BaseComponent):
     def color(self, value):
         self._color = value
         self.image.fill(value)
+        if self.grid:
+            self.grid.recolor(self)
 
     def get_attrs(self):
         img = pygame.Surface((self.height, self.width))
@@ -68,9 +97,9 @@ class CollidableBlock(Block, CollisionableMixin):
         super().__init__(*args, **kwargs)
 
     def on_update(self):
+        # Recolouring fills the same image, rebuild the mask whenever the block is woken
+        self.mask_image = None
         super().on_update()
-        if self.image:
-            self.mask = pygame.mask.from_surface(self.image)
 
 
 class SolidBlock(CollidableBlock):
@@ -97,19 +126,161 @@ class LiquidBlock(CollidableBlock):
         pass
 
 
+class CrumbleBlock(SolidBlock):
+    """ Solid tile breaking CRUMBLE_STEPS steps after a mover first touches it.
+    Kept by the grid, it sleeps until touched and stays awake while crumbling. """
+    COLOR = BROWN
+    STATIC = False
+    CRUMBLE_STEPS = 30
+
+    def new(self):
+        super().new()
+        self.crumbling = None
+
+    def reuse(self, c, r):
+        super().reuse(c, r)
+        self.crumbling = None
+
+    def on_collision_start(self, other: 'CollisionableMixin'):
+        if self.crumbling is None:
+            self.crumbling = self.CRUMBLE_STEPS
+            self.grid.wake(self)
+
+    def on_update(self):
+        super().on_update()
+        if self.crumbling is None:
+            return
+        self.crumbling -= 1
+        if self.crumbling > 0:
+            self.grid.wake(self)
+        else:
+            self.grid.place(self.x, self.y, Block)
+
+
+
+class BlockPool:
+    """
+    Recycles the blocks released by a grid, per block type.
+
+    Up to ``size`` released blocks of each type are kept, with their surfaces,
+    and handed out again by ``acquire`` instead of allocating new ones. Only
+    blocks handed out by the pool go back to it, the grid releases the ones
+    it owns: kept blocks and lookups (see ``Grid.get_square_xy``).
+    """
+    def __init__(self, grid: 'Grid', size: int = BLOCK_POOL_SIZE):
+        self.grid = grid
+        self.size = size
+        self.free: Dict[type, List[Block]] = {}
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, block_cls, c, r) -> Block:
+        free = self.free.get(block_cls)
+        if free:
+            block = free.pop()
+            block.reuse(c, r)
+            self.reused += 1
+        else:
+            self.created += 1
+            grid = self.grid
+            block = block_cls(grid.game, c=c, r=r, grid=grid, height=grid.bheight, width=grid.bwidth)
+        block.pool = self
+        return block
+
+    def release(self, block: Block):
+        """ Take back a block handed out by ``acquire``, others are only killed. """
+        block.kill()
+        if block.pool is not self:
+            return
+        block.pool = None
+        if block.height != self.grid.bheight or block.width != self.grid.bwidth:
+            return
+        free = self.free.setdefault(type(block), [])
+        if len(free) < self.size:
+            free.append(block)
+
+    def clear(self):
+        self.free = {}
+
+    @property
+    def pooled(self) -> int:
+        return sum(len(free) for free in self.free.values())
+
+    def stats(self) -> dict:
+        return {'live': len(self.grid.blocks), 'pooled': self.pooled, 'created': self.created, 'reused': self.reused}
+
+    def __repr__(self):
+        return '<BlockPool ' + ' '.join(f'{k}={v}' for k, v in self.stats().items()) + '>'
+
+
+class Chunk:
+    """ Square group of CHUNK_SIZE x CHUNK_SIZE tiles, the unit of loading,
+    updating and drawing. ``surface`` holds the baked tiles while loaded,
+    ``awake`` the blocks to update on the next step, ``lookups`` the blocks
+    handed out by ``Grid.get_square_xy`` and ``data`` its tile ids for
+    snapshots, until one of them changes. """
+    def __init__(self, row, col, rect):
+        self.row = row
+        self.col = col
+        self.rect = rect
+        self.surface = None
+        self.blocks: Dict[int, Block] = {}
+        self.awake: Dict[int, Block] = {}
+        self.lookups: Dict[int, Block] = {}
+        self.data: bytes = None
+
+    @property
+    def loaded(self):
+        return self.surface is not None
+
+    def __repr__(self):
+        return f"<Chunk row={self.row} col={self.col} loaded={self.loaded} blocks={len(self.blocks)}>"
+
 
 class Grid(BaseComponent):
+    """
+    Level tiles, stored as a compact array of tile ids (one byte per cell).
+
+    Tiles are drawn from baked chunk surfaces and collisions are checked
+    against ``Tile`` entries built from the array. ``Block`` objects are only
+    created when a caller asks for a square (the editor), and only kept for
+    tiles with per-instance behaviour (not ``STATIC``).
+
+    The level is split in chunks. Only chunks in or near the camera viewport
+    are loaded (baked into a surface), updated and drawn. Kept blocks are
+    updated once each time they are woken, see ``wake``. Removed kept blocks and released
+    lookups go back to ``pool`` to be reused.
+    """
     ROWCOLS = 1
     XY = 2
 
+    EMPTY = 0
+    TILES = [Block, SolidBlock, LiquidBlock, CrumbleBlock]
+
+    CHUNK_SIZE = CHUNK_SIZE
+    CHUNK_MARGIN = CHUNK_MARGIN
+
     def __init__(self, game, rows: int = 20, cols: int = 20, bheight: int = 40, bwidth: int = 40, **kwargs):
         self.logger = logging.getLogger('Grid')
         self.rows = rows
         self.cols = cols
         self.bheight = bheight
         self.bwidth = bwidth
+        self.tiles = array('B')
+        # Colour of static cells recoloured through their block, until the tile changes
+        self.colors: Dict[int, tuple] = {}
+        self.blocks: Dict[int, Block] = {}
+        self.chunks: Dict[Tuple[int, int], Chunk] = {}
+        self.active: List[Chunk] = []
+        self.level: LevelFile = None
+        self.path = None
+        self._view = None
+        self._tile_images = {}
+        self.pool = BlockPool(self)
+        # Bumped on every tile change
+        self.version = 0
         super().__init__(game, **kwargs)
-        self.grid: List[Block] = self._generate_grid()
+        self._generate_grid()
 
     def __repr__(self):
         return f'Grid(rows={self.rows}, cols={self.cols})'
@@ -126,25 +297,346 @@ class Grid(BaseComponent):
         return self.cols * self.bwidth
 
     def get_attrs(self):
-        img = pygame.Surface((self.rows * self.bheight, self.cols * self.bwidth))
-        img.fill(WHITE)
-        return img, img.get_rect()
+        """ Tiles are drawn from the chunk surfaces, the grid has no image of its own. """
+        return None, pygame.Rect(0, 0, self.width, self.height)
 
-    def _generate_grid(self) -> List[Block]:
+    def _generate_grid(self):
         self.logger.debug(f'Generating grid {self}')
-        self.grid = [
-            [Block(self.game, c=c, r=r, grid=self, height=self.bheight, width=self.bwidth, color=WHITE) for c in range(self.cols)] 
-            for r in range(self.rows)
-        ]
+        self._close_level()
+        self._release_blocks()
+        self.tiles = array('B', bytes(self.rows * self.cols))
+        self.colors = {}
+        self._reset_chunks()
+
+    def save(self, path):
+        """ Write the tiles to a level file. """
+        self._decode_all()
+        LevelFile.write(path, self.tiles, self.rows, self.cols, self.bheight, self.bwidth, self.CHUNK_SIZE)
+        self.path = path
+
+    def load(self, path, lazy=True):
+        """ Replace the tiles with the ones of a level file. No block is created.
+        When ``lazy``, chunks are decoded from the memory-mapped file the first
+        time they are needed. """
+        level = LevelFile(path)
+        self.logger.debug(f'Loading level {path} ({level.rows}x{level.cols})')
+        self._close_level()
+        self._release_blocks()
+        self.rows, self.cols = level.rows, level.cols
+        if (self.bheight, self.bwidth) != (level.bheight, level.bwidth):
+            self.pool.clear()
+        self.bheight, self.bwidth = level.bheight, level.bwidth
+        self.rect = pygame.Rect(0, 0, self.width, self.height)
+        self._tile_images = {}
+        self.tiles = array('B', bytes(self.rows * self.cols))
+        self.colors = {}
+        self.level = level
+        self.path = path
+        if not lazy or level.chunk_size != self.CHUNK_SIZE:
+            self._decode_all()
+        self._reset_chunks()
+
+    def _decode_all(self):
+        if self.level is None:
+            return
+        if self.level.chunk_size == self.CHUNK_SIZE:
+            for crow in range(self.level.chunk_rows):
+                for ccol in range(self.level.chunk_cols):
+                    self._chunk(crow, ccol)
+        else:
+            for crow in range(self.level.chunk_rows):
+                for ccol in range(self.level.chunk_cols):
+                    self.level.read_into(self.tiles, crow, ccol)
+            self._keep_blocks(range(self.rows), range(self.cols))
+        self._close_level()
+
+    def _keep_blocks(self, rows: range, cols: range):
+        """ Keep blocks for the tiles with per-instance behaviour (not ``STATIC``)
+        in ``rows`` x ``cols``, read from a level file. """
+        kept = [tile for tile, kind in enumerate(self.TILES) if not kind.STATIC]
+        for r in rows:
+            start = r * self.cols
+            line = self.tiles[start + cols.start:start + cols.stop]
+            if not any(line.count(tile) for tile in kept):
+                continue
+            for c in cols:
+                tile = self.tiles[start + c]
+                if tile in kept:
+                    self._add_block(start + c, self.pool.acquire(self.TILES[tile], c, r))
+
+    def _close_level(self):
+        if self.level is not None:
+            self.level.close()
+            self.level = None
+
+    def _release_blocks(self):
+        for block in self.blocks.values():
+            self.pool.release(block)
+        self.blocks = {}
         self.children.empty()
-        for r in self.grid:
-            for c in r:
-                self.children.add(c)
-        return self.grid
+
+    def _reset_chunks(self):
+        self.version += 1
+        for chunk in self.chunks.values():
+            self._release_lookups(chunk)
+        self.chunks = {}
+        self.active = []
+        self._view = None
+        for ix, block in self.blocks.items():
+            chunk = self._chunk_of(block.r, block.c)
+            chunk.blocks[ix] = chunk.awake[ix] = block
+        self.game.refresh()
 
     def reset(self):
         self._generate_grid()
 
+    def resize(self, rows: int, cols: int):
+        """ Change the grid dimensions keeping the tiles that still fit. """
+        self._decode_all()
+        old_tiles, old_cols = self.tiles, self.cols
+        kept = min(self.rows, rows), min(self.cols, cols)
+        blocks = {(b.r, b.c): b for b in self.blocks.values() if b.r < rows and b.c < cols}
+        for block in self.blocks.values():
+            if (block.r, block.c) not in blocks:
+                self.pool.release(block)
+        self.rows, self.cols = rows, cols
+        self.rect = pygame.Rect(0, 0, self.width, self.height)
+        self.tiles = array('B', bytes(rows * cols))
+        for r in range(kept[0]):
+            self.tiles[r * cols:r * cols + kept[1]] = old_tiles[r * old_cols:r * old_cols + kept[1]]
+        self.blocks = {self._index(r, c): block for (r, c), block in blocks.items()}
+        colors, self.colors = self.colors, {}
+        for ix, color in colors.items():
+            r, c = divmod(ix, old_cols)
+            if r < rows and c < cols:
+                self.colors[self._index(r, c)] = color
+        self._reset_chunks()
+
+    def snapshot(self, start=(0, 0)) -> LevelSnapshot:
+        """ Tiles for analysis off the frame loop, ``start`` is the (x, y)
+        position the player starts from. Only the chunks changed since the
+        last snapshot are copied, the ones not decoded yet are left in the
+        level file. """
+        chunks = {}
+        for crow in range(-(-self.rows // self.CHUNK_SIZE)):
+            for ccol in range(-(-self.cols // self.CHUNK_SIZE)):
+                chunk = self.chunks.get((crow, ccol))
+                if chunk is None:
+                    if self.level is not None:
+                        continue
+                    chunk = self._chunk(crow, ccol)
+                if chunk.data is None:
+                    chunk.data = self._chunk_data(chunk)
+                chunks[(crow, ccol)] = chunk.data
+        col, row = self._xy_to_rowcols(*start)
+        level = self.level.path if self.level is not None else None
+        return LevelSnapshot(self.version, chunks, self.CHUNK_SIZE, level, self.rows, self.cols, self.bheight, (row, col))
+
+    def _chunk_data(self, chunk: Chunk) -> bytes:
+        """ Tile ids of a chunk, row-major like ``LevelFile.read_chunk``. """
+        cols, size = self.cols, self.CHUNK_SIZE
+        first_row, first_col = chunk.row * size, chunk.col * size
+        width = min(size, cols - first_col)
+        return b''.join(
+            self.tiles[r * cols + first_col:r * cols + first_col + width].tobytes()
+            for r in range(first_row, min(first_row + size, self.rows))
+        )
+
+    @classmethod
+    def tile_id(cls, block_cls) -> int:
+        for klass in block_cls.__mro__:
+            if klass in cls.TILES:
+                return cls.TILES.index(klass)
+        raise ValueError(f'Unkown tile {block_cls}')
+
+    def _index(self, row, col) -> int:
+        return row * self.cols + col
+
+    def _in_bounds(self, row, col) -> bool:
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def _chunk_of(self, row, col) -> Chunk:
+        return self._chunk(row // self.CHUNK_SIZE, col // self.CHUNK_SIZE)
+
+    def _chunk(self, crow, ccol) -> Chunk:
+        chunk = self.chunks.get((crow, ccol))
+        if chunk is None:
+            rect = pygame.Rect(
+                ccol * self.CHUNK_SIZE * self.bwidth, crow * self.CHUNK_SIZE * self.bheight,
+                self.CHUNK_SIZE * self.bwidth, self.CHUNK_SIZE * self.bheight,
+            ).clip(self.rect)
+            chunk = Chunk(crow, ccol, rect)
+            self.chunks[(crow, ccol)] = chunk
+            if self.level is not None:
+                self.level.read_into(self.tiles, crow, ccol)
+                row, col, rows, cols = self.level.chunk_area(crow, ccol)
+                self._keep_blocks(range(row, row + rows), range(col, col + cols))
+                if len(self.chunks) == self.level.chunk_rows * self.level.chunk_cols:
+                    self._close_level()
+        return chunk
+
+    def _block_at(self, row, col) -> Block:
+        """ Returns the block of a cell, the kept one or a lookup block for its
+        tile id, see ``get_square_xy``. """
+        ix = self._index(row, col)
+        block = self.blocks.get(ix)
+        if block is None:
+            chunk = self._chunk_of(row, col)
+            block = chunk.lookups.get(ix)
+            if block is None:
+                block = chunk.lookups[ix] = self.pool.acquire(self.TILES[self.tiles[ix]], col, row)
+                if ix in self.colors:
+                    block._color = self.colors[ix]
+                    block.image.fill(block._color)
+        return block
+
+    def _release_lookup(self, chunk, ix, keep=None):
+        """ Give the lookup block of a cell back to the pool, unless it is ``keep``. """
+        block = chunk.lookups.pop(ix, None)
+        if block is not None and block is not keep:
+            self.pool.release(block)
+
+    def _release_lookups(self, chunk):
+        for block in chunk.lookups.values():
+            self.pool.release(block)
+        chunk.lookups = {}
+
+    def _add_block(self, ix, block):
+        self.blocks[ix] = block
+        chunk = self._chunk_of(block.r, block.c)
+        chunk.blocks[ix] = chunk.awake[ix] = block
+        self.children.add(block)
+
+    def _remove_block(self, ix):
+        block = self.blocks.pop(ix, None)
+        if block is not None:
+            chunk = self._chunk_of(block.r, block.c)
+            chunk.blocks.pop(ix, None)
+            chunk.awake.pop(ix, None)
+            self.pool.release(block)
+
+    def touch(self, tile: Tile, other):
+        """ Let the kept block of ``tile`` react to ``other`` colliding with it. """
+        block = self.blocks.get(self._index(tile.r, tile.c))
+        if block is not None:
+            block.on_collision_start(other)
+
+    def recolor(self, block: Block):
+        """ Show the new colour of ``block`` if it is on the grid (kept or a
+        lookup). Static cells keep it in ``colors`` until their tile changes. """
+        ix = self._index(block.r, block.c)
+        chunk = self._chunk_of(block.r, block.c)
+        if self.blocks.get(ix) is not block and chunk.lookups.get(ix) is not block:
+            return
+        if block.STATIC:
+            if block.color == block.COLOR:
+                self.colors.pop(ix, None)
+            else:
+                self.colors[ix] = block.color
+        self.bake_square(block)
+        self.wake(block)
+
+    def wake(self, block: Block):
+        """ Update ``block`` on the next step, it sleeps again afterwards unless
+        woken again (blocks that need every step wake themselves). """
+        ix = self._index(block.r, block.c)
+        if self.blocks.get(ix) is block:
+            self._chunk_of(block.r, block.c).awake[ix] = block
+
+    def _tile_image(self, tile) -> pygame.Surface:
+        image = self._tile_images.get(tile)
+        if image is None:
+            image = pygame.Surface((self.bwidth, self.bheight)).convert()
+            image.fill(self.TILES[tile].COLOR)
+            self._tile_images[tile] = image
+        return image
+
+    def _color_image(self, color) -> pygame.Surface:
+        key = tuple(color)
+        image = self._tile_images.get(key)
+        if image is None:
+            image = pygame.Surface((self.bwidth, self.bheight)).convert()
+            image.fill(color)
+            self._tile_images[key] = image
+        return image
+
+    def _load_chunk(self, chunk: Chunk):
+        """ Bake every tile of the chunk into its surface. """
+        chunk.surface = pygame.Surface(chunk.rect.size).convert()
+        chunk.surface.fill(self.TILES[self.EMPTY].COLOR)
+        first_row, first_col = chunk.row * self.CHUNK_SIZE, chunk.col * self.CHUNK_SIZE
+        for r in range(first_row, min(first_row + self.CHUNK_SIZE, self.rows)):
+            for c in range(first_col, min(first_col + self.CHUNK_SIZE, self.cols)):
+                ix = self._index(r, c)
+                if ix in chunk.blocks:
+                    image = chunk.blocks[ix].image
+                elif ix in self.colors:
+                    image = self._color_image(self.colors[ix])
+                elif self.tiles[ix] != self.EMPTY:
+                    image = self._tile_image(self.tiles[ix])
+                else:
+                    continue
+                chunk.surface.blit(image, (c * self.bwidth - chunk.rect.x, r * self.bheight - chunk.rect.y))
+
+    def _unload_chunk(self, chunk: Chunk):
+        chunk.surface = None
+        self._release_lookups(chunk)
+
+    def _stream(self):
+        """ Load the chunks in or near the viewport and unload the rest. """
+        view = self.game.camera.rect
+        if view == self._view:
+            return
+        self._view = pygame.Rect(view)
+        area = view.inflate(
+            2 * self.CHUNK_MARGIN * self.CHUNK_SIZE * self.bwidth,
+            2 * self.CHUNK_MARGIN * self.CHUNK_SIZE * self.bheight,
+        ).clip(self.rect)
+        left, top = self._xy_to_rowcols(area.left, area.top)
+        right, bottom = self._xy_to_rowcols(area.right - 1, area.bottom - 1)
+        active = [
+            self._chunk(crow, ccol)
+            for crow in range(top // self.CHUNK_SIZE, bottom // self.CHUNK_SIZE + 1)
+            for ccol in range(left // self.CHUNK_SIZE, right // self.CHUNK_SIZE + 1)
+        ]
+        for chunk in self.active:
+            if chunk not in active:
+                self._unload_chunk(chunk)
+        for chunk in active:
+            if not chunk.loaded:
+                self._load_chunk(chunk)
+        self.active = active
+
+    def bake_square(self, block: Block):
+        """ Re-render a single cell of the tile layer. """
+        self._bake_cell(block.r, block.c, block.image)
+
+    def _bake_cell(self, row, col, image):
+        chunk = self._chunk_of(row, col)
+        if chunk.loaded:
+            rect = pygame.Rect(col * self.bwidth, row * self.bheight, self.bwidth, self.bheight)
+            chunk.surface.blit(image, rect.move(-chunk.rect.x, -chunk.rect.y))
+            self.game.mark_dirty(self.game.camera.apply(rect))
+
+    def update(self):
+        self._stream()
+        self.on_update()
+        for chunk in self.active:
+            if not chunk.awake:
+                continue
+            awake, chunk.awake = chunk.awake, {}
+            for block in awake.values():
+                block.update()
+
+    def draw(self, screen):
+        self._stream()
+        camera = self.game.camera
+        if not self.rect.contains(camera.rect):
+            screen.fill(BLACK)
+        for chunk in self.active:
+            if camera.visible(chunk.rect):
+                screen.blit(chunk.surface, camera.apply(chunk.rect))
+
     def get_square(self, x, y, lookup=XY) -> Block:
         if lookup == self.ROWCOLS:
             raise NotImplementedError()
@@ -164,14 +656,81 @@ class Grid(BaseComponent):
     def _xy_to_rowcols(self, x, y):
         return int(x // self.bwidth), int(y // self.bheight)
 
+    def tiles_in_rect(self, rect) -> List[Tile]:
+        """ Returns the non empty tiles whose cells overlap ``rect``.
+        Only the rows/cols covered by the rect are visited, so the cost depends
+        on the size of the rect and not on the size of the grid. """
+        left, top = self._xy_to_rowcols(max(rect.left, 0), max(rect.top, 0))
+        right, bottom = self._xy_to_rowcols(rect.right - 1, rect.bottom - 1)
+        right = min(right, self.cols - 1)
+        bottom = min(bottom, self.rows - 1)
+        if self.level is not None:
+            for crow in range(top // self.CHUNK_SIZE, bottom // self.CHUNK_SIZE + 1):
+                for ccol in range(left // self.CHUNK_SIZE, right // self.CHUNK_SIZE + 1):
+                    self._chunk(crow, ccol)
+        tiles, cols, kinds, bwidth, bheight = self.tiles, self.cols, self.TILES, self.bwidth, self.bheight
+        return [
+            Tile(kinds[tiles[r * cols + c]], r, c, pygame.Rect(c * bwidth, r * bheight, bwidth, bheight))
+            for r in range(top, bottom + 1)
+            for c in range(left, right + 1)
+            if tiles[r * cols + c] != self.EMPTY
+        ]
+
+    def get_squares_in_rect(self, rect) -> List[Block]:
+        """ Blocks of the non empty cells overlapping ``rect``, see ``tiles_in_rect``. """
+        return [self._block_at(tile.r, tile.c) for tile in self.tiles_in_rect(rect)]
+
+    def collide(self, sprite) -> List[Tile]:
+        """ Tile indexed equivalent of ``pygame.sprite.spritecollide``.
+        Empty tiles never take part in collisions. """
+        return [t for t in self.tiles_in_rect(sprite.rect) if sprite.rect.colliderect(t.rect)]
+
     def get_square_xy(self, x, y) -> Block:
+        """ Block of the cell at ``x, y``. Unless the tile is kept, it is a
+        lookup block owned by the grid: the same one is returned until the cell
+        changes or its chunk is unloaded, then it goes back to the pool. """
         col, row = self._xy_to_rowcols(x, y)
-        if row >= len(self.grid) or col >= len(self.grid[row]):
+        if not self._in_bounds(row, col):
             return None
-        return self.grid[row][col]
+        self._chunk_of(row, col)
+        return self._block_at(row, col)
 
     def set_square_xy(self, x, y, block) -> Block:
+        """ Put ``block`` on the cell at ``x, y``. A static block is only used
+        for its tile id and image and stays with the caller, others are kept. """
         col, row = self._xy_to_rowcols(x, y)
-        self.grid[row][col].kill()
-        self.grid[row][col] = block
-        self.children.add(block)
+        ix = self._index(row, col)
+        chunk = self._chunk_of(row, col)
+        if self.blocks.get(ix) is not block:
+            self._remove_block(ix)
+        self._release_lookup(chunk, ix, keep=block)
+        self.colors.pop(ix, None)
+        if block.STATIC and block.color != block.COLOR:
+            self.colors[ix] = block.color
+        self.tiles[ix] = self.tile_id(type(block))
+        self.version += 1
+        chunk.data = None
+        self.bake_square(block)
+        if block.STATIC:
+            if self.blocks.get(ix) is block:
+                self._remove_block(ix)
+        else:
+            self._add_block(ix, block)
+
+    def place(self, x, y, block_cls):
+        """ Put a ``block_cls`` tile on the cell at ``x, y``, without creating a
+        block unless it has per-instance behaviour. """
+        col, row = self._xy_to_rowcols(x, y)
+        if not self._in_bounds(row, col):
+            return
+        if not block_cls.STATIC:
+            return self.set_square_xy(x, y, self.pool.acquire(block_cls, col, row))
+        ix = self._index(row, col)
+        chunk = self._chunk_of(row, col)
+        self._remove_block(ix)
+        self._release_lookup(chunk, ix)
+        self.colors.pop(ix, None)
+        self.tiles[ix] = self.tile_id(block_cls)
+        self.version += 1
+        chunk.data = None
+        self._bake_cell(row, col, self._tile_image(self.tiles[ix]))
@@ -0,0 +1,233 @@
+import struct
+import logging
+
+import pygame
+
+from array import array
+
+from plat.core.utils import JOYBTN
+
+
+class NullJoystick:
+    """ Stand-in for ``pygame.joystick.Joystick`` when no controller is connected.
+    Every axis rests at 0. """
+    def init(self):
+        pass
+
+    def get_numaxes(self):
+        return 2
+
+    def get_axis(self, axis):
+        return 0.0
+
+
+class InputLog:
+    """
+    Joystick input of a run, frame by frame.
+
+    Axes are sampled once per physics step, button events are kept with the
+    step they were handled before.
+
+    Layout (little endian)::
+
+        header   MAGIC, VERSION, axis count, frame count, event count
+        axes     per frame: one float64 per axis
+        events   per event: frame, kind, button
+    """
+    logger = logging.getLogger('InputLog')
+
+    MAGIC = b'PLATINP'
+    VERSION = 1
+
+    HEADER = struct.Struct('<7sBBII')
+    EVENT = struct.Struct('<IBB')
+
+    BUTTON_DOWN = 0
+    BUTTON_UP = 1
+    QUIT = 2
+
+    KINDS = {
+        pygame.JOYBUTTONDOWN: BUTTON_DOWN,
+        pygame.JOYBUTTONUP: BUTTON_UP,
+        pygame.QUIT: QUIT,
+    }
+    TYPES = {kind: type_ for type_, kind in KINDS.items()}
+
+    def __init__(self, naxes=2):
+        self.naxes = naxes
+        self.axes = array('d')
+        self.events = []
+
+    @property
+    def frames(self):
+        return len(self.axes) // self.naxes if self.naxes else 0
+
+    def save(self, path):
+        with open(path, 'wb') as fh:
+            fh.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.naxes, self.frames, len(self.events)))
+            fh.write(self.axes.tobytes())
+            fh.write(b''.join(self.EVENT.pack(*event) for event in self.events))
+        self.logger.info(f'Recorded {self.frames} frames and {len(self.events)} events to {path}')
+
+    @classmethod
+    def from_script(cls, lines, frames=None) -> 'InputLog':
+        """
+        Build a log from a text script, one command per line::
+
+            # frame command
+            0 axes 0.8 0      (x and y, they keep their values until changed)
+            30 press A
+            42 release A
+
+        Buttons are JOYBTN names. The log lasts ``frames`` steps, or up to the last command.
+        """
+        axes, changes, events = [0.0, 0.0], {}, []
+        for number, line in enumerate(lines, 1):
+            line = line.split('#', 1)[0].split()
+            if not line:
+                continue
+            try:
+                frame, command, *values = line
+                frame = int(frame)
+                if command == 'axes':
+                    if len(values) != len(axes):
+                        raise ValueError(f'axes takes {len(axes)} values, got {len(values)}')
+                    changes[frame] = [float(v) for v in values]
+                elif command in ('press', 'release'):
+                    kind = cls.BUTTON_DOWN if command == 'press' else cls.BUTTON_UP
+                    events.append((frame, kind, JOYBTN[values[0]]))
+                elif command == 'quit':
+                    events.append((frame, cls.QUIT, 0))
+                else:
+                    raise ValueError(f'unknown command {command}')
+            except (ValueError, KeyError, IndexError) as e:
+                raise ValueError(f'Bad input script line {number}: {e}')
+        last = max([f for f, *_ in events] + list(changes) + [0]) + 1
+        log = cls(len(axes))
+        for frame in range(frames or last):
+            if frame in changes:
+                axes[:] = changes[frame]
+            log.axes.extend(axes)
+        log.events = sorted(events)
+        return log
+
+    @classmethod
+    def load(cls, path) -> 'InputLog':
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        try:
+            magic, version, naxes, frames, events = cls.HEADER.unpack_from(data, 0)
+        except struct.error as e:
+            raise ValueError(f'{path} is not an input recording: {e}')
+        if magic != cls.MAGIC:
+            raise ValueError(f'{path} is not an input recording')
+        if version != cls.VERSION:
+            raise ValueError(f'Unsupported input recording version {version} in {path}')
+        log = cls(naxes)
+        offset = cls.HEADER.size
+        size = frames * naxes * log.axes.itemsize
+        log.axes.frombytes(data[offset:offset + size])
+        offset += size
+        log.events = list(cls.EVENT.iter_unpack(data[offset:offset + events * cls.EVENT.size]))
+        return log
+
+
+class InputRecorder:
+    """
+    Wraps the joystick and records what the game reads from it.
+
+    Axes are sampled on ``step`` so every read within a physics step sees the
+    same values, the ones stored in the log.
+    """
+    def __init__(self, joystick=None):
+        self.joystick = joystick or NullJoystick()
+        self.log = InputLog(self.joystick.get_numaxes())
+        self._axes = [0.0] * self.log.naxes
+
+    def init(self):
+        self.joystick.init()
+
+    def get_numaxes(self):
+        return self.log.naxes
+
+    def get_axis(self, axis):
+        return self._axes[axis]
+
+    def step(self, frame):
+        self._axes = [self.joystick.get_axis(axis) for axis in range(self.log.naxes)]
+        self.log.axes.extend(self._axes)
+
+    def event(self, frame, event):
+        kind = InputLog.KINDS.get(event.type)
+        if kind is not None:
+            self.log.events.append((frame, kind, getattr(event, 'button', 0)))
+        return event
+
+    def events(self, frame):
+        return ()
+
+    def save(self, path):
+        self.log.save(path)
+
+
+class InputReplay:
+    """
+    Plays an ``InputLog`` back in place of the joystick.
+
+    Live joystick buttons are ignored, axes rest at 0 once the log runs out.
+    """
+    logger = logging.getLogger('InputReplay')
+
+    def __init__(self, log: InputLog):
+        self.log = log
+        self.finished = False
+        self._axes = [0.0] * log.naxes
+        self._next_event = 0
+
+    @classmethod
+    def load(cls, path) -> 'InputReplay':
+        return cls(InputLog.load(path))
+
+    @classmethod
+    def from_file(cls, path, frames=None) -> 'InputReplay':
+        """ Replay a recording, or a text script (see ``InputLog.from_script``). """
+        with open(path, 'rb') as fh:
+            recorded = fh.read(len(InputLog.MAGIC)) == InputLog.MAGIC
+        if recorded:
+            return cls.load(path)
+        with open(path) as fh:
+            return cls(InputLog.from_script(fh, frames))
+
+    def init(self):
+        pass
+
+    def get_numaxes(self):
+        return self.log.naxes
+
+    def get_axis(self, axis):
+        return self._axes[axis]
+
+    def step(self, frame):
+        if frame < self.log.frames:
+            n = self.log.naxes
+            self._axes = list(self.log.axes[frame * n:(frame + 1) * n])
+        elif not self.finished:
+            self.logger.info(f'Replay finished at frame {frame}')
+            self.finished = True
+            self._axes = [0.0] * self.log.naxes
+
+    def event(self, frame, event):
+        if event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+            return None
+        return event
+
+    def events(self, frame):
+        """ Recorded events to handle before ``frame``. """
+        events = self.log.events
+        while self._next_event < len(events) and events[self._next_event][0] <= frame:
+            _, kind, button = events[self._next_event]
+            self._next_event += 1
+            if kind == InputLog.QUIT:
+                yield pygame.event.Event(pygame.QUIT)
+            else:
+                yield pygame.event.Event(InputLog.TYPES[kind], button=button, joy=0, instance_id=0)
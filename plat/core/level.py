@@ -0,0 +1,128 @@
+import os
+import mmap
+import struct
+import logging
+
+from itertools import groupby
+
+
+class LevelFile:
+    """
+    Binary level file: tile ids run-length encoded per chunk, with a chunk index
+    so single chunks can be decoded straight from the memory-mapped file.
+
+    Layout (little endian)::
+
+        header   MAGIC, VERSION, rows, cols, block height, block width, chunk size
+        index    per chunk, in row-major chunk order: payload offset, payload length
+        payload  per chunk: runs of (count, tile id) over the chunk tiles in row-major order
+    """
+    logger = logging.getLogger('LevelFile')
+
+    MAGIC = b'PLATLVL'
+    VERSION = 1
+
+    HEADER = struct.Struct('<7sBIIHHH')
+    INDEX = struct.Struct('<QI')
+    RUN = struct.Struct('<HB')
+    MAX_RUN = 0xFFFF
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, self.rows, self.cols, self.bheight, self.bwidth,
+                self.chunk_size) = self.HEADER.unpack_from(self._mm, 0)
+        except (ValueError, struct.error) as e:
+            self.close()
+            raise ValueError(f'{path} is not a level file: {e}')
+        if magic != self.MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a level file')
+        if version != self.VERSION:
+            self.close()
+            raise ValueError(f'Unsupported level version {version} in {path}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, '_mm', None) is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    @property
+    def chunk_rows(self):
+        return -(-self.rows // self.chunk_size)
+
+    @property
+    def chunk_cols(self):
+        return -(-self.cols // self.chunk_size)
+
+    def chunk_area(self, crow, ccol):
+        """ ``(first row, first col, rows, cols)`` of the tiles in a chunk. """
+        row, col = crow * self.chunk_size, ccol * self.chunk_size
+        return row, col, min(self.chunk_size, self.rows - row), min(self.chunk_size, self.cols - col)
+
+    def read_chunk(self, crow, ccol) -> bytes:
+        """ Decode the tile ids of a single chunk, row-major within the chunk. """
+        ix = crow * self.chunk_cols + ccol
+        offset, length = self.INDEX.unpack_from(self._mm, self.HEADER.size + ix * self.INDEX.size)
+        payload = memoryview(self._mm)[offset:offset + length]
+        try:
+            return b''.join(bytes((tile,)) * count for count, tile in self.RUN.iter_unpack(payload))
+        finally:
+            payload.release()
+
+    def read_into(self, tiles, crow, ccol):
+        """ Decode a chunk into the ``rows * cols`` tile array of a grid. """
+        row, col, rows, cols = self.chunk_area(crow, ccol)
+        data = self.read_chunk(crow, ccol)
+        for r in range(rows):
+            start = (row + r) * self.cols + col
+            tiles[start:start + cols] = type(tiles)(tiles.typecode, data[r * cols:(r + 1) * cols])
+
+    @classmethod
+    def write(cls, path, tiles, rows, cols, bheight, bwidth, chunk_size):
+        """ Encode the ``rows * cols`` tile array to ``path``. """
+        chunk_rows, chunk_cols = -(-rows // chunk_size), -(-cols // chunk_size)
+        payloads = []
+        for crow in range(chunk_rows):
+            for ccol in range(chunk_cols):
+                row, col = crow * chunk_size, ccol * chunk_size
+                width = min(chunk_size, cols - col)
+                cells = b''.join(
+                    tiles[r * cols + col:r * cols + col + width].tobytes()
+                    for r in range(row, min(row + chunk_size, rows))
+                )
+                payloads.append(b''.join(cls._encode(cells)))
+
+        offset = cls.HEADER.size + len(payloads) * cls.INDEX.size
+        index = []
+        for payload in payloads:
+            index.append(cls.INDEX.pack(offset, len(payload)))
+            offset += len(payload)
+
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, rows, cols, bheight, bwidth, chunk_size))
+            fh.write(b''.join(index))
+            fh.write(b''.join(payloads))
+        os.replace(tmp, path)
+        cls.logger.debug(f'Saved {rows}x{cols} level to {path} ({offset} bytes)')
+
+    @classmethod
+    def _encode(cls, cells):
+        for tile, group in groupby(cells):
+            count = sum(1 for _ in group)
+            while count:
+                run = min(count, cls.MAX_RUN)
+                yield cls.RUN.pack(run, tile)
+                count -= run
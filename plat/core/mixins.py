@@ -9,7 +9,8 @@ from pygame.sprite import Sprite, Group
 from pygame.mask import from_surface
 
 from plat.core.utils import *
-from plat.core.components import BaseComponent
+from plat.core.components import BaseComponent, mask_bounds
+from plat.core.trace import TRACE
 
 
 class MoverMixin:
@@ -25,6 +26,8 @@ class MoverMixin:
 
     INPUT_VEL_MULTIPLIER = Vector2(2, 2)
 
+    SCROLLS = True
+
     @property
     def direction(self):
         return self.velocity.normalize() if self.velocity.length() > 0 else Vector2(0,0)
@@ -39,6 +42,7 @@ class MoverMixin:
         self.base_acceleration = (0, 0)
         self.acceleration = Vector2(self.base_acceleration)
         self.last_pos = None
+        self.drag = 1
 
     def calculate_newpos(self):
         self.last_pos = self.pos
@@ -48,6 +52,18 @@ class MoverMixin:
         self.velocity = self._calculate_velocity()
         self.pos = self._calculate_position()
 
+    def draw_rect(self):
+        """ Interpolates between the position before and after the last step. """
+        alpha = self.game.alpha
+        if not alpha or self.last_pos is None:
+            return self.rect
+        rect = self.rect.copy()
+        rect.midbottom = (
+            round(self.last_pos.x + (self.rect.midbottom[0] - self.last_pos.x) * alpha),
+            round(self.last_pos.y + (self.rect.midbottom[1] - self.last_pos.y) * alpha),
+        )
+        return rect
+
     def _get_calculated_vel(self):
         vel = Vector2(self.input_vel)
         vel.x *= self.INPUT_VEL_MULTIPLIER.x
@@ -57,10 +73,12 @@ class MoverMixin:
     def _calculate_acceleration(self) -> Vector2:
         """ Returns new acceleration in current update """
         acc = self.calculate_acceleration()
-        print('acc before joystick input:', acc)
+        if TRACE.enabled:
+            TRACE.record(self, TRACE.ACC_BEFORE_INPUT, acc.x, acc.y)
         acc = acc + self.calculated_vel
         acc = self._calculate_friction(acc)
-        print('acc after frition: ', acc)
+        if TRACE.enabled:
+            TRACE.record(self, TRACE.ACC_AFTER_FRICTION, acc.x, acc.y)
         return acc
 
     def _calculate_friction(self, acc) -> Vector2:
@@ -86,15 +104,33 @@ class MoverMixin:
         vel = self.velocity + self.acceleration
         vel.x = 0 if abs(vel.x) < 0.1 else vel.x
         vel.y = 0 if abs(vel.y) < 0.1 else vel.y
-
+        if self.drag != 1:
+            vel.x /= self.drag
+            vel.x = 0 if abs(vel.x) < 0.1 else vel.x
+            self.drag = 1
         return vel
 
+    def slow_down(self, factor):
+        """ Divide the x velocity of the next step by ``factor``. """
+        self.drag = factor
+
     def _calculate_position(self):
         if self.FRICTION_AXIS != self.AXIS_NONE:
             # print(f"(pos) {self.pos} + {self.velocity} + 0.5 * {self.acceleration} = {self.pos + self.velocity + 0.5 * self.acceleration}")
-            return self.pos + self.velocity + 0.5 * self.acceleration
+            return self._constrain(self.pos, self.pos + self.velocity + 0.5 * self.acceleration)
         else:
-            return self.pos + self.velocity
+            return self._constrain(self.pos, self.pos + self.velocity)
+
+    def _constrain(self, start, end) -> Vector2:
+        """ Where the mover stops moving from ``start`` to ``end`` in a step,
+        before the level bounds are applied. Colliding movers override it. """
+        return end
+
+    def before_step(self):
+        """ Called by a MoverBatch before integrating the mover, see BatchMoverMixin. """
+
+    def after_step(self):
+        """ Called by a MoverBatch after integrating the mover, see BatchMoverMixin. """
 
 
 class JoyMoverMixin(MoverMixin):
@@ -133,26 +169,39 @@ class CollisionableMixin(BaseComponent):
     
     def new(self):
         self.mask = None
+        self.bounds = None
+        self.mask_image = None
         super().new()
 
     def on_update(self):
         super().on_update()
-        if self.image:
-            self.mask = from_surface(self.image)
-
-    def get_collissions(self) -> List[Sprite]:
+        if self.image and self.image is not self.mask_image:
+            mask = from_surface(self.image)
+            self.set_mask(mask, self.image, mask_bounds(mask))
+
+    def set_mask(self, mask, image, bounds):
+        """ Use ``mask`` for ``image``, it is only rebuilt once the image changes. """
+        self.mask = mask
+        self.mask_image = image
+        self.bounds = bounds
+
+    def get_collissions(self) -> list:
+        """ Grid ``Tile``s touched moving one pixel along the current direction. """
+        grid = self.game.state.obj.grid
         dir_ = self._parse_direction(self.direction)
         self.rect.y += dir_.y
-        cols = pygame.sprite.spritecollide(self, self.game.state.obj.grid.children.sprites, False) 
+        cols = grid.collide(self)
         self.rect.y -= dir_.y
         self.rect.x += dir_.x
-        cols += pygame.sprite.spritecollide(self, self.game.state.obj.grid.children.sprites, False) 
+        cols += grid.collide(self)
         self.rect.x -= dir_.x
         return cols
 
     def _check_collisions(self):
         hits = self.get_collissions()
         for hit in hits:
+            if TRACE.enabled:
+                TRACE.record(self, TRACE.COLLISION, hit.c, hit.r)
             self._check_collision(hit)
 
     def _check_collision(self, hit):
@@ -197,5 +246,7 @@ class AnimationMixin(BaseComponent):
         if now - anim.last_update > anim.delay:
             frame = anim.get_next_frame(now)
             self.image = frame
+            if isinstance(self, CollisionableMixin):
+                self.set_mask(anim.mask.mask, frame, anim.mask.bounds)
 
 
@@ -0,0 +1,359 @@
+"""
+Batched movement for many movers.
+
+``MoverBatch`` keeps positions, velocities and accelerations of every mover in
+contiguous NumPy arrays and integrates all of them in one vectorized pass,
+following the same formulas as ``MoverMixin.calculate_newpos``.
+
+NumPy is optional, install it with ``pip install numpy`` (or the ``batch``
+extra) to use this module.
+"""
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from pygame.math import Vector2
+
+from plat.core.components import Pos
+from plat.core.mixins import MoverMixin
+from plat.core.trace import TRACE
+
+
+def _probe_rect_rounding() -> bool:
+    """ True if this pygame rounds floats assigned to a Rect (pygame 2),
+    False if it truncates them (pygame 1). """
+    rect = pygame.Rect(0, 0, 0, 0)
+    rect.x = 0.5
+    return rect.x == 1
+
+
+RECT_ROUNDS = _probe_rect_rounding()
+
+
+def _to_rect_coords(values):
+    """ Float positions as a Rect would store them. """
+    whole = np.trunc(values)
+    if not RECT_ROUNDS:
+        return whole
+    return np.where(np.abs(values - whole) >= 0.5, whole + np.sign(values), whole)
+
+
+class MoverBatch:
+    """
+    Integrates all its movers at once.
+
+    Each mover is a row in the arrays below. Rows are kept contiguous: removing
+    a mover moves the last row into its place and updates the owner's ``batch_index``.
+    ``force`` holds what ``calculate_acceleration`` returns (gravity, jumps...),
+    ``drag`` divides the x velocity of the next step only, like ``impulse`` adds
+    to its acceleration.
+
+    Movers added with ``hooks`` get ``before_step`` called before the arrays
+    are integrated and ``after_step`` (collisions) before the level bounds
+    are applied, the others cost no Python call per step.
+    """
+    INITIAL_CAPACITY = 64
+
+    VECTORS = ('pos', 'last_pos', 'velocity', 'acceleration', 'force', 'impulse', 'input_vel', 'input_multiplier')
+    SCALARS = ('friction', 'position_acc', 'drag')
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        if np is None:
+            raise RuntimeError('MoverBatch requires numpy (pip install numpy)')
+        self.count = 0
+        self.owners = []
+        self.hooked = []
+        self._allocate(capacity)
+
+    @classmethod
+    def available(cls) -> bool:
+        return np is not None
+
+    def __len__(self):
+        return self.count
+
+    def _allocate(self, capacity):
+        def grow(old, shape):
+            new = np.zeros(shape)
+            if old is not None:
+                new[:self.count] = old[:self.count]
+            return new
+        self.capacity = capacity
+        for name in self.VECTORS:
+            setattr(self, name, grow(getattr(self, name, None), (capacity, 2)))
+        for name in self.SCALARS:
+            setattr(self, name, grow(getattr(self, name, None), capacity))
+
+    def add(self, owner, pos, velocity=(0, 0), force=(0, 0), friction=MoverMixin.FRICTION,
+            input_multiplier=MoverMixin.INPUT_VEL_MULTIPLIER, friction_axis=MoverMixin.FRICTION_AXIS, drag=1, hooks=False) -> int:
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        ix = self.count
+        self.pos[ix] = self.last_pos[ix] = pos
+        self.velocity[ix] = velocity
+        self.acceleration[ix] = self.impulse[ix] = self.input_vel[ix] = 0
+        self.force[ix] = force
+        self.input_multiplier[ix] = input_multiplier
+        self.friction[ix] = friction
+        self.position_acc[ix] = 0 if friction_axis == MoverMixin.AXIS_NONE else 0.5
+        self.drag[ix] = drag
+        self.owners.append(owner)
+        if hooks:
+            self.hooked.append(owner)
+        self.count += 1
+        owner.batch_index = ix
+        return ix
+
+    def remove(self, owner):
+        ix = owner.batch_index
+        last = self.count - 1
+        if ix != last:
+            for name in self.VECTORS + self.SCALARS:
+                array = getattr(self, name)
+                array[ix] = array[last]
+            self.owners[ix] = self.owners[last]
+            self.owners[ix].batch_index = ix
+        self.owners.pop()
+        if owner in self.hooked:
+            self.hooked.remove(owner)
+        self.count -= 1
+        owner.batch_index = None
+
+    def step(self, width, height):
+        """ Advance every mover one physics step inside a ``width`` x ``height`` level. """
+        n = self.count
+        if not n:
+            return
+        for owner in self.hooked:
+            owner.before_step()
+        pos, velocity = self.pos[:n], self.velocity[:n]
+        self.last_pos[:n] = pos
+
+        # MoverMixin._calculate_acceleration
+        acc = self.force[:n] + self.impulse[:n]
+        acc += self.input_vel[:n] * self.input_multiplier[:n]
+        acc += velocity * self.friction[:n, None]
+        self.impulse[:n] = 0
+
+        # MoverMixin._calculate_velocity
+        velocity = velocity + acc
+        velocity[np.abs(velocity) < 0.1] = 0
+        velocity[:, 0] /= self.drag[:n]
+        velocity[np.abs(velocity[:, 0]) < 0.1, 0] = 0
+        self.drag[:n] = 1
+
+        # MoverMixin._calculate_position
+        pos = pos + velocity
+        pos += self.position_acc[:n, None] * acc
+
+        self.pos[:n] = pos
+        self.velocity[:n] = velocity
+        self.acceleration[:n] = acc
+        for owner in self.hooked:
+            owner.after_step()
+
+        # BaseComponent._check_bounds
+        pos, velocity = self.pos[:n], self.velocity[:n]
+        velocity[(pos[:, 0] < 0) | (width < pos[:, 0]), 0] = 0
+        velocity[(pos[:, 1] < 0) | (height < pos[:, 1]), 1] = 0
+        np.clip(pos[:, 0], 0, width, out=pos[:, 0])
+        np.clip(pos[:, 1], 0, height, out=pos[:, 1])
+        pos[:] = _to_rect_coords(pos)
+
+
+class RowVector:
+    """
+    ``Vector2`` like view of the row of a batched mover in one of the
+    ``MoverBatch`` arrays, so in place changes (``mover.velocity.x = 0``)
+    reach the batch. Other ``Vector2`` methods work on a copy.
+    """
+    __slots__ = ('owner', 'name')
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    @property
+    def _row(self):
+        return getattr(self.owner.movers, self.name)[self.owner.batch_index]
+
+    @property
+    def x(self):
+        return float(self._row[0])
+
+    @x.setter
+    def x(self, value):
+        self._row[0] = value
+
+    @property
+    def y(self):
+        return float(self._row[1])
+
+    @y.setter
+    def y(self, value):
+        self._row[1] = value
+
+    def __getitem__(self, ix):
+        return float(self._row[ix])
+
+    def __setitem__(self, ix, value):
+        self._row[ix] = value
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        return iter((self.x, self.y))
+
+    def __eq__(self, other):
+        return Vector2(self) == other
+
+    def vector(self) -> Vector2:
+        return Vector2(self.x, self.y)
+
+    def __getattr__(self, name):
+        return getattr(self.vector(), name)
+
+    def __add__(self, other):
+        return self.vector() + other
+
+    def __sub__(self, other):
+        return self.vector() - other
+
+    def __mul__(self, other):
+        return self.vector() * other
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __str__(self):
+        return str(self.vector())
+
+    def __repr__(self):
+        return repr(self.vector())
+
+
+class BatchMoverMixin(MoverMixin):
+    """
+    Mover integrated by the ``MoverBatch`` of its state instead of by itself.
+
+    Movement is configured and extended as with ``MoverMixin``: the batch calls
+    ``get_input_vel`` and ``calculate_acceleration`` in ``before_step`` and
+    ``_constrain`` (collisions) in ``after_step``, so the same mixins work on
+    both. Movers without input, per step forces or collisions set ``STEP_HOOKS``
+    to False to skip those calls, and are driven with ``set_input`` and ``push``.
+
+    Until attached (or without numpy) the mover integrates itself like a ``MoverMixin``.
+    """
+    STEP_HOOKS = True
+
+    def new(self):
+        self.movers = None
+        self.batch_index = None
+        super().new()
+
+    def attach(self, movers: MoverBatch):
+        self.movers = movers
+        movers.add(
+            self, self.pos,
+            velocity=self._velocity,
+            force=self.base_acceleration,
+            friction=self.FRICTION,
+            input_multiplier=self.INPUT_VEL_MULTIPLIER,
+            friction_axis=self.FRICTION_AXIS,
+            drag=self._drag,
+            hooks=self.STEP_HOOKS,
+        )
+
+    def detach(self):
+        if self.movers is not None:
+            self._velocity = self.velocity.vector()
+            self._acceleration = self.acceleration.vector()
+            self._drag = self.drag
+            self.movers.remove(self)
+            self.movers = None
+
+    def kill(self):
+        self.detach()
+        super().kill()
+
+    @property
+    def velocity(self):
+        return self._velocity if self.movers is None else RowVector(self, 'velocity')
+
+    @velocity.setter
+    def velocity(self, value):
+        if self.movers is None:
+            self._velocity = value
+        else:
+            self.movers.velocity[self.batch_index] = tuple(value)
+
+    @property
+    def acceleration(self):
+        return self._acceleration if self.movers is None else RowVector(self, 'acceleration')
+
+    @acceleration.setter
+    def acceleration(self, value):
+        if self.movers is None:
+            self._acceleration = value
+        else:
+            self.movers.acceleration[self.batch_index] = tuple(value)
+
+    @property
+    def drag(self):
+        return self._drag if self.movers is None else float(self.movers.drag[self.batch_index])
+
+    @drag.setter
+    def drag(self, value):
+        if self.movers is None:
+            self._drag = value
+        else:
+            self.movers.drag[self.batch_index] = value
+
+    def set_input(self, x, y):
+        self.movers.input_vel[self.batch_index] = (x, y)
+
+    def push(self, x, y):
+        """ Add to the acceleration of the next step only. """
+        self.movers.impulse[self.batch_index] += (x, y)
+
+    def before_step(self):
+        movers, ix = self.movers, self.batch_index
+        # The rect is the position between steps, it may have been moved from outside
+        movers.pos[ix] = self.rect.midbottom
+        self.input_vel = self.get_input_vel()
+        movers.input_vel[ix] = self.input_vel
+        acc = self.calculate_acceleration()
+        if TRACE.enabled:
+            TRACE.record(self, TRACE.ACC_BEFORE_INPUT, acc.x, acc.y)
+        movers.force[ix] = tuple(acc)
+
+    def after_step(self):
+        movers, ix = self.movers, self.batch_index
+        if TRACE.enabled:
+            TRACE.record(self, TRACE.ACC_AFTER_FRICTION, *movers.acceleration[ix])
+        movers.pos[ix] = tuple(self._constrain(self.pos, Vector2(*movers.pos[ix])))
+
+    def calculate_newpos(self):
+        if self.movers is None:
+            return super().calculate_newpos()
+        x, y = self.movers.pos[self.batch_index]
+        self.rect.midbottom = (int(x), int(y))
+        self._set_xy()
+
+    def draw_rect(self):
+        if self.movers is None:
+            return super().draw_rect()
+        alpha = self.game.alpha
+        if not alpha:
+            return self.rect
+        last = Pos(*self.movers.last_pos[self.batch_index])
+        rect = self.rect.copy()
+        rect.midbottom = (
+            round(last.x + (self.rect.midbottom[0] - last.x) * alpha),
+            round(last.y + (self.rect.midbottom[1] - last.y) * alpha),
+        )
+        return rect
@@ -0,0 +1,153 @@
+import os
+import json
+import logging
+
+from time import perf_counter_ns
+from collections import deque, defaultdict
+
+from plat.config import PROFILE, PROFILE_SAMPLE_EVERY, PROFILE_COMPONENTS, PROFILE_WINDOW, PROFILE_MAX_EVENTS
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'cat', 'start')
+
+    def __init__(self, profiler, name, cat):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, perf_counter_ns(), self.cat)
+        return False
+
+
+class Profiler:
+    """
+    Times the phases of a frame.
+
+    Only one out of every ``sample_every`` frames is measured, spans opened on
+    other frames (or while disabled) are shared no-op context managers. Keeps
+    the last ``window`` durations of each span for percentiles and the last
+    ``max_events`` spans as Chrome trace events (chrome://tracing, Perfetto).
+    """
+    logger = logging.getLogger('Profiler')
+
+    NULL_SPAN = _NullSpan()
+
+    def __init__(self, enabled=PROFILE, sample_every=PROFILE_SAMPLE_EVERY, components=PROFILE_COMPONENTS,
+                 window=PROFILE_WINDOW, max_events=PROFILE_MAX_EVENTS):
+        self.enabled = enabled
+        self.sample_every = max(sample_every, 1)
+        self.components = components
+        self.active = False
+        self.durations = defaultdict(lambda: deque(maxlen=window))
+        self.events = deque(maxlen=max_events)
+        self._window = window
+        self._frame_start = None
+
+    def begin_frame(self, frame):
+        self.active = self.enabled and frame % self.sample_every == 0
+        self._frame_start = perf_counter_ns() if self.active else None
+
+    def end_frame(self):
+        if self._frame_start is not None:
+            self.add('frame', self._frame_start, perf_counter_ns(), 'frame')
+        self._frame_start = None
+        self.active = False
+
+    def span(self, name, cat='phase'):
+        if not self.active:
+            return self.NULL_SPAN
+        return _Span(self, name, cat)
+
+    def component_span(self, component, phase):
+        """ Span for a single component, only when component profiling is on. """
+        if not self.active or not self.components:
+            return self.NULL_SPAN
+        return _Span(self, f'{component.__class__.__name__}.{phase}', 'component')
+
+    def add(self, name, start, end, cat='phase'):
+        self.durations[name].append(end - start)
+        self.events.append((name, cat, start, end - start))
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        """ Rolling percentiles of a span, in milliseconds. """
+        values = sorted(self.durations.get(name, ()))
+        if not values:
+            return {p: 0.0 for p in points}
+        return {p: values[min(len(values) - 1, len(values) * p // 100)] / 1e6 for p in points}
+
+    def summary(self, points=(50, 95, 99)):
+        return {name: self.percentiles(name, points) for name in sorted(self.durations)}
+
+    def export(self, path):
+        """ Write the recorded spans as Chrome trace-event JSON. """
+        events = [
+            {'name': name, 'cat': cat, 'ph': 'X', 'ts': start / 1000, 'dur': duration / 1000, 'pid': os.getpid(), 'tid': 0}
+            for name, cat, start, duration in self.events
+        ]
+        with open(path, 'w') as fh:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fh)
+        self.logger.info(f'Exported {len(events)} spans to {path}')
+
+    def reset(self, window=None):
+        self._window = window or self._window
+        self.durations = defaultdict(lambda: deque(maxlen=self._window))
+        self.events.clear()
+
+
+class StartupTimer:
+    """
+    Breaks the time to the first frame down by phase.
+
+    Startup is a sequence of ``mark`` calls, each one closing the phase that
+    started at the previous mark (or when this module was imported).
+    """
+    logger = logging.getLogger('Startup')
+
+    def __init__(self):
+        self.origin = perf_counter_ns()
+        self.phases = []
+        self.done = False
+        self._last = self.origin
+
+    def mark(self, name):
+        if self.done:
+            return
+        now = perf_counter_ns()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def finish(self, name='first frame'):
+        self.mark(name)
+        self.done = True
+
+    @property
+    def total_ms(self) -> float:
+        return (self._last - self.origin) / 1e6
+
+    def report(self) -> dict:
+        """ Milliseconds spent in each phase, in order. """
+        return {name: duration / 1e6 for name, duration in self.phases}
+
+    def log(self):
+        total = self.total_ms or 1
+        for name, ms in self.report().items():
+            self.logger.info(f'{name:<16} {ms:8.2f}ms {ms / total:6.1%}')
+        self.logger.info(f'{"total":<16} {self.total_ms:8.2f}ms')
+
+
+PROFILER = Profiler()
+STARTUP = StartupTimer()
@@ -1,5 +1,9 @@
 import logging
 from plat.core.components import BaseComponent, SpriteGroup
+from plat.core.events import EventBus
+from plat.core.physics import MoverBatch, BatchMoverMixin
+from plat.core.profiler import PROFILER
+from plat.config import BATCH_MOVERS
 
 
 class State:
@@ -10,6 +14,8 @@ class State:
         self.game = game
         self.grid = grid
         self.children = SpriteGroup()
+        self.movers = None
+        self.bus = EventBus()
         self._init_components()
 
     def _init_components(self):
@@ -17,15 +23,31 @@ class State:
             raise RuntimeError('Empty state')
         self.children.add(self.grid)
         for c in self.COMPONENTS:
-            self.children.add(c(self.game, grid=self.grid))
+            self.add(self.build(c))
+
+    def build(self, cls) -> BaseComponent:
+        """ Create a component of ``cls`` for this state. """
+        return cls(self.game, grid=self.grid)
+
+    def add(self, component: BaseComponent):
+        self.children.add(component)
+        self.bus.subscribe_component(component)
+        if BATCH_MOVERS and isinstance(component, BatchMoverMixin) and MoverBatch.available():
+            if self.movers is None:
+                self.movers = MoverBatch()
+            component.attach(self.movers)
 
     def _del_components(self):
         for c in self.children:
             self.children.remove(c)
+            if c is not self.grid:
+                c.kill()
 
     def reset_components(self):
         self._del_components()
         self.children = SpriteGroup()
+        self.movers = None
+        self.bus.clear()
         self._init_components()
 
     def start(self):
@@ -35,11 +57,17 @@ class State:
         pass
     
     def event(self, event):
-        for child in self.children:
-            child.event(event)
+        self.bus.publish(event)
 
     def update(self):
-        self.children.update()
+        if self.movers:
+            self.movers.step(self.grid.width, self.grid.height)
+        if PROFILER.active and PROFILER.components:
+            for child in self.children:
+                with PROFILER.component_span(child, 'update'):
+                    child.update()
+        else:
+            self.children.update()
 
     def draw(self, screen):
         self._draw(self, screen)
@@ -48,4 +76,9 @@ class State:
         if hasattr(obj, 'on_draw'):
             obj.on_draw(screen)
 
-        obj.children.draw(screen)
+        if PROFILER.active and PROFILER.components:
+            for child in obj.children:
+                with PROFILER.component_span(child, 'draw'):
+                    obj.children.draw_sprite(child, screen)
+        else:
+            obj.children.draw(screen)
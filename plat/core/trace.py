@@ -0,0 +1,98 @@
+import logging
+
+from array import array
+from itertools import count
+
+from plat.config import TRACE_CAPACITY
+
+
+class PhysicsTrace:
+    """
+    Records per-step physics values into a preallocated ring buffer.
+
+    Call sites check ``TRACE.enabled`` before calling ``record`` so a disabled
+    trace costs one attribute lookup. Once full, the oldest records are
+    overwritten. ``dump`` writes the records in order as CSV.
+
+    Entities are told apart by a ``trace_id`` stored on them the first time
+    they are recorded, unlike ``id()`` it is never reused by a later object.
+    """
+    logger = logging.getLogger('PhysicsTrace')
+
+    ACC_BEFORE_INPUT = 0
+    ACC_AFTER_FRICTION = 1
+    ACC_BEFORE_JUMP = 2
+    STORED_JUMP_FORCE = 3
+    ACC_AFTER_JUMP = 4
+    COLLISION = 5
+
+    KINDS = {
+        ACC_BEFORE_INPUT: 'acc_before_input',
+        ACC_AFTER_FRICTION: 'acc_after_friction',
+        ACC_BEFORE_JUMP: 'acc_before_jump',
+        STORED_JUMP_FORCE: 'stored_jump_force',
+        ACC_AFTER_JUMP: 'acc_after_jump',
+        COLLISION: 'collision',
+    }
+
+    # frame, entity, kind, x, y
+    FIELDS = 5
+
+    def __init__(self, capacity=TRACE_CAPACITY):
+        self.capacity = capacity
+        self.enabled = False
+        self.frame = 0
+        self._buffer = array('d', bytes(8 * self.FIELDS * capacity))
+        self._next = 0
+        self._ids = count()
+        self._labels = {}
+
+    def __len__(self):
+        return min(self._next, self.capacity)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._next = 0
+        self._labels = {}
+
+    def _entity(self, entity) -> int:
+        eid = getattr(entity, 'trace_id', None)
+        if eid is None:
+            eid = entity.trace_id = next(self._ids)
+        if eid not in self._labels:
+            self._labels[eid] = entity.__class__.__name__
+        return eid
+
+    def record(self, entity, kind, x, y=0.0):
+        ix = (self._next % self.capacity) * self.FIELDS
+        buf = self._buffer
+        buf[ix] = self.frame
+        buf[ix + 1] = self._entity(entity)
+        buf[ix + 2] = kind
+        buf[ix + 3] = x
+        buf[ix + 4] = y
+        self._next += 1
+
+    def records(self):
+        """ Yields ``(frame, entity, kind, x, y)`` from oldest to newest. """
+        first = max(self._next - self.capacity, 0)
+        for n in range(first, self._next):
+            ix = (n % self.capacity) * self.FIELDS
+            frame, eid, kind, x, y = self._buffer[ix:ix + self.FIELDS]
+            eid = int(eid)
+            yield int(frame), f'{self._labels[eid]}#{eid}', self.KINDS[int(kind)], x, y
+
+    def dump(self, path):
+        with open(path, 'w') as fh:
+            fh.write('frame,entity,kind,x,y\n')
+            for record in self.records():
+                fh.write(','.join(str(v) for v in record) + '\n')
+        self.logger.info(f'Dumped {len(self)} trace records to {path}')
+
+
+TRACE = PhysicsTrace()
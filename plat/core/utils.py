@@ -4,6 +4,7 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 GREY = (211, 211, 211)
+BROWN = (150, 90, 40)
 
 
 COLORS = [
@@ -13,6 +14,7 @@ COLORS = [
 	GREEN,
 	BLUE,
 	GREY,
+	BROWN,
 ]
 
 
@@ -0,0 +1,304 @@
+import os
+import pygame
+import logging
+
+from typing import List
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from plat.core.components import SpriteManager, AnimationManager, CachedFont, load_font
+from plat.core.atlas import AtlasCache, default_cache_dir
+from plat.core.inputs import NullJoystick, InputRecorder, InputReplay
+from plat.core.camera import Camera
+from plat.core.trace import TRACE
+from plat.core.profiler import PROFILER, STARTUP
+from plat.components.helper import ProfilerOverlay
+from plat.core.states import State
+from plat.core.events import block_unused
+
+from plat.core.utils import *
+from plat.config import FPS, PHYSICS_RATE, MAX_PHYSICS_STEPS, RENDER_INTERPOLATION, PROFILE_OVERLAY, SPRITE_CACHE_SIZE, TEXT_CACHE_SIZE, FONT, ATLAS_CACHE, LAZY_SPRITES, PRELOAD_SPRITES, ANIMATIONS, DIRTY_RECTS, BLOCK_UNUSED_EVENTS, BACKGROUND_WORKERS
+
+
+CurrentState = namedtuple("CurrentState", "name obj")
+
+
+class Game:
+    """ 
+    Encapsulates basic game logic. 
+
+    Has the grid of the level, screen and clock. Also the list of root components.
+    """
+    logger = logging.getLogger('Game')
+
+    GAME = "game"
+    PAUSE = "pause"
+    EDIT = "edit"
+
+    # Events handled by the game itself, on top of the ones the states subscribe to
+    EVENTS = {pygame.QUIT, pygame.JOYBUTTONDOWN}
+
+    def __init__(self, width, height, sprites_dir, sprite_maps, headless=False):
+        self.height = height
+        self.width = width
+        self.headless = headless
+        if headless:
+            self._use_dummy_display()
+        self.screen = pygame.display.set_mode((width, height))
+        STARTUP.mark('display')
+        self.font_size = 20
+        self.font = CachedFont(load_font(FONT, self.font_size, default_cache_dir(sprites_dir)), TEXT_CACHE_SIZE)
+        STARTUP.mark('font')
+        self.components: List[Component] = []
+        self.clock = pygame.time.Clock()
+        self.camera = Camera(width, height)
+        self.player = None
+        self.joystick = None
+        self.input = None
+        self.states = {}
+        self._executor = None
+        self._process_executor = None
+        self.joy()
+
+        atlas_cache = AtlasCache(default_cache_dir(sprites_dir)) if ATLAS_CACHE else None
+        self.sprites = SpriteManager(self, sprite_maps, sprites_dir, cache_size=SPRITE_CACHE_SIZE, atlas_cache=atlas_cache)
+        self.sprites.load(lazy=LAZY_SPRITES)
+        STARTUP.mark('sprites')
+
+        self.animate = AnimationManager(ANIMATIONS, self.sprites)
+
+        self.running = False
+        self.dt = None
+        self.frame = 0
+        self.alpha = 0
+        self.interpolate = RENDER_INTERPOLATION
+        self._cur_state = None
+
+        self.overlay = ProfilerOverlay(self) if PROFILE_OVERLAY else None
+
+        self.dirty_rects = DIRTY_RECTS
+        self._dirty: List[pygame.Rect] = []
+        self._full_refresh = True
+        STARTUP.mark('game')
+
+    @property
+    def state(self) -> State:
+        return CurrentState(self._cur_state, self.states[self._cur_state])
+
+    @state.setter
+    def state(self, value):
+        if value not in self.states.keys():
+            raise ValueError(f'Unkown state {value}')
+        self.logger.debug(f"changing from {self._cur_state} to {value}")
+        if self._cur_state is not None:
+            self.state.obj.end()
+        self._build_state(value)
+        self._cur_state = value
+        self.state.obj.start()
+        self.refresh()
+
+    def _build_state(self, name):
+        """ States can be given as factories, they are built on first entry. """
+        state = self.states[name]
+        if isinstance(state, State):
+            return
+        self.states[name] = state()
+        self.logger.debug(f'Built state {name}')
+        if self.running and BLOCK_UNUSED_EVENTS:
+            block_unused(self.event_types())
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """ Worker threads shared by everything running off the frame loop,
+        started on first use and stopped by ``shutdown``. """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix='Game')
+        return self._executor
+
+    @property
+    def process_executor(self) -> ProcessPoolExecutor:
+        """ Worker processes for CPU bound jobs taking and returning picklable
+        data (no surfaces), started on first use and stopped by ``shutdown``. """
+        if self._process_executor is None:
+            self._process_executor = ProcessPoolExecutor(max_workers=BACKGROUND_WORKERS)
+        return self._process_executor
+
+    def shutdown(self):
+        """ Stop the background workers, dropping the jobs not started yet. """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=False, cancel_futures=True)
+            self._process_executor = None
+
+    def do_update(self):
+        self.state.obj.update()
+
+    def do_event(self):
+        for event in self._poll():
+            self.logger.debug('Handling %s', event)
+            if event.type == pygame.QUIT:
+                self.running = False
+            if event.type == pygame.JOYBUTTONDOWN:
+                if event.button == JOYBTN['Y']:
+                    if self.state.name == self.EDIT:
+                        if isinstance(self.states.get(self.GAME), State):
+                            self.states.get(self.GAME).reset_components()
+                        self.state = self.GAME
+                    elif self.state.name == self.GAME:
+                        self.state = self.EDIT
+                if event.button == JOYBTN['B']:
+                    breakpoint()
+                if event.button == JOYBTN['START']:
+                    if self.state.name == self.PAUSE:
+                        self.state = self.GAME
+                    elif self.state.name == self.GAME:
+                        self.state = self.PAUSE
+
+            self.state.obj.event(event)
+
+    def event_types(self) -> set:
+        types = set(self.EVENTS)
+        for state in self.states.values():
+            if isinstance(state, State):
+                types |= state.bus.types()
+        return types
+
+    def _poll(self):
+        """ Pending events, passed through the input recorder or replay if there is one. """
+        while event := pygame.event.poll():
+            if event.type == pygame.JOYAXISMOTION:
+                continue
+            if self.input is not None:
+                event = self.input.event(self.frame, event)
+                if event is None:
+                    continue
+            yield event
+        if self.input is not None:
+            yield from self.input.events(self.frame)
+
+    def do_draw(self):
+        if self.player is not None and self.camera.follow(self.player.draw_rect(), self.state.obj.grid.rect):
+            self.refresh()
+        self.state.obj.draw(self.screen)
+        if self.overlay is not None:
+            self.overlay.update()
+            self.overlay.draw(self.screen)
+        if not self.dirty_rects or self._full_refresh:
+            pygame.display.update()
+            self._full_refresh = False
+        elif self._dirty:
+            pygame.display.update(self._dirty)
+        self._dirty = []
+
+    def mark_dirty(self, rect: pygame.Rect):
+        """ Report a screen region that changed in the current frame. """
+        # Nothing to track when the next draw pushes the whole screen anyway,
+        # this also keeps loops that never draw (draw_every=0) from piling rects up
+        if not self.dirty_rects or self._full_refresh:
+            return
+        self._dirty.append(rect)
+
+    def refresh(self):
+        """ Push the whole screen on the next draw. """
+        self._full_refresh = True
+        self._dirty = []
+
+    def joy(self):
+        if isinstance(self.input, InputReplay):
+            self.joystick = self.input
+            return
+
+        joystick_count = pygame.joystick.get_count()
+        if not joystick_count:
+            joystick = NullJoystick()
+        else:
+            joystick = pygame.joystick.Joystick(1)
+            joystick.init()
+
+        if self.input is not None:
+            self.input.joystick = joystick
+            joystick = self.input
+        self.joystick = joystick
+
+    def record_input(self):
+        """ Record joystick input from now on, save it with ``self.input.save(path)``. """
+        self.input = InputRecorder()
+        self.joy()
+
+    def replay_input(self, path):
+        """ Play the input recorded (or scripted) in ``path`` instead of reading the joystick. """
+        self.input = InputReplay.from_file(path)
+        self.joy()
+
+    def _use_dummy_display(self):
+        """ Move the display to SDL's dummy driver so no window is opened. """
+        pygame.display.quit()
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        pygame.display.init()
+
+    def run(self, start_state: str, states: list = None, frames: int = None, time_scale: float = 1, draw_every: int = 1):
+        """
+        Run the game loop.
+
+        Physics advance in fixed steps of ``1 / PHYSICS_RATE`` seconds, as many
+        as needed to catch up with the rendered frame (up to MAX_PHYSICS_STEPS).
+        Components are drawn interpolated between their last two physics steps.
+
+        :param frames: stop after this many physics steps (run until quit when None).
+        :param time_scale: speed relative to real time, 20 runs 20 times faster.
+            0 or None runs one physics step per loop, as fast as the CPU allows.
+        :param draw_every: draw one out of every ``draw_every`` loops, 0 never draws.
+
+        ``states`` maps names to states, or to callables building them when first entered.
+        The background workers are stopped when the loop ends.
+        """
+        self.logger.info('Starting')
+        self.states = states
+        self.state = start_state
+        STARTUP.mark(f'state {start_state}')
+        if PRELOAD_SPRITES:
+            self.sprites.prefetch()
+        if BLOCK_UNUSED_EVENTS:
+            block_unused(self.event_types())
+        self.running = True
+        self.frame = 0
+        self.joy()
+        step = 1 / PHYSICS_RATE
+        accumulator = 0
+        loops = 0
+        try:
+            while self.running:
+                if time_scale:
+                    elapsed = self.clock.tick(FPS * time_scale) / 1000 * time_scale
+                    accumulator += min(elapsed, step * MAX_PHYSICS_STEPS)
+                else:
+                    accumulator += step
+                PROFILER.begin_frame(loops)
+                if self.sprites.pending:
+                    self.sprites.poll()
+                with PROFILER.span('event'):
+                    self.do_event()
+                self.dt = step
+                while accumulator >= step and self.running:
+                    TRACE.frame = self.frame
+                    if self.input is not None:
+                        self.input.step(self.frame)
+                    with PROFILER.span('update'):
+                        self.do_update()
+                    accumulator -= step
+                    self.frame += 1
+                    if frames is not None and self.frame >= frames:
+                        self.running = False
+                self.alpha = accumulator / step if self.interpolate else 0
+                if draw_every and loops % draw_every == 0:
+                    with PROFILER.span('draw'):
+                        self.do_draw()
+                PROFILER.end_frame()
+                if not STARTUP.done:
+                    STARTUP.finish()
+                loops += 1
+        finally:
+            self.shutdown()
+        return self.frame
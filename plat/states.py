@@ -1,6 +1,6 @@
 from plat.core.states import State
 from plat.components.player import ArrowComponent, Player
-from plat.components.grid import GridLineComponent, GridSizeComponent
+from plat.components.grid import GridLineComponent, GridSizeComponent, LevelAnalysisComponent
 from plat.components.helper import PlayerStats
 from plat.components.pause import PauseTitle
 
@@ -10,6 +10,16 @@ class GameState(State):
         PlayerStats
     ]
 
+    def __init__(self, game, grid, player_params: dict = None):
+        """ ``player_params`` override Player attributes (``JUMP_FORCE``, ``GRAVITY``...) for the players of this state. """
+        self.player_params = player_params or {}
+        super().__init__(game, grid)
+
+    def build(self, cls):
+        if issubclass(cls, Player):
+            return cls(self.game, grid=self.grid, params=self.player_params)
+        return super().build(cls)
+
     def start(self):
         self.game.player = [x for x in self.children][1]
 
@@ -19,11 +29,17 @@ class EditState(State):
         GridSizeComponent,
         ArrowComponent,
         PlayerStats,
+        LevelAnalysisComponent,
     ]
 
     def start(self):
         self.game.player = [x for x in self.children][3]
 
+    def end(self):
+        for child in self.children:
+            if isinstance(child, LevelAnalysisComponent):
+                child.stop()
+
 
 class PauseState(State):
     COMPONENTS = [
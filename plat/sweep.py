@@ -0,0 +1,218 @@
+"""
+Headless physics parameter sweeps.
+
+Runs the game state of a level with scripted input once per combination of
+player parameters, spread over a process pool, and reports how the player
+moved (jump apex, time to land, horizontal travel) as CSV or JSON::
+
+    python -m plat.sweep --level level.plat --input jump.txt \
+        --param jump_force=15,18,21 --param gravity=0.5,0.76,1 --output sweep.csv
+
+Parameters are ``Player`` attributes (``JUMP_FORCE``, ``GRAVITY``,
+``FRICTION``, ``MIN_JUMP``...), case insensitive, set on the player of each
+run. Only the game state runs, the Y, B and START presses of the input are
+ignored.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import pathlib
+import logging
+import argparse
+import itertools
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+
+from plat.core.inputs import InputLog, InputReplay
+from plat.core.utils import JOYBTN
+from plat.config import SPRITE_MAPS, GRID_ROWS, GRID_COLS
+
+
+logger = logging.getLogger('sweep')
+
+# Metrics reported for each run, after the parameters
+METRICS = [
+    "time_to_land", "jumps", "max_apex_px", "mean_apex_px", "mean_airtime",
+    "travel_px", "distance_px", "final_x", "final_y", "seconds",
+]
+
+# Buttons the game handles itself, switching to states a sweep doesn't run (Y,
+# START) or breaking into the debugger (B)
+IGNORED_BUTTONS = {JOYBTN['Y'], JOYBTN['B'], JOYBTN['START']}
+
+
+class Flight:
+    """ Follows the player step by step and measures its jumps. """
+    def __init__(self, player, grid):
+        self.player = player
+        self.grid = grid
+        self.steps = 0
+        self.time_to_land = None
+        self.apexes = []
+        self.airtimes = []
+        self.start_x = self.last_x = player.rect.midbottom[0]
+        self.distance = 0
+        self._takeoff = None
+        self._top = None
+        self._airborne_since = 0
+
+    def grounded(self) -> bool:
+        player = self.player
+        return player.rect.bottom >= self.grid.height or any(c.normal.y < 0 for c in player.contacts)
+
+    def step(self):
+        x, bottom = self.player.rect.midbottom
+        self.distance += abs(x - self.last_x)
+        self.last_x = x
+        if self.grounded():
+            if self._airborne_since is not None:
+                if self.time_to_land is None:
+                    self.time_to_land = self.steps
+                elif self._takeoff is not None:
+                    self.apexes.append(self._takeoff - self._top)
+                    self.airtimes.append(self.steps - self._airborne_since)
+                self._airborne_since = None
+            self._takeoff = self._top = bottom
+        else:
+            if self._airborne_since is None:
+                self._airborne_since = self.steps
+            self._top = min(self._top, bottom) if self._top is not None else bottom
+        self.steps += 1
+
+    def metrics(self) -> dict:
+        x, y = self.player.rect.midbottom
+        return {
+            "time_to_land": self.time_to_land,
+            "jumps": len(self.apexes),
+            "max_apex_px": max(self.apexes, default=0),
+            "mean_apex_px": sum(self.apexes) / len(self.apexes) if self.apexes else 0,
+            "mean_airtime": sum(self.airtimes) / len(self.airtimes) if self.airtimes else 0,
+            "travel_px": x - self.start_x,
+            "distance_px": self.distance,
+            "final_x": x,
+            "final_y": y,
+        }
+
+
+def _init_worker():
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    pygame.init()
+
+
+def load_script(path, warn=False) -> InputReplay:
+    """ Input to replay in a sweep, without the presses of IGNORED_BUTTONS. """
+    replay = InputReplay.from_file(path)
+    log = replay.log
+    events = [e for e in log.events if e[1] == InputLog.QUIT or e[2] not in IGNORED_BUTTONS]
+    if warn and len(events) != len(log.events):
+        logger.warning(f'Ignoring {len(log.events) - len(events)} Y/B/START button events of {path}, only the game state runs')
+    log.events = events
+    return replay
+
+
+def simulate(params: dict, level=None, script=None, frames=600) -> dict:
+    """ Run the game state for ``frames`` physics steps with the Player attributes in ``params``. """
+    from plat.game import Game
+    from plat.core.grid import Grid
+    from plat.states import GameState
+
+    started = time.perf_counter()
+
+    class SweepGame(Game):
+        flight = None
+
+        def do_update(self):
+            if self.flight is None:
+                self.flight = Flight(self.player, grid)
+            super().do_update()
+            self.flight.step()
+
+    game = SweepGame(800, 800, pathlib.Path(__file__).parent.absolute() / 'sprites', SPRITE_MAPS, headless=True)
+    if script:
+        game.input = load_script(script)
+        game.joy()
+    grid = Grid(game, rows=GRID_ROWS, cols=GRID_COLS)
+    if level:
+        grid.load(level)
+    state = GameState(game, grid, player_params=params)
+    game.run(start_state=Game.GAME, states={Game.GAME: state}, frames=frames, time_scale=0, draw_every=0)
+    return {**params, **game.flight.metrics(), "seconds": time.perf_counter() - started}
+
+
+def combinations(grid: dict) -> list:
+    """ Every combination of the values in ``{name: [values]}``. """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def sweep(grid: dict, level=None, script=None, frames=600, workers=None) -> list:
+    runs = combinations(grid)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker) as pool:
+        futures = [pool.submit(simulate, params, level, script, frames) for params in runs]
+        return [future.result() for future in futures]
+
+
+def positive_int(text) -> int:
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f'expected a number greater than 0, got {value}')
+    return value
+
+
+def parse_param(text):
+    """ ``name=v1,v2,...`` to ``(NAME, [v1, v2, ...])``. """
+    from plat.components.player import Player
+    try:
+        name, values = text.split('=', 1)
+        values = [float(v) for v in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected name=value,value,... got {text!r}')
+    name = name.strip().upper()
+    if not hasattr(Player, name):
+        raise argparse.ArgumentTypeError(f'Player has no attribute {name}')
+    return name, values
+
+
+def write(results, fh, format_):
+    if format_ == 'json':
+        json.dump(results, fh, indent=2)
+        fh.write('\n')
+        return
+    fields = [k for k in results[0] if k not in METRICS] + METRICS if results else METRICS
+    writer = csv.DictWriter(fh, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='plat.sweep', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--level', default=None, help='level file to run on (an empty grid by default)')
+    parser.add_argument('--input', default=None, help='input recording (--record) or text script to replay')
+    parser.add_argument('--param', type=parse_param, action='append', default=[], metavar='NAME=V1,V2', help='values of a Player attribute, repeatable')
+    parser.add_argument('--frames', type=positive_int, default=600, help='physics steps per run')
+    parser.add_argument('--workers', type=positive_int, default=None, help='processes (all cores by default)')
+    parser.add_argument('--output', default=None, help='write results to this file instead of stdout')
+    parser.add_argument('--format', choices=['csv', 'json'], default=None, help='output format (by --output extension, csv by default)')
+    args = parser.parse_args(argv)
+
+    if args.input:
+        load_script(args.input, warn=True)
+    format_ = args.format or ('json' if args.output and args.output.endswith('.json') else 'csv')
+    started = time.perf_counter()
+    results = sweep(dict(args.param), args.level, args.input, args.frames, args.workers)
+    if args.output:
+        with open(args.output, 'w', newline='') as fh:
+            write(results, fh, format_)
+    else:
+        write(results, sys.stdout, format_)
+    print(f'{len(results)} runs in {time.perf_counter() - started:.2f}s', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
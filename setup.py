@@ -14,6 +14,7 @@ setuptools.setup(
     url="https://github.com/manuelpepe/plat",
     packages=setuptools.find_packages(),
     install_requires=["pygame"],
+    extras_require={"batch": ["numpy"]},
     entry_points = {
     	"console_scripts": [
         	"plat = plat:main",
@@ -0,0 +1,43 @@
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pathlib
+
+import pygame
+import pytest
+
+from plat.config import SPRITE_MAPS, GRID_ROWS, GRID_COLS
+
+
+SPRITES_DIR = pathlib.Path(__file__).parent.parent.absolute() / 'plat' / 'sprites'
+
+
+@pytest.fixture(scope='session', autouse=True)
+def pygame_init():
+    pygame.init()
+    yield
+    pygame.quit()
+
+
+@pytest.fixture
+def make_game():
+    """ Builds headless games, of a ``Game`` subclass if given. """
+    from plat.game import Game
+
+    def make(cls=Game):
+        return cls(800, 800, SPRITES_DIR, SPRITE_MAPS, headless=True)
+    return make
+
+
+@pytest.fixture
+def game(make_game):
+    return make_game()
+
+
+@pytest.fixture
+def grid(game):
+    from plat.core.grid import Grid
+    return Grid(game, rows=GRID_ROWS, cols=GRID_COLS)
+
@@ -0,0 +1,196 @@
+from threading import Event
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pygame
+
+from plat.core.analysis import LevelAnalyzer, analyze, level_tiles
+from plat.core.grid import Grid, SolidBlock, LiquidBlock
+from plat.components.grid import LevelAnalysisComponent
+from plat.states import EditState, GameState
+from plat.components.player import Player
+from plat.components import grid as grid_components
+from plat.game import Game
+from plat.config import PLAYER_START
+
+from test_level import random_tiles
+
+
+def test_snapshot_leaves_undecoded_chunks_in_the_level_file(game, tmp_path):
+    rows, cols = 40, 50
+    path = str(tmp_path / 'level.plat')
+    source = Grid(game, rows=rows, cols=cols)
+    source.tiles = random_tiles(rows, cols)
+    source.save(path)
+
+    grid = Grid(game)
+    grid.load(path)
+    grid.place(0, 0, LiquidBlock)
+    snapshot = grid.snapshot()
+    assert list(snapshot.chunks) == [(0, 0)] and grid.level is not None
+    assert snapshot.level == path
+
+    tiles = bytearray(source.tiles.tobytes())
+    tiles[0] = grid.tile_id(LiquidBlock)
+    assert level_tiles(snapshot) == tiles
+    assert analyze(snapshot).counts == {'empty': tiles.count(0), 'solid': tiles.count(1), 'liquid': tiles.count(2), 'crumble': 0}
+
+
+def test_snapshot_only_copies_changed_chunks(game):
+    grid = Grid(game, rows=40, cols=40)
+    first = grid.snapshot()
+    grid.place(20 * 40, 0, SolidBlock)
+    second = grid.snapshot()
+    changed = [key for key in second.chunks if second.chunks[key] is not first.chunks[key]]
+    assert changed == [(0, 1)]
+    assert second.version > first.version
+    assert level_tiles(second)[20] == grid.tile_id(SolidBlock)
+
+
+def wait_jobs(analyzer):
+    wait([job for _, job in analyzer.jobs])
+
+
+def test_analysis_runs_on_the_executor_it_is_given(game, grid):
+    analyzer = LevelAnalyzer(delay_ms=0)
+    analyzer.poll(grid, (40, 40), 0, game.executor)
+    wait_jobs(analyzer)
+    result = analyzer.poll(grid, (40, 40), 0, game.executor)
+    assert result.version == grid.version and result.reachable_count
+
+    executor = game.executor
+    game.shutdown()
+    assert executor._shutdown and game.executor is not executor
+
+
+def test_jobs_cancelled_by_a_shutdown_are_submitted_again(game, grid):
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = Event()
+    executor.submit(release.wait)
+    analyzer = LevelAnalyzer(delay_ms=0)
+    try:
+        analyzer.poll(grid, (40, 40), 0, executor)
+        executor.shutdown(wait=False, cancel_futures=True)
+    finally:
+        release.set()
+    assert analyzer.poll(grid, (40, 40), 1, game.executor) is None
+    analyzer.poll(grid, (40, 40), 2, game.executor)
+    wait_jobs(analyzer)
+    assert analyzer.poll(grid, (40, 40), 3, game.executor).version == grid.version
+
+
+def test_analysis_runs_again_after_the_game_restarts(make_game):
+    components = []
+
+    class WaitGame(Game):
+        def do_update(self):
+            super().do_update()
+            for component in components:
+                wait_jobs(component.analyzer)
+
+    game = make_game(WaitGame)
+    grid = Grid(game)
+    state = EditState(game, grid)
+    component = next(c for c in state.children if isinstance(c, LevelAnalysisComponent))
+    component.analyzer.delay_ms = 0
+    components.append(component)
+
+    game.run(start_state=Game.EDIT, states={Game.EDIT: state}, frames=3, time_scale=0, draw_every=0)
+    assert component.result.version == grid.version
+    grid.place(0, 0, SolidBlock)
+    game.run(start_state=Game.EDIT, states={Game.EDIT: state}, frames=3, time_scale=0, draw_every=0)
+    assert component.result.version == grid.version and component.result.counts['solid'] == 1
+
+
+def test_analysis_runs_again_when_the_player_params_change(game, grid):
+    analyzer = LevelAnalyzer(delay_ms=0)
+    low = {'jump_force': 10, 'gravity': 0.76, 'friction': -0.09}
+    analyzer.poll(grid, (40, 40), 0, game.executor, low)
+    wait_jobs(analyzer)
+    first = analyzer.poll(grid, (40, 40), 1, game.executor, low)
+    analyzer.poll(grid, (40, 40), 2, game.executor, dict(low, jump_force=30))
+    wait_jobs(analyzer)
+    second = analyzer.poll(grid, (40, 40), 3, game.executor, dict(low, jump_force=30))
+    assert first.version == second.version == grid.version
+    assert second.jump_tiles > first.jump_tiles
+
+
+def test_analysis_uses_the_game_mode_player_params(game, grid):
+    component = LevelAnalysisComponent(game, grid=grid)
+    assert component.player_params() == {'jump_force': Player.JUMP_FORCE, 'gravity': Player.GRAVITY, 'friction': Player.FRICTION}
+    game.states = {Game.GAME: GameState(game, grid, player_params={'JUMP_FORCE': 40, 'GRAVITY': 0.5})}
+    assert component.player_params() == {'jump_force': 40, 'gravity': 0.5, 'friction': Player.FRICTION}
+
+
+def test_analysis_can_run_in_processes(game, grid, monkeypatch):
+    monkeypatch.setattr(grid_components, 'ANALYSIS_PROCESSES', True)
+    component = LevelAnalysisComponent(game, grid=grid)
+    component.analyzer.delay_ms = 0
+    try:
+        component.on_update()
+        assert game._process_executor is not None and game._executor is None
+        wait_jobs(component.analyzer)
+        component.on_update()
+    finally:
+        game.shutdown()
+    expected = analyze(grid.snapshot(PLAYER_START), **component.player_params())
+    assert component.result._replace(seconds=0) == expected._replace(seconds=0)
+    assert game._process_executor is None
+
+
+def test_leaving_the_editor_cancels_the_analysis(game, grid):
+    state = EditState(game, grid)
+    component = next(c for c in state.children if isinstance(c, LevelAnalysisComponent))
+    component.analyzer.delay_ms = 0
+    component.analyzer.poll(grid, (40, 40), 0, game.executor)
+    state.end()
+    assert not component.analyzer.jobs
+
+
+class CountingScreen(pygame.Surface):
+    blits = 0
+
+    def blit(self, *args, **kwargs):
+        self.blits += 1
+        return super().blit(*args, **kwargs)
+
+
+def shading(game, grid):
+    component = LevelAnalysisComponent(game, grid=grid)
+    component.result = analyze(grid.snapshot(PLAYER_START))
+    game.dirty_rects, game._full_refresh = True, False
+    return component
+
+
+def test_shading_is_one_blit_per_chunk(game, grid):
+    component = shading(game, grid)
+    screen = CountingScreen(game.screen.get_size())
+    grid.draw(screen)
+    screen.blits = 0
+    component.on_draw(screen)
+    assert 0 < screen.blits <= len(grid.active)
+    reachable = component.result.reachable
+    unreachable = next(ix for ix in range(len(reachable)) if not reachable[ix])
+    r, c = divmod(unreachable, grid.cols)
+    reached = next(ix for ix in range(len(reachable)) if reachable[ix] and not grid.tiles[ix])
+    rr, rc = divmod(reached, grid.cols)
+    shaded, clear = screen.get_at((c * 40 + 5, r * 40 + 5)), screen.get_at((rc * 40 + 5, rr * 40 + 5))
+    assert sum(shaded[:3]) < sum(clear[:3])
+
+
+def test_only_chunks_whose_shading_changed_are_marked_dirty(game, grid):
+    component = shading(game, grid)
+    grid.draw(game.screen)
+    component.on_draw(game.screen)
+    assert game._dirty
+    game._dirty = []
+    component.on_draw(game.screen)
+    assert game._dirty == []
+
+    # A solid tile over an unreachable cell only changes the shading of its chunk
+    ix = component.result.reachable.index(0)
+    chunk = grid._chunk_of(*divmod(ix, grid.cols))
+    assert len(grid.active) > 1
+    grid.place(ix % grid.cols * 40, ix // grid.cols * 40, SolidBlock)
+    game._dirty = []
+    component.on_draw(game.screen)
+    assert game._dirty == [game.camera.apply(chunk.rect)]
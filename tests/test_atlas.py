@@ -0,0 +1,88 @@
+import os
+import shutil
+
+import pygame
+import pytest
+
+from plat.core.atlas import AtlasCache, compile_all
+from plat.core.components import SpriteManager, SpriteXmlParser
+from plat.config import SPRITE_MAPS
+
+from conftest import SPRITES_DIR
+
+
+NAME = 'characters.blue'
+
+
+@pytest.fixture
+def sprites_dir(tmp_path):
+    """ A copy of the sprites, so their mtimes can be changed. """
+    path = tmp_path / 'sprites'
+    shutil.copytree(SPRITES_DIR / 'characters', path / 'characters')
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AtlasCache(tmp_path / 'cache')
+
+
+def xml_path(sprites_dir):
+    return dict(SpriteManager.atlases(SPRITE_MAPS, sprites_dir))[NAME]
+
+
+def manager(game, sprites_dir, cache):
+    return SpriteManager(game, SPRITE_MAPS, sprites_dir, atlas_cache=cache)
+
+
+def test_cold_load_compiles_the_atlas(game, sprites_dir, cache):
+    assert cache.load(NAME, xml_path(sprites_dir)) is None
+    sprites = manager(game, sprites_dir, cache)
+    sprites.load()
+    assert sprites.load_times[NAME][1] == 'source'
+    assert cache.path_for(NAME).exists()
+
+
+def test_warm_load_reads_the_compiled_atlas(game, sprites_dir, cache):
+    compiled = compile_all(sprites_dir, SPRITE_MAPS, cache.cache_dir)
+    assert compiled == {NAME: cache.path_for(NAME)}
+    sprites = manager(game, sprites_dir, cache)
+    sprites.load()
+    assert sprites.load_times[NAME][1] == 'compiled'
+
+    _, rows = SpriteXmlParser.parse(xml_path(sprites_dir))
+    assert {name: (data['x'], data['y'], data['width'], data['height']) for name, data in sprites.sprites[NAME].items()} \
+        == {row['name']: tuple(int(row[k]) for k in ('x', 'y', 'width', 'height')) for row in rows}
+
+
+@pytest.mark.parametrize('changed', ['blue.xml', 'blue.png'])
+def test_changed_sources_miss_the_cache(game, sprites_dir, cache, changed):
+    compile_all(sprites_dir, SPRITE_MAPS, cache.cache_dir)
+    path = sprites_dir / 'characters' / 'blue' / changed
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache.load(NAME, xml_path(sprites_dir)) is None
+
+    # The next load recompiles it
+    sprites = manager(game, sprites_dir, cache)
+    sprites.load()
+    assert sprites.load_times[NAME][1] == 'source'
+    assert cache.load(NAME, xml_path(sprites_dir)) is not None
+
+
+def test_compiled_pixels_match_the_source_sheet(sprites_dir, cache):
+    compile_all(sprites_dir, SPRITE_MAPS, cache.cache_dir)
+    _, image = cache.load(NAME, xml_path(sprites_dir))
+    source = pygame.image.load(str(sprites_dir / 'characters' / 'blue' / 'blue.png'))
+    assert image.get_size() == source.get_size()
+    assert pygame.image.tostring(image, 'RGB') == pygame.image.tostring(source, 'RGB')
+
+
+def test_frames_are_the_same_from_either_load(game, sprites_dir, cache):
+    source = manager(game, sprites_dir, None)
+    compile_all(sprites_dir, SPRITE_MAPS, cache.cache_dir)
+    compiled = manager(game, sprites_dir, cache)
+    for name in ('blue_01.png', 'blue_04.png'):
+        a, b = source.get(NAME, name), compiled.get(NAME, name)
+        assert pygame.image.tostring(a, 'RGB') == pygame.image.tostring(b, 'RGB')
+    assert compiled.load_times[NAME][1] == 'compiled'
@@ -0,0 +1,33 @@
+import pytest
+
+from plat import bench
+
+
+def test_unknown_scenarios_are_rejected(capsys):
+    with pytest.raises(SystemExit) as exit:
+        bench.main(['empty_grid', 'nope'])
+    assert exit.value.code == 2
+    assert 'unknown scenario nope' in capsys.readouterr().err
+
+
+def test_run_one_scenario(capsys):
+    assert bench.main(['--run-one', 'solid_grid', '--frames', '20']) == 0
+    result = capsys.readouterr().out
+    assert '"scenario": "solid_grid"' in result and '"frames": 20' in result
+
+
+def test_regressions_over_the_tolerance():
+    baseline = {'a': {'frame_p50_ms': 1.0, 'peak_rss_kb': 100}}
+    results = {'a': {'frame_p50_ms': 1.05, 'peak_rss_kb': 120}}
+    assert bench.compare(results, baseline, 0.1) == [('a', 'peak_rss_kb', 100, 120)]
+
+
+def test_solid_grid_leaves_the_player_room(game, grid):
+    from plat.config import PLAYER_START
+    from plat.core.grid import SolidBlock
+    from plat.components.player import Player
+    bench.SolidGrid().setup(game, grid)
+    player = Player(game, grid=grid)
+    assert player.rect.topleft == PLAYER_START
+    assert not [t for t in grid.tiles_in_rect(player.rect) if issubclass(t.kind, SolidBlock)]
+    assert list(grid.tiles).count(grid.tile_id(SolidBlock)) == grid.rows * grid.cols - 1
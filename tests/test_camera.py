@@ -0,0 +1,41 @@
+import pygame
+
+from plat.core.camera import Camera
+from plat.core.grid import Grid, SolidBlock
+
+
+def test_camera_follows_the_target_inside_the_level():
+    camera = Camera(800, 600)
+    level = pygame.Rect(0, 0, 4000, 600)
+    assert camera.follow(pygame.Rect(2000, 300, 10, 10), level)
+    assert camera.rect.topleft == (1605, 0)
+    camera.follow(pygame.Rect(3990, 300, 10, 10), level)
+    assert camera.rect.right == level.right
+    assert not camera.follow(pygame.Rect(3990, 300, 10, 10), level)
+
+
+def test_only_chunks_around_the_viewport_are_loaded(game):
+    grid = Grid(game, rows=20, cols=200)
+    size = grid.CHUNK_SIZE * grid.bwidth
+    grid.draw(game.screen)
+    loaded = {chunk.col for chunk in grid.active if chunk.loaded}
+    assert loaded == set(range(game.width // size + 1 + grid.CHUNK_MARGIN))
+
+    game.camera.follow(pygame.Rect(grid.width // 2, 0, 1, 1), grid.rect)
+    grid.draw(game.screen)
+    first, last = game.camera.rect.left // size, (game.camera.rect.right - 1) // size
+    loaded_now = {chunk.col for chunk in grid.chunks.values() if chunk.loaded}
+    assert loaded_now == set(range(first - grid.CHUNK_MARGIN, last + grid.CHUNK_MARGIN + 1))
+    assert not loaded & loaded_now
+
+
+def test_tiles_placed_in_unloaded_chunks_are_baked_on_load(game):
+    grid = Grid(game, rows=20, cols=200)
+    grid.draw(game.screen)
+    x = grid.width - grid.bwidth
+    grid.place(x, 0, SolidBlock)
+    chunk = grid._chunk_of(0, grid.cols - 1)
+    assert not chunk.loaded
+    game.camera.follow(pygame.Rect(x, 0, 1, 1), grid.rect)
+    grid.draw(game.screen)
+    assert chunk.loaded and chunk.surface.get_at((x - chunk.rect.x + 1, 1))[:3] == SolidBlock.COLOR
@@ -0,0 +1,203 @@
+import pygame
+import pytest
+
+from plat.core.components import BaseComponent
+from plat.core.mixins import GravityMixin
+from plat.core.fun import MoverCollissionsWithBlocksMixin, SwimmerMixin
+from plat.core.physics import BatchMoverMixin
+from plat.core.states import State
+from plat.core.grid import Grid, SolidBlock, LiquidBlock, CrumbleBlock
+
+
+FLOOR_ROW = 10
+FLOOR_TOP = FLOOR_ROW * 40
+
+
+class Faller(MoverCollissionsWithBlocksMixin, GravityMixin, BaseComponent):
+    FRICTION = 0
+    SCROLLS = False
+    START = (100, 100)
+
+    def get_attrs(self):
+        image = pygame.Surface((10, 10))
+        rect = image.get_rect()
+        rect.midbottom = self.START
+        return image, rect
+
+    def get_input_vel(self):
+        return 0, 0
+
+    def on_update(self):
+        super().on_update()
+        self.calculate_newpos()
+
+
+class BatchFaller(BatchMoverMixin, Faller):
+    pass
+
+
+class Swimmer(SwimmerMixin, Faller):
+    pass
+
+
+def fall(game, grid, cls, steps=60):
+    class FallState(State):
+        COMPONENTS = [cls]
+
+    game.states = {'fall': FallState(game, grid)}
+    game.state = 'fall'
+    state = game.state.obj
+    mover = next(c for c in state.children if isinstance(c, cls))
+    for frame in range(steps):
+        game.frame = frame
+        state.update()
+    return mover
+
+
+@pytest.fixture
+def floor(game):
+    grid = Grid(game, rows=20, cols=20)
+    for c in range(20):
+        grid.place(c * 40, FLOOR_TOP, SolidBlock)
+    return grid
+
+
+@pytest.mark.parametrize('gravity', [0.76, 50, 300])
+@pytest.mark.parametrize('cls', [Faller, BatchFaller])
+def test_lands_on_the_floor(game, floor, monkeypatch, cls, gravity):
+    if cls is BatchFaller:
+        pytest.importorskip('numpy')
+    monkeypatch.setattr(Faller, 'GRAVITY', gravity)
+    mover = fall(game, floor, cls)
+    assert mover.rect.bottom == FLOOR_TOP
+    assert mover.velocity.y == 0
+
+
+def test_fast_movers_do_not_tunnel(game, floor, monkeypatch):
+    # One step crosses the whole floor row and lands past it without the sweep
+    monkeypatch.setattr(Faller, 'GRAVITY', 300)
+    bottoms = []
+
+    class Tracked(Faller):
+        def on_update(self):
+            super().on_update()
+            bottoms.append(self.rect.bottom)
+
+    mover = fall(game, floor, Tracked, steps=5)
+    assert max(bottoms) == FLOOR_TOP
+    assert [c.normal for c in mover.contacts] in ([], [pygame.Vector2(0, -1)])
+
+
+def test_contact_on_landing(game, floor, monkeypatch):
+    monkeypatch.setattr(Faller, 'GRAVITY', 50)
+    contacts = []
+
+    class Tracked(Faller):
+        def on_update(self):
+            super().on_update()
+            contacts.extend(self.contacts)
+
+    fall(game, floor, Tracked, steps=3)
+    assert contacts and contacts[0].normal == pygame.Vector2(0, -1)
+    assert issubclass(contacts[0].tile.kind, SolidBlock) and contacts[0].tile.r == FLOOR_ROW
+
+
+def test_liquid_hits_come_from_the_sweep(game, monkeypatch):
+    grid = Grid(game, rows=20, cols=20)
+    for r in range(0, 8):
+        grid.place(80, r * 40, LiquidBlock)
+    monkeypatch.setattr(Faller, 'GRAVITY', 0.76)
+    hits = []
+
+    class Tracked(Swimmer):
+        def _apply_liquid_slowdown(self, hit):
+            super()._apply_liquid_slowdown(hit)
+            hits.append(hit)
+
+    calls = []
+    collide = grid.collide
+    monkeypatch.setattr(grid, 'collide', lambda sprite: calls.append(sprite) or collide(sprite))
+    fall(game, grid, Tracked, steps=20)
+    assert hits and all(issubclass(h.kind, LiquidBlock) for h in hits)
+    # Only the one-shot push out of the first update probes the grid
+    assert len(calls) == 1
+
+
+def test_pushed_out_of_a_block_placed_over_it(game, monkeypatch):
+    grid = Grid(game, rows=20, cols=20)
+    monkeypatch.setattr(Faller, 'GRAVITY', 0)
+    mover = fall(game, grid, Faller, steps=2)
+    assert mover.rect.bottom == 100
+
+    # Block with the mover in its upper half, pushed out on top of it
+    grid.place(80, 95, SolidBlock)
+    state = game.state.obj
+    calls = []
+    collide = grid.collide
+    monkeypatch.setattr(grid, 'collide', lambda sprite: calls.append(sprite) or collide(sprite))
+    for _ in range(5):
+        state.update()
+    assert mover.rect.bottom == 80
+    assert len(calls) == 1
+
+
+def test_landing_on_crumble_blocks_breaks_them(game, monkeypatch):
+    grid = Grid(game, rows=20, cols=20)
+    for c in range(20):
+        grid.place(c * 40, FLOOR_TOP, CrumbleBlock)
+    monkeypatch.setattr(Faller, 'GRAVITY', 2)
+    mover = fall(game, grid, Faller, steps=20)
+    assert mover.rect.bottom == FLOOR_TOP
+    state = game.state.obj
+    for _ in range(CrumbleBlock.CRUMBLE_STEPS + 20):
+        state.update()
+    assert mover.rect.bottom == grid.height
+    assert grid.tiles[FLOOR_ROW * 20 + 2] == grid.EMPTY and grid.tiles[FLOOR_ROW * 20 + 10] == grid.tile_id(CrumbleBlock)
+
+
+class Drifter(Swimmer):
+    GRAVITY = 0
+
+    def new(self):
+        super().new()
+        self.velocity = pygame.Vector2(6, 0)
+        self.wet, self.track = [], []
+
+    def _apply_liquid_slowdown(self, hit):
+        super()._apply_liquid_slowdown(hit)
+        self.wet.append(self.game.frame)
+
+    def on_update(self):
+        super().on_update()
+        self.track.append(self.velocity.x)
+
+
+class BatchDrifter(BatchMoverMixin, Drifter):
+    pass
+
+
+@pytest.mark.parametrize('cls', [Drifter, BatchDrifter])
+def test_liquid_slows_down_the_next_step(game, cls):
+    if cls is BatchDrifter:
+        pytest.importorskip('numpy')
+    grid = Grid(game, rows=20, cols=20)
+    for r in range(20):
+        grid.place(200, r * 40, LiquidBlock)
+    mover = fall(game, grid, cls, steps=30)
+    first = mover.wet[0]
+    assert mover.track[:first + 1] == [6] * (first + 1)
+    assert mover.track[first + 1] == 6 / (1 + LiquidBlock.SLOWDOWN_DELTA)
+    # Slowed down once per step in the liquid, not twice
+    assert mover.track[first + 2] == mover.track[first + 1] / (1 + LiquidBlock.SLOWDOWN_DELTA)
+
+
+def test_liquid_slows_down_both_paths_alike(game):
+    pytest.importorskip('numpy')
+    tracks = []
+    for cls in (Drifter, BatchDrifter):
+        grid = Grid(game, rows=20, cols=20)
+        for r in range(20):
+            grid.place(200, r * 40, LiquidBlock)
+        mover = fall(game, grid, cls, steps=40)
+        tracks.append((mover.wet, mover.track, mover.rect.midbottom))
+    assert tracks[0] == tracks[1]
@@ -0,0 +1,191 @@
+import os
+import json
+from concurrent.futures import wait
+
+import pygame
+
+from plat.core import mixins
+from plat.core.components import FrameCache, CachedFont, SpriteManager, BaseComponent, Animation, load_font, mask_bounds
+from plat.core.mixins import CollisionableMixin, AnimationMixin
+from plat.config import SPRITE_MAPS
+
+from conftest import SPRITES_DIR
+
+
+ATLAS = 'characters.blue'
+FRAMES = ['blue_01.png', 'blue_04.png']
+
+
+def test_frame_cache_evicts_the_least_recently_used():
+    cache = FrameCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_frame_cache_is_unbounded_without_maxsize():
+    cache = FrameCache()
+    for n in range(1000):
+        cache.put(n, n)
+    assert len(cache) == 1000 and cache.get(0) == 0
+
+
+def test_cached_font_renders_each_text_once():
+    font = CachedFont(pygame.font.Font(None, 20), maxsize=8)
+    first = font.render('velocity: [0, 0]', True, (0, 0, 0))
+    assert font.render('velocity: [0, 0]', True, (0, 0, 0)) is first
+    assert font.render('velocity: [0, 0]', True, (255, 0, 0)) is not first
+    assert font.get_linesize() == font.font.get_linesize()
+
+
+BUNDLED_FONT = os.path.join(os.path.dirname(pygame.__file__), pygame.font.get_default_font())
+
+
+def font_lookups(monkeypatch, path=BUNDLED_FONT):
+    lookups = []
+    monkeypatch.setattr(pygame.font, 'match_font', lambda name: lookups.append(name) or path)
+    return lookups
+
+
+def test_font_paths_are_cached_between_starts(tmp_path, monkeypatch):
+    lookups = font_lookups(monkeypatch)
+    first = load_font('somefont', 20, tmp_path)
+    assert lookups == ['somefont']
+    assert json.loads((tmp_path / 'fonts.json').read_text()) == {'somefont': BUNDLED_FONT}
+
+    second = CachedFont(load_font('somefont', 20, tmp_path))
+    assert lookups == ['somefont']
+    assert second.get_linesize() == first.get_linesize()
+
+
+def test_stale_font_paths_are_looked_up_again(tmp_path, monkeypatch):
+    (tmp_path / 'fonts.json').write_text(json.dumps({'somefont': str(tmp_path / 'gone.ttf')}))
+    lookups = font_lookups(monkeypatch)
+    load_font('somefont', 20, tmp_path)
+    assert lookups == ['somefont']
+    assert json.loads((tmp_path / 'fonts.json').read_text()) == {'somefont': BUNDLED_FONT}
+
+
+def test_missing_fonts_fall_back_to_the_bundled_one(tmp_path, monkeypatch):
+    lookups = font_lookups(monkeypatch, path=None)
+    assert load_font('nosuchfont', 20, tmp_path).get_linesize() == pygame.font.Font(None, 20).get_linesize()
+    load_font('nosuchfont', 20, tmp_path)
+    assert lookups == ['nosuchfont']
+
+
+def pixels(surface):
+    return pygame.image.tostring(surface, 'RGB')
+
+
+def frames(sprites):
+    return [pixels(sprites.get(ATLAS, name, flip=flip)) for name in FRAMES for flip in (False, True)]
+
+
+def test_frames_are_cached_flipped_and_unflipped(game):
+    sprites = SpriteManager(game, SPRITE_MAPS, SPRITES_DIR)
+    frame = sprites.get(ATLAS, FRAMES[0])
+    flipped = sprites.get(ATLAS, FRAMES[0], flip=True)
+    assert (sprites.cache.hits, sprites.cache.misses) == (0, 2)
+    assert sprites.get(ATLAS, FRAMES[0]) is frame
+    assert sprites.get(ATLAS, FRAMES[0], flip=True) is flipped
+    assert (sprites.cache.hits, sprites.cache.misses) == (2, 2)
+    assert pixels(flipped) == pixels(pygame.transform.flip(frame, True, False))
+    assert pixels(flipped) != pixels(frame)
+
+
+def test_lazy_atlases_load_on_their_first_frame(game):
+    sprites = SpriteManager(game, SPRITE_MAPS, SPRITES_DIR)
+    sprites.load(lazy=True)
+    assert not sprites.loaded(ATLAS)
+    sprites.get(ATLAS, FRAMES[0])
+    assert sprites.loaded(ATLAS)
+
+
+def test_prefetched_atlases_match_eager_ones(game):
+    eager = SpriteManager(game, SPRITE_MAPS, SPRITES_DIR)
+    eager.load()
+    sprites = SpriteManager(game, SPRITE_MAPS, SPRITES_DIR)
+    sprites.load(lazy=True)
+    sprites.prefetch()
+    assert sprites.pending and not sprites.loaded(ATLAS)
+    assert sprites.wait(timeout=10)
+    assert sprites.loaded(ATLAS) and not sprites.pending
+    assert frames(sprites) == frames(eager)
+
+
+def test_poll_finishes_decoded_atlases(game):
+    sprites = SpriteManager(game, SPRITE_MAPS, SPRITES_DIR)
+    sprites.load(lazy=True)
+    sprites.prefetch([ATLAS])
+    wait(list(sprites._pending.values()))
+    assert not sprites.loaded(ATLAS)
+    sprites.poll()
+    assert sprites.loaded(ATLAS) and not sprites.pending
+    assert sprites.load_times[ATLAS][1] == 'source'
+
+
+def test_mask_bounds_hold_every_set_pixel():
+    mask = pygame.mask.Mask((20, 10))
+    for point in [(3, 2), (15, 7), (9, 4)]:
+        mask.set_at(point)
+    assert mask_bounds(mask) == pygame.Rect(3, 2, 13, 6)
+    assert mask_bounds(pygame.mask.Mask((5, 5))) == pygame.Rect(0, 0, 0, 0)
+
+
+def test_frame_masks_are_computed_once(game):
+    sprites = SpriteManager(game, SPRITE_MAPS, SPRITES_DIR)
+    first = sprites.get_mask(ATLAS, FRAMES[0])
+    assert sprites.get_mask(ATLAS, FRAMES[0]) is first
+    assert sprites.get_mask(ATLAS, FRAMES[0], flip=True) is not first
+    assert first.bounds == mask_bounds(pygame.mask.from_surface(sprites.get(ATLAS, FRAMES[0])))
+
+
+def count_masks(monkeypatch):
+    built = []
+    from_surface = mixins.from_surface
+    monkeypatch.setattr(mixins, 'from_surface', lambda surface: built.append(surface) or from_surface(surface))
+    return built
+
+
+class Box(CollisionableMixin, BaseComponent):
+    def get_attrs(self):
+        image = pygame.Surface((10, 10))
+        return image, image.get_rect()
+
+
+def test_masks_are_rebuilt_only_when_the_image_changes(game, monkeypatch):
+    built = count_masks(monkeypatch)
+    box = Box(game)
+    box.on_update()
+    box.on_update()
+    assert built == [box.image]
+    mask = box.mask
+
+    box.image = pygame.Surface((20, 10))
+    box.on_update()
+    box.on_update()
+    assert len(built) == 2 and box.mask is not mask and box.mask.get_size() == (20, 10)
+
+
+class AnimatedBox(AnimationMixin, Box):
+    def get_animations(self):
+        return {'walk': Animation('walk', [(ATLAS, name) for name in FRAMES], delay=-1).load(self.game.sprites)}
+
+    def default_animation(self):
+        return 'walk'
+
+
+def test_animation_frames_bring_their_masks(game, monkeypatch):
+    box = AnimatedBox(game)
+    image = box.image
+    built = count_masks(monkeypatch)
+    for _ in range(4):
+        box.on_update()
+        assert box.mask is game.sprites.get_mask(ATLAS, FRAMES[box.animations['walk'].current_frame]).mask
+    # Only the initial image, the frames come with their cached masks
+    assert built == [image]
@@ -0,0 +1,52 @@
+import pygame
+
+from plat.core.events import EventBus, subscriptions, block_unused
+from plat.core.utils import JOYBTN
+
+
+class Handler:
+    EVENTS = ((pygame.JOYBUTTONDOWN, JOYBTN['A']),)
+
+    def __init__(self):
+        self.children = []
+        self.seen = []
+
+    def on_event(self, event):
+        self.seen.append((event.type, event.button))
+
+
+class AnyButton(Handler):
+    EVENTS = (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP)
+
+
+def button(type_, name):
+    return pygame.event.Event(type_, button=JOYBTN[name])
+
+
+def test_events_only_reach_subscribed_handlers():
+    bus = EventBus()
+    jumper, any_button = Handler(), AnyButton()
+    bus.subscribe_component(jumper)
+    bus.subscribe_component(any_button)
+    for event in (button(pygame.JOYBUTTONDOWN, 'A'), button(pygame.JOYBUTTONDOWN, 'X'), button(pygame.JOYBUTTONUP, 'A')):
+        bus.publish(event)
+    assert jumper.seen == [(pygame.JOYBUTTONDOWN, JOYBTN['A'])]
+    assert len(any_button.seen) == 3
+    bus.unsubscribe(any_button.on_event)
+    assert bus.types() == {pygame.JOYBUTTONDOWN}
+
+
+def test_plain_types_cover_their_buttons():
+    assert subscriptions(AnyButton()) == {(pygame.JOYBUTTONDOWN, None), (pygame.JOYBUTTONUP, None)}
+
+
+def test_block_unused_keeps_window_and_device_events():
+    try:
+        block_unused({pygame.JOYBUTTONUP})
+        assert pygame.event.get_blocked(pygame.JOYAXISMOTION)
+        assert pygame.event.get_blocked(pygame.MOUSEMOTION)
+        assert not pygame.event.get_blocked(pygame.JOYBUTTONUP)
+        for type_ in (pygame.QUIT, pygame.WINDOWFOCUSLOST, pygame.VIDEORESIZE, pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED):
+            assert not pygame.event.get_blocked(type_)
+    finally:
+        pygame.event.set_allowed(None)
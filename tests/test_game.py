@@ -0,0 +1,28 @@
+import pygame
+
+from plat.game import Game
+from plat.states import GameState
+
+
+def test_marks_are_dropped_when_the_loop_never_draws(game, grid):
+    game.dirty_rects = True
+    game.run(start_state=Game.GAME, states={Game.GAME: GameState(game, grid)}, frames=50, time_scale=0, draw_every=0)
+    game.mark_dirty(pygame.Rect(0, 0, 10, 10))
+    assert game._dirty == []
+
+
+def test_marks_are_dropped_without_dirty_rects(game):
+    game.dirty_rects = False
+    game._full_refresh = False
+    game.mark_dirty(pygame.Rect(0, 0, 10, 10))
+    assert game._dirty == []
+
+
+def test_marks_are_pushed_and_cleared_on_draw(game, grid):
+    game.dirty_rects = True
+    game.run(start_state=Game.GAME, states={Game.GAME: GameState(game, grid)}, frames=1, time_scale=0)
+    assert not game._full_refresh
+    game.mark_dirty(pygame.Rect(0, 0, 10, 10))
+    assert game._dirty == [pygame.Rect(0, 0, 10, 10)]
+    game.do_draw()
+    assert game._dirty == []
@@ -0,0 +1,211 @@
+import random
+
+import pygame
+import pytest
+
+from plat.core.components import SpriteGroup
+from plat.core.grid import Grid, Block, SolidBlock, LiquidBlock, CrumbleBlock
+from plat.core.utils import RED, GREEN
+
+from test_level import random_tiles
+
+
+def test_placed_tiles_only_live_in_the_tile_array(game, grid):
+    sprites = len(SpriteGroup.ALL_SPRITES)
+    for c in range(grid.cols):
+        grid.place(c * grid.bwidth, 0, SolidBlock)
+    grid.set_square_xy(0, 40, LiquidBlock.from_(grid.get_square_xy(0, 40)))
+    assert grid.blocks == {}
+    assert len(SpriteGroup.ALL_SPRITES) == sprites
+    assert grid.tiles.itemsize == 1 and len(grid.tiles) == grid.rows * grid.cols
+    assert grid.tiles[:grid.cols].tolist() == [grid.tile_id(SolidBlock)] * grid.cols
+    assert grid.tiles[grid.cols] == grid.tile_id(LiquidBlock)
+
+
+def test_collisions_do_not_create_blocks(game, grid):
+    grid.place(80, 80, SolidBlock)
+    created = grid.pool.created
+    probe = pygame.sprite.Sprite()
+    probe.rect = pygame.Rect(70, 70, 20, 20)
+    hits = grid.collide(probe)
+    assert [(t.kind, t.r, t.c, t.rect) for t in hits] == [(SolidBlock, 2, 2, pygame.Rect(80, 80, 40, 40))]
+    assert grid.pool.created == created and grid.blocks == {}
+
+
+def brute_force_tiles(grid, rect):
+    return [
+        (grid.TILES[grid.tiles[r * grid.cols + c]], r, c)
+        for r in range(grid.rows)
+        for c in range(grid.cols)
+        if grid.tiles[r * grid.cols + c] != grid.EMPTY
+        and rect.colliderect(pygame.Rect(c * grid.bwidth, r * grid.bheight, grid.bwidth, grid.bheight))
+    ]
+
+
+@pytest.mark.parametrize('from_level', [False, True])
+def test_tiles_in_rect_match_a_brute_force_overlap_check(game, tmp_path, from_level):
+    rows, cols = 37, 45
+    grid = Grid(game, rows=rows, cols=cols)
+    grid.tiles = random_tiles(rows, cols)
+    if from_level:
+        path = str(tmp_path / 'level.plat')
+        grid.save(path)
+        grid = Grid(game)
+        grid.load(path)
+    rng = random.Random(5)
+    rects = [pygame.Rect(-40, -40, 100, 100), pygame.Rect(40, 40, 40, 40), pygame.Rect(41, 39, 1, 1), grid.rect.inflate(80, 80)]
+    rects += [pygame.Rect(rng.randint(-100, grid.width), rng.randint(-100, grid.height), rng.randint(1, 300), rng.randint(1, 300)) for _ in range(200)]
+    for rect in rects:
+        tiles = grid.tiles_in_rect(rect)
+        assert [(t.kind, t.r, t.c) for t in tiles] == brute_force_tiles(grid, rect), rect
+        assert all(t.rect == pygame.Rect(t.c * 40, t.r * 40, 40, 40) for t in tiles)
+
+
+def test_get_square_builds_a_block_that_is_not_kept(game, grid):
+    grid.place(120, 40, LiquidBlock)
+    block = grid.get_square_xy(130, 50)
+    assert isinstance(block, LiquidBlock) and (block.r, block.c) == (1, 3)
+    assert grid.blocks == {}
+    assert grid.get_square_xy(-1, 0) is None
+
+
+def test_tiles_are_drawn_from_the_baked_chunks(game, grid):
+    grid.draw(game.screen)
+    grid.place(40, 40, SolidBlock)
+    chunk = grid._chunk_of(1, 1)
+    assert chunk.surface.get_at((50, 50))[:3] == RED
+    grid.place(40, 40, Block)
+    assert chunk.surface.get_at((50, 50))[:3] == Block.COLOR
+
+
+class Lava(SolidBlock):
+    STATIC = False
+    updates = 0
+
+    def on_update(self):
+        super().on_update()
+        self.updates += 1
+
+
+def test_kept_blocks_sleep_until_woken(game, grid, monkeypatch):
+    monkeypatch.setattr(Grid, 'TILES', Grid.TILES + [Lava])
+    grid.place(0, 0, Lava)
+    lava = grid.get_square_xy(0, 0)
+    assert isinstance(lava, Lava) and grid.blocks == {0: lava}
+    chunk = grid._chunk_of(0, 0)
+    grid.draw(game.screen)
+    for _ in range(3):
+        grid.update()
+    assert lava.updates == 1 and chunk.awake == {}
+
+    grid.wake(lava)
+    assert chunk.awake == {0: lava}
+    for _ in range(3):
+        grid.update()
+    assert lava.updates == 2 and chunk.awake == {}
+
+    grid.place(0, 0, Block)
+    assert grid.blocks == {} and not lava.alive()
+
+
+def test_crumble_blocks_break_after_being_touched(game, grid):
+    grid.place(0, 0, CrumbleBlock)
+    block = grid.get_square_xy(0, 0)
+    chunk = grid._chunk_of(0, 0)
+    grid.draw(game.screen)
+    grid.update()
+    assert chunk.awake == {} and block.crumbling is None
+
+    grid.touch(grid.tiles_in_rect(block.rect)[0], None)
+    for step in range(CrumbleBlock.CRUMBLE_STEPS - 1):
+        grid.update()
+        assert chunk.awake == {0: block}
+    grid.update()
+    assert grid.tiles[0] == grid.EMPTY and grid.blocks == {} and chunk.awake == {}
+
+
+def test_kept_blocks_are_created_when_a_level_is_read(game, grid, tmp_path):
+    path = str(tmp_path / 'level.plat')
+    grid.place(17 * 40, 18 * 40, CrumbleBlock)
+    grid.save(path)
+    loaded = Grid(game)
+    loaded.load(path)
+    assert loaded.blocks == {}
+    assert isinstance(loaded.get_square_xy(17 * 40, 18 * 40), CrumbleBlock)
+    assert list(loaded.blocks) == [18 * 20 + 17]
+
+
+def test_lookups_are_owned_by_the_grid(game, grid):
+    pool = grid.pool
+    block = grid.get_square_xy(0, 0)
+    for _ in range(3):
+        assert grid.get_square_xy(10, 10) is block
+    assert pool.stats() == {'live': 0, 'pooled': 0, 'created': 1, 'reused': 0}
+
+    # Changing the cell gives its lookup back, the next lookup reuses it
+    grid.place(0, 0, SolidBlock)
+    assert pool.pooled == 1
+    again = grid.get_square_xy(200, 200)
+    assert again is block and (again.r, again.c) == (5, 5) and again.rect.topleft == (200, 200)
+    assert isinstance(grid.get_square_xy(0, 0), SolidBlock)
+    assert pool.stats() == {'live': 0, 'pooled': 0, 'created': 2, 'reused': 1}
+
+
+def test_lookups_are_released_with_their_chunk(game):
+    grid = Grid(game, rows=100, cols=100)
+    grid.update()
+    grid.get_square_xy(0, 0)
+    game.camera.rect.topleft = (3000, 3000)
+    grid.update()
+    assert grid.pool.pooled == 1
+
+
+def test_blocks_set_by_the_caller_stay_with_it(game, grid):
+    block = SolidBlock.from_(grid.get_square_xy(0, 0))
+    grid.set_square_xy(0, 0, block)
+    assert isinstance(grid.get_square_xy(0, 0), SolidBlock)
+    other = SolidBlock.from_(grid.get_square_xy(400, 400))
+    assert other is not block and (block.r, block.c) == (0, 0)
+    assert block not in grid.pool.free.get(SolidBlock, [])
+    grid.place(0, 0, Block)
+    assert block not in grid.pool.free.get(SolidBlock, [])
+
+
+def test_pool_keeps_at_most_size_blocks_per_type(game, grid):
+    grid.pool.size = 2
+    blocks = [grid.pool.acquire(SolidBlock, c, 0) for c in range(4)]
+    for block in blocks:
+        grid.pool.release(block)
+    assert grid.pool.pooled == 2
+    grid.pool.clear()
+    assert grid.pool.pooled == 0
+
+
+def test_recoloured_tiles_survive_a_chunk_reload(game):
+    grid = Grid(game, rows=100, cols=100)
+    grid.place(0, 0, SolidBlock)
+    grid.update()
+    grid.get_square_xy(0, 0).color = GREEN
+    chunk = grid._chunk_of(0, 0)
+    assert chunk.surface.get_at((5, 5))[:3] == GREEN
+
+    game.camera.rect.topleft = (3000, 3000)
+    grid.update()
+    assert not chunk.loaded
+    game.camera.rect.topleft = (0, 0)
+    grid.update()
+    assert chunk.surface.get_at((5, 5))[:3] == GREEN
+    assert grid.get_square_xy(0, 0).color == GREEN
+
+    # A new tile drops the colour
+    grid.place(0, 0, SolidBlock)
+    assert chunk.surface.get_at((5, 5))[:3] == RED and grid.colors == {}
+
+
+def test_recolouring_a_block_off_the_grid_leaves_the_cell(game, grid):
+    grid.draw(game.screen)
+    block = SolidBlock.from_(grid.get_square_xy(0, 0))
+    block.color = GREEN
+    assert grid.colors == {} and grid._chunk_of(0, 0).surface.get_at((5, 5))[:3] == Block.COLOR
+    grid.set_square_xy(0, 0, block)
+    assert grid.colors == {0: GREEN} and grid._chunk_of(0, 0).surface.get_at((5, 5))[:3] == GREEN
@@ -0,0 +1,105 @@
+import math
+
+import pygame
+import pytest
+
+from plat.core.grid import Grid, SolidBlock
+from plat.core.inputs import InputLog, InputReplay
+from plat.core.utils import JOYBTN
+from plat.game import Game
+from plat.states import GameState
+
+
+FRAMES = 240
+PRESSES = {30: (pygame.JOYBUTTONDOWN, 'A'), 34: (pygame.JOYBUTTONUP, 'A'), 120: (pygame.JOYBUTTONDOWN, 'A'), 150: (pygame.JOYBUTTONUP, 'A')}
+
+
+class FakeJoystick:
+    """ Controller swinging its x axis, read by the recorder. """
+    frame = 0
+
+    def __init__(self, *args):
+        pass
+
+    def init(self):
+        pass
+
+    def get_numaxes(self):
+        return 2
+
+    def get_axis(self, axis):
+        return math.sin(FakeJoystick.frame / 20) if axis == 0 else 0.0
+
+
+def play(make_game, record=None, replay=None):
+    track = []
+
+    class TrackGame(Game):
+        def do_event(self):
+            FakeJoystick.frame = self.frame
+            if record and self.frame in PRESSES:
+                type_, button = PRESSES[self.frame]
+                pygame.event.post(pygame.event.Event(type_, button=JOYBTN[button], joy=0, instance_id=0))
+            super().do_event()
+
+        def do_update(self):
+            super().do_update()
+            track.append((self.frame, tuple(self.player.pos), tuple(self.player.velocity)))
+
+    game = make_game(TrackGame)
+    if record:
+        game.record_input()
+    if replay:
+        game.replay_input(replay)
+    grid = Grid(game, rows=20, cols=20)
+    for c in range(20):
+        grid.place(c * 40, 19 * 40, SolidBlock)
+    game.run(start_state=Game.GAME, states={Game.GAME: GameState(game, grid)}, frames=FRAMES,
+             time_scale=0, draw_every=1 if record else 0)
+    if record:
+        game.input.save(record)
+    return track
+
+
+def test_replay_reproduces_the_recorded_run(make_game, monkeypatch, tmp_path):
+    monkeypatch.setattr(pygame.joystick, 'get_count', lambda: 1)
+    monkeypatch.setattr(pygame.joystick, 'Joystick', FakeJoystick)
+    path = str(tmp_path / 'run.inp')
+    recorded = play(make_game, record=path)
+    monkeypatch.setattr(pygame.joystick, 'get_count', lambda: 0)
+    replayed = play(make_game, replay=path)
+    assert replayed == recorded
+    assert len({pos for _, pos, _ in recorded}) > 50
+    assert min(pos[1] for _, pos, _ in recorded[130:]) < 700
+
+
+def test_log_round_trip(tmp_path):
+    log = InputLog.from_script(['0 axes 0.5 -0.25', '3 press A', '4 release A', '5 quit'], frames=8)
+    assert log.frames == 8
+    path = str(tmp_path / 'run.inp')
+    log.save(path)
+    loaded = InputLog.load(path)
+    assert loaded.axes == log.axes and loaded.events == log.events
+
+
+def test_replay_hands_out_recorded_events_by_frame():
+    replay = InputReplay(InputLog.from_script(['0 axes 1 0', '2 press X', '2 release X', '6 quit']))
+    replay.step(0)
+    assert replay.get_axis(0) == 1.0
+    assert list(replay.events(1)) == []
+    assert [(e.type, e.button) for e in replay.events(2)] == [(pygame.JOYBUTTONDOWN, JOYBTN['X']), (pygame.JOYBUTTONUP, JOYBTN['X'])]
+    assert [e.type for e in replay.events(9)] == [pygame.QUIT]
+    replay.step(100)
+    assert replay.finished and replay.get_axis(0) == 0.0
+
+
+def test_bad_script_lines_are_reported():
+    with pytest.raises(ValueError, match='line 2'):
+        InputLog.from_script(['0 axes 1 0', '3 press NOPE'])
+
+
+@pytest.mark.parametrize('line', ['4 axes 1', '4 axes 1 0 0.5', '4 axes'])
+def test_axes_lines_need_a_value_per_axis(line):
+    with pytest.raises(ValueError, match='line 3: axes takes 2 values'):
+        InputLog.from_script(['0 axes 1 0', '# comment', line])
+    assert InputLog.from_script(['0 axes 1 0', '4 axes 0 -1'], frames=6).naxes == 2
@@ -0,0 +1,77 @@
+import random
+from array import array
+
+import pytest
+
+from plat.core.grid import Grid, SolidBlock, LiquidBlock
+from plat.core.level import LevelFile
+
+
+def random_tiles(rows, cols, seed=3):
+    rng = random.Random(seed)
+    tiles = array('B', bytes(rows * cols))
+    for ix in range(len(tiles)):
+        # Long runs with some noise, like real levels
+        tiles[ix] = rng.choice((0, 0, 0, 0, 1, 2)) if rng.random() < 0.2 else tiles[ix - 1] if ix else 0
+    return tiles
+
+
+@pytest.mark.parametrize('rows, cols, chunk_size', [(20, 20, 16), (33, 70, 16), (5, 300, 8), (1, 1, 16)])
+def test_round_trip_keeps_every_tile(tmp_path, rows, cols, chunk_size):
+    tiles = random_tiles(rows, cols)
+    path = tmp_path / 'level.plat'
+    LevelFile.write(str(path), tiles, rows, cols, 40, 40, chunk_size)
+    with LevelFile(str(path)) as level:
+        assert (level.rows, level.cols, level.bheight, level.bwidth, level.chunk_size) == (rows, cols, 40, 40, chunk_size)
+        decoded = array('B', bytes(rows * cols))
+        for crow in range(level.chunk_rows):
+            for ccol in range(level.chunk_cols):
+                level.read_into(decoded, crow, ccol)
+    assert decoded == tiles
+
+
+def test_chunks_are_decoded_on_their_own(tmp_path):
+    rows, cols = 40, 40
+    tiles = random_tiles(rows, cols)
+    path = tmp_path / 'level.plat'
+    LevelFile.write(str(path), tiles, rows, cols, 40, 40, 16)
+    with LevelFile(str(path)) as level:
+        row, col, height, width = level.chunk_area(2, 1)
+        assert (row, col, height, width) == (32, 16, 8, 16)
+        expected = b''.join(tiles[r * cols + col:r * cols + col + width].tobytes() for r in range(row, row + height))
+        assert level.read_chunk(2, 1) == expected
+
+
+def test_long_runs_are_split(tmp_path):
+    rows, cols = 300, 300
+    tiles = array('B', bytes(rows * cols))
+    path = tmp_path / 'level.plat'
+    LevelFile.write(str(path), tiles, rows, cols, 40, 40, 300)
+    with LevelFile(str(path)) as level:
+        assert level.read_chunk(0, 0) == bytes(rows * cols)
+    assert path.stat().st_size < 100
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'level.plat'
+    path.write_bytes(b'not a level at all, just some bytes')
+    with pytest.raises(ValueError):
+        LevelFile(str(path))
+
+
+def test_grid_save_and_lazy_load(game, tmp_path):
+    grid = Grid(game, rows=40, cols=50)
+    grid.place(0, 0, SolidBlock)
+    grid.place(45 * 40, 38 * 40, LiquidBlock)
+    path = str(tmp_path / 'level.plat')
+    grid.save(path)
+
+    loaded = Grid(game)
+    loaded.load(path)
+    assert (loaded.rows, loaded.cols) == (40, 50)
+    assert loaded.level is not None and not loaded.chunks
+    assert isinstance(loaded.get_square_xy(45 * 40, 38 * 40), LiquidBlock)
+    assert len(loaded.chunks) == 1
+    assert isinstance(loaded.get_square_xy(0, 0), SolidBlock)
+    loaded.save(str(tmp_path / 'copy.plat'))
+    assert loaded.tiles == grid.tiles
@@ -0,0 +1,231 @@
+import random
+
+import pygame
+import pytest
+
+from plat.core.components import BaseComponent
+from plat.core.mixins import MoverMixin, GravityMixin
+from plat.core.physics import MoverBatch, BatchMoverMixin
+from plat.core.states import State
+from plat.core.grid import Grid, SolidBlock, LiquidBlock
+from plat.game import Game
+from plat.states import GameState
+
+pytest.importorskip('numpy')
+
+
+STEPS = 300
+
+
+def inputs(seed=7):
+    rng = random.Random(seed)
+    return [(rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(STEPS)]
+
+
+class Dot(GravityMixin, MoverMixin, BaseComponent):
+    GRAVITY = 0.76
+    FRICTION = -0.09
+    INPUT_VEL_MULTIPLIER = pygame.Vector2(0.6, 0.4)
+    SCROLLS = False
+
+    def get_attrs(self):
+        image = pygame.Surface((10, 10))
+        rect = image.get_rect()
+        rect.midbottom = (400, 300)
+        return image, rect
+
+    def get_input_vel(self):
+        return self.inputs[self.game.frame]
+
+    def on_update(self):
+        self.calculate_newpos()
+
+
+class BatchDot(BatchMoverMixin, Dot):
+    STEP_HOOKS = False
+
+
+class DotsState(State):
+    COMPONENTS = [Dot, BatchDot]
+
+
+def test_batch_integration_matches_mover_mixin(game, grid):
+    moves = inputs()
+    Dot.inputs = moves
+    game.states = {'dots': DotsState(game, grid)}
+    game.state = 'dots'
+    state = game.state.obj
+    scalar, batched = sorted((c for c in state.children if isinstance(c, Dot)), key=lambda c: isinstance(c, BatchDot))
+    assert state.movers is not None and batched.movers is state.movers and len(state.movers) == 1
+
+    for frame in range(STEPS):
+        game.frame = frame
+        batched.set_input(*moves[frame])
+        state.update()
+        assert batched.pos == scalar.pos, frame
+        assert batched.velocity == scalar.velocity, frame
+        assert batched.acceleration == scalar.acceleration, frame
+
+
+def test_in_place_changes_reach_the_batch(game, grid):
+    Dot.inputs = inputs()
+    game.states = {'dots': DotsState(game, grid)}
+    game.state = 'dots'
+    batched = next(c for c in game.state.obj.children if isinstance(c, BatchDot))
+    batched.velocity.x = 3
+    batched.velocity[1] = -2
+    assert tuple(game.state.obj.movers.velocity[batched.batch_index]) == (3, -2)
+
+
+def test_removing_a_mover_keeps_rows_contiguous(game, grid):
+    Dot.inputs = inputs()
+    game.states = {'dots': DotsState(game, grid)}
+    game.state = 'dots'
+    state = game.state.obj
+    first = next(c for c in state.children if isinstance(c, BatchDot))
+    second = BatchDot(game, grid=grid)
+    state.add(second)
+    second.velocity = (5, 0)
+    first.kill()
+    assert len(state.movers) == 1 and second.batch_index == 0 and first.movers is None
+    assert second.velocity == (5, 0)
+
+
+LEVEL_SCRIPT = """
+50 axes 0.9 0
+60 press A
+44 release A
+90 press A
+110 release A
+150 axes -0.9 0
+170 press A
+200 release A
+240 axes 0 0
+"""
+
+
+def run_player(make_game, monkeypatch, tmp_path, batch):
+    from plat.core import states
+    monkeypatch.setattr(states, 'BATCH_MOVERS', batch)
+    script = tmp_path / 'moves.txt'
+    script.write_text(LEVEL_SCRIPT)
+    track = []
+
+    class TrackGame(Game):
+        def do_update(self):
+            super().do_update()
+            player = self.player
+            track.append((player.pos, tuple(player.velocity)))
+
+    game = make_game(TrackGame)
+    game.replay_input(str(script))
+    grid = Grid(game, rows=20, cols=20)
+    for c in range(20):
+        grid.place(c * 40, 19 * 40, SolidBlock)
+    for r in range(12, 19):
+        for c in range(4):
+            grid.place(c * 40, r * 40, LiquidBlock)
+    for r in range(16, 19):
+        grid.place(4 * 40, r * 40, SolidBlock)
+    state = GameState(game, grid)
+    game.run(start_state=Game.GAME, states={Game.GAME: state}, frames=STEPS, time_scale=0, draw_every=0)
+    assert (state.movers is not None) == batch
+    return track
+
+
+def test_batched_player_moves_like_the_scalar_one(make_game, monkeypatch, tmp_path):
+    scalar = run_player(make_game, monkeypatch, tmp_path, batch=False)
+    batched = run_player(make_game, monkeypatch, tmp_path, batch=True)
+    assert len(batched) == STEPS
+    assert batched == scalar
+    xs = {pos.x for pos, _ in scalar}
+    assert max(xs) - min(xs) > 50
+
+
+class Glider(Dot):
+    GRAVITY = 0
+    FRICTION = 0
+    INPUT_VEL_MULTIPLIER = pygame.Vector2(1, 1)
+
+    def get_input_vel(self):
+        return (0, 0)
+
+
+class BatchGlider(BatchMoverMixin, Glider):
+    STEP_HOOKS = False
+
+
+class GlidersState(State):
+    COMPONENTS = [Glider, BatchGlider]
+
+
+def gliders(game, grid):
+    game.states = {'gliders': GlidersState(game, grid)}
+    game.state = 'gliders'
+    state = game.state.obj
+    movers = sorted((c for c in state.children if isinstance(c, Glider)), key=lambda c: isinstance(c, BatchGlider))
+    for mover in movers:
+        mover.velocity = pygame.Vector2(4, -2)
+    return state, movers
+
+
+def halfway(a, b):
+    return round((a[0] + b[0]) / 2), round((a[1] + b[1]) / 2)
+
+
+def test_draw_rect_interpolates_the_last_step(game, grid):
+    state, movers = gliders(game, grid)
+    game.alpha = 0.5
+    assert [m.draw_rect() for m in movers] == [m.rect for m in movers]
+
+    for _ in range(3):
+        before = [m.rect.midbottom for m in movers]
+        state.update()
+    for mover, last in zip(movers, before):
+        assert mover.rect.midbottom != last
+        game.alpha = 0.5
+        assert mover.draw_rect().midbottom == halfway(last, mover.rect.midbottom)
+        assert mover.draw_rect().size == mover.rect.size
+        game.alpha = 0
+        assert mover.draw_rect() == mover.rect
+
+
+def test_fixed_steps_carry_the_remainder_to_the_next_frame(make_game, grid, monkeypatch):
+    import plat.game
+    # Binary fractions so the accumulator adds up exactly
+    monkeypatch.setattr(plat.game, 'PHYSICS_RATE', 64)
+    step = 1 / 64
+    loops = []
+
+    class Clock:
+        def tick(self, fps):
+            return step * 1.5 * 1000
+
+    class TimedGame(Game):
+        def do_update(self):
+            super().do_update()
+            loops[-1]['updates'].append([m.rect.midbottom for m in movers])
+
+        def do_event(self):
+            loops.append({'updates': []})
+            super().do_event()
+
+        def do_draw(self):
+            loops[-1]['alpha'] = self.alpha
+            loops[-1]['drawn'] = [m.draw_rect().midbottom for m in movers]
+
+    game = make_game(TimedGame)
+    game.clock = Clock()
+    _, movers = gliders(game, grid)
+    previous = [m.rect.midbottom for m in movers]
+    game.run(start_state='gliders', states=game.states, frames=6, time_scale=1, draw_every=1)
+
+    assert [len(loop['updates']) for loop in loops] == [1, 2, 1, 2]
+    assert [loop['alpha'] for loop in loops] == [0.5, 0, 0.5, 0]
+    for loop in loops:
+        *_, current = loop['updates']
+        if loop['alpha']:
+            assert loop['drawn'] == [halfway(a, b) for a, b in zip(previous, current)]
+        else:
+            assert loop['drawn'] == current
+        previous = current
@@ -0,0 +1,41 @@
+import json
+
+from plat.core.profiler import Profiler
+
+
+def test_only_sampled_frames_are_measured():
+    profiler = Profiler(enabled=True, sample_every=3)
+    for frame in range(9):
+        profiler.begin_frame(frame)
+        with profiler.span('update'):
+            pass
+        profiler.end_frame()
+    assert len(profiler.durations['update']) == 3
+    assert len(profiler.durations['frame']) == 3
+
+
+def test_disabled_profiler_hands_out_the_null_span():
+    profiler = Profiler(enabled=False)
+    profiler.begin_frame(0)
+    assert profiler.span('update') is Profiler.NULL_SPAN
+    profiler.end_frame()
+    assert not profiler.durations and not profiler.events
+
+
+def test_percentiles_over_the_window():
+    profiler = Profiler(enabled=True, window=100)
+    for ms in range(1, 201):
+        profiler.add('draw', 0, ms * 1_000_000)
+    p = profiler.percentiles('draw', (50, 95, 100))
+    assert p == {50: 151.0, 95: 196.0, 100: 200.0}
+    assert profiler.percentiles('missing') == {50: 0.0, 95: 0.0, 99: 0.0}
+
+
+def test_chrome_trace_export(tmp_path):
+    profiler = Profiler(enabled=True)
+    profiler.add('event', 2_000, 5_000)
+    path = tmp_path / 'trace.json'
+    profiler.export(str(path))
+    data = json.loads(path.read_text())
+    (event,) = data['traceEvents']
+    assert (event['name'], event['ph'], event['ts'], event['dur']) == ('event', 'X', 2.0, 3.0)
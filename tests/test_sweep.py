@@ -0,0 +1,45 @@
+import pytest
+
+from plat import sweep
+from plat.components.player import Player
+from plat.core.inputs import InputLog
+from plat.core.utils import JOYBTN
+
+
+SCRIPT = """
+0 axes 0.8 0
+10 press Y
+20 press A
+25 release A
+30 press START
+40 press B
+"""
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / 'jump.txt'
+    path.write_text(SCRIPT)
+    return str(path)
+
+
+@pytest.mark.parametrize('frames', ['0', '-5'])
+def test_frames_must_be_positive(capsys, frames):
+    with pytest.raises(SystemExit) as exit:
+        sweep.main(['--frames', frames])
+    assert exit.value.code == 2
+    assert 'greater than 0' in capsys.readouterr().err
+
+
+def test_state_buttons_are_stripped_from_the_script(script):
+    events = sweep.load_script(script).log.events
+    assert [(kind, button) for _, kind, button in events] == [(InputLog.BUTTON_DOWN, JOYBTN['A']), (InputLog.BUTTON_UP, JOYBTN['A'])]
+
+
+def test_params_only_apply_to_the_run(script):
+    gravity = Player.GRAVITY
+    low = sweep.simulate({'GRAVITY': 0.5}, script=script, frames=200)
+    high = sweep.simulate({'GRAVITY': 1.5}, script=script, frames=200)
+    assert Player.GRAVITY == gravity
+    assert low['GRAVITY'] == 0.5 and high['GRAVITY'] == 1.5
+    assert low['time_to_land'] > high['time_to_land']
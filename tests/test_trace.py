@@ -0,0 +1,43 @@
+import gc
+
+from plat.core.trace import PhysicsTrace
+
+
+class Arrow:
+    pass
+
+
+def test_dead_and_new_entities_get_different_tracks():
+    trace = PhysicsTrace(capacity=16)
+    for frame in range(5):
+        arrow = Arrow()
+        trace.frame = frame
+        trace.record(arrow, trace.COLLISION, 1, 2)
+        del arrow
+        gc.collect()
+    entities = {entity for _, entity, *_ in trace.records()}
+    assert len(entities) == 5
+
+
+def test_ring_buffer_keeps_the_last_records_in_order():
+    trace = PhysicsTrace(capacity=4)
+    arrow = Arrow()
+    for frame in range(10):
+        trace.frame = frame
+        trace.record(arrow, trace.ACC_BEFORE_INPUT, frame, -frame)
+    records = list(trace.records())
+    assert len(trace) == 4
+    assert [(frame, x, y) for frame, _, _, x, y in records] == [(6, 6, -6), (7, 7, -7), (8, 8, -8), (9, 9, -9)]
+    assert {entity for _, entity, *_ in records} == {f'Arrow#{arrow.trace_id}'}
+    assert {kind for _, _, kind, *_ in records} == {'acc_before_input'}
+
+
+def test_clear_keeps_entity_ids(tmp_path):
+    trace = PhysicsTrace(capacity=4)
+    arrow = Arrow()
+    trace.record(arrow, trace.COLLISION, 0)
+    trace.clear()
+    trace.record(arrow, trace.COLLISION, 0)
+    path = tmp_path / 'trace.csv'
+    trace.dump(str(path))
+    assert path.read_text().splitlines() == ['frame,entity,kind,x,y', f'0,Arrow#{arrow.trace_id},collision,0.0,0.0']